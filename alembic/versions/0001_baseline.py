@@ -0,0 +1,132 @@
+"""baseline: users, chats, user_chat, holidays, report, system_data, admins_app
+
+DataBase created before migrations already has these tables: alembic stamp 0001
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "admins_app",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("login", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("status", sa.Boolean(), nullable=False),
+        sa.Column("info", sa.String(), nullable=True),
+        sa.CheckConstraint("length(login) BETWEEN 3 AND 20", name="login_length_range"),
+        sa.CheckConstraint("length(password) BETWEEN 8 AND 32", name="password_length_range"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("login"),
+        sa.UniqueConstraint("password"),
+    )
+    op.create_table(
+        "system_data",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=30), nullable=False),
+        sa.Column("data_digital", sa.BigInteger(), nullable=True),
+        sa.Column("data_text", sa.String(), nullable=True),
+        sa.Column("data_status", sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("title"),
+    )
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("telegram_id", sa.BigInteger(), nullable=False),
+        sa.Column("first_name", sa.String(), nullable=False),
+        sa.Column("last_name", sa.String(), nullable=True),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("language_code", sa.String(length=3), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("phone_number", sa.String(length=30), nullable=True),
+        sa.Column("birthday", sa.Date(), nullable=True),
+        sa.Column("status", sa.Boolean(), nullable=False),
+        sa.Column("info", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("telegram_id"),
+    )
+    op.create_table(
+        "chats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("card_number", sa.String(length=16), nullable=False),
+        sa.Column("status", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("chat_id"),
+    )
+    op.create_table(
+        "user_login",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_telegram_id", sa.BigInteger(), nullable=False),
+        sa.Column("password", sa.String(length=30), nullable=True),
+        sa.ForeignKeyConstraint(["user_telegram_id"], ["users.telegram_id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_telegram_id"),
+    )
+    op.create_table(
+        "holidays",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("chat_id", sa.Integer(), nullable=False),
+        sa.Column("info", sa.String(), nullable=True),
+        sa.Column("date_event", sa.Date(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("status", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["chat_id"], ["chats.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "user_chat",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("chat_id", sa.Integer(), nullable=False),
+        sa.Column("user_telegram_id", sa.BigInteger(), nullable=False),
+        sa.Column("status", sa.Boolean(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["chat_id"], ["chats.id"]),
+        sa.ForeignKeyConstraint(["user_telegram_id"], ["users.telegram_id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "report",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("chat_id", sa.Integer(), nullable=False),
+        sa.Column("holiday_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["chat_id"], ["chats.id"]),
+        sa.ForeignKeyConstraint(["holiday_id"], ["holidays.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("report")
+    op.drop_table("user_chat")
+    op.drop_table("holidays")
+    op.drop_table("user_login")
+    op.drop_table("chats")
+    op.drop_table("users")
+    op.drop_table("system_data")
+    op.drop_table("admins_app")
@@ -0,0 +1,141 @@
+"""scheduler tables: outbox, run_ledger, image_asset, prepared_content, scheduler_run, admin_panel;
+chat delivery window and title; unique user_chat and report
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:10:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("dedup_key", sa.String(), nullable=False),
+        sa.Column("kind", sa.String(length=30), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("fallback_chat_id", sa.BigInteger(), nullable=True),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.Column("image_url", sa.String(), nullable=True),
+        sa.Column("image_key", sa.String(), nullable=True),
+        sa.Column("reply_markup", sa.String(), nullable=True),
+        sa.Column("edit_message_id", sa.BigInteger(), nullable=True),
+        sa.Column("status", sa.String(length=10), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("dedup_key"),
+    )
+    op.create_index("ix_outbox_status_next_attempt_at", "outbox", ["status", "next_attempt_at"], unique=False)
+    op.create_table(
+        "run_ledger",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("run_date", sa.Date(), nullable=False),
+        sa.Column("job", sa.String(length=30), nullable=False),
+        sa.Column("chat_id", sa.Integer(), nullable=False),
+        sa.Column("recipient_id", sa.BigInteger(), nullable=False),
+        sa.Column("kind", sa.String(length=30), nullable=False),
+        sa.Column("status", sa.String(length=10), nullable=False),
+        sa.Column("claimed_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("run_date", "job", "chat_id", "recipient_id", "kind", name="uq_run_ledger_key"),
+    )
+    op.create_table(
+        "image_asset",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("url", sa.String(), nullable=True),
+        sa.Column("file_path", sa.String(), nullable=True),
+        sa.Column("file_id", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("key"),
+    )
+    op.create_table(
+        "prepared_content",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.Column("image_key", sa.String(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("key"),
+    )
+    op.create_table(
+        "scheduler_run",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job", sa.String(length=50), nullable=False),
+        sa.Column("run_date", sa.Date(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("duration", sa.Float(), nullable=False),
+        sa.Column("ok", sa.Boolean(), nullable=False),
+        sa.Column("counters", sa.JSON(), nullable=False),
+        sa.Column("stages", sa.JSON(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "admin_panel",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("holiday_id", sa.Integer(), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("message_id", sa.BigInteger(), nullable=True),
+        sa.Column("content_hash", sa.String(length=40), nullable=True),
+        sa.Column("pending_hash", sa.String(length=40), nullable=True),
+        sa.Column("dedup_key", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["holiday_id"], ["holidays.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("holiday_id"),
+    )
+    op.add_column("chats", sa.Column("timezone", sa.String(length=40), nullable=True))
+    op.add_column("chats", sa.Column("send_from", sa.String(length=5), nullable=True))
+    op.add_column("chats", sa.Column("send_to", sa.String(length=5), nullable=True))
+    op.add_column("chats", sa.Column("title", sa.String(), nullable=True))
+    op.add_column("chats", sa.Column("title_updated_at", sa.DateTime(), nullable=True))
+    """Дублікати, створені до унікальних ключів, видаляємо: лишається найстаріший рядок, для report - оплачений"""
+    op.execute(
+        "DELETE FROM user_chat a USING user_chat b "
+        "WHERE a.id > b.id AND a.chat_id = b.chat_id AND a.user_telegram_id = b.user_telegram_id"
+    )
+    op.create_unique_constraint("uq_user_chat_chat_user", "user_chat", ["chat_id", "user_telegram_id"])
+    op.execute(
+        "DELETE FROM report a USING report b "
+        "WHERE a.user_id = b.user_id AND a.chat_id = b.chat_id AND a.holiday_id = b.holiday_id "
+        "AND (b.status > a.status OR (b.status = a.status AND b.id < a.id))"
+    )
+    op.create_unique_constraint("uq_report_user_chat_holiday", "report", ["user_id", "chat_id", "holiday_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_report_user_chat_holiday", "report", type_="unique")
+    op.drop_constraint("uq_user_chat_chat_user", "user_chat", type_="unique")
+    op.drop_column("chats", "title_updated_at")
+    op.drop_column("chats", "title")
+    op.drop_column("chats", "send_to")
+    op.drop_column("chats", "send_from")
+    op.drop_column("chats", "timezone")
+    op.drop_table("admin_panel")
+    op.drop_table("scheduler_run")
+    op.drop_table("prepared_content")
+    op.drop_table("image_asset")
+    op.drop_table("run_ledger")
+    op.drop_index("ix_outbox_status_next_attempt_at", table_name="outbox")
+    op.drop_table("outbox")
@@ -0,0 +1,46 @@
+"""indexes for hot lookups: users by phone, chats of user and of admin, holidays of user in chat,
+reports of holiday, last runs of jobs, the latest scheduler runs, pending admin panels
+
+user_chat(chat_id, user_telegram_id) and report(user_id, chat_id, holiday_id) are served by unique keys of 0002.
+Indexes are built CONCURRENTLY - tables are not locked for writes on live DataBase.
+Check that queries use them: python -m src.sql.explain_db
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:20:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_users_phone_number", "users", ["phone_number"]),
+    ("ix_user_chat_user_telegram_id", "user_chat", ["user_telegram_id"]),
+    ("ix_chats_user_id", "chats", ["user_id"]),
+    ("ix_holidays_user_id_chat_id", "holidays", ["user_id", "chat_id"]),
+    ("ix_holidays_chat_id", "holidays", ["chat_id"]),
+    ("ix_report_holiday_id_chat_id", "report", ["holiday_id", "chat_id"]),
+    ("ix_run_ledger_job_kind_run_date", "run_ledger", ["job", "kind", "run_date"]),
+    ("ix_scheduler_run_started_at", "scheduler_run", ["started_at"]),
+    ("ix_admin_panel_dedup_key", "admin_panel", ["dedup_key"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
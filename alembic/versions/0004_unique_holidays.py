@@ -0,0 +1,46 @@
+"""unique holiday of user in chat: holidays(user_id, chat_id, date_event)
+
+Duplicates are merged into the oldest holiday: reports are moved to it (of two reports of one member the paid one,
+then the oldest, stays), admin panels of duplicates are deleted - the scheduler sends the panel again.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:30:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """holiday_keep: id дубліката -> id найстарішої події з тими ж (user_id, chat_id, date_event)"""
+    op.execute(
+        "CREATE TEMPORARY TABLE holiday_keep ON COMMIT DROP AS "
+        "SELECT id, keep_id FROM ("
+        "SELECT id, MIN(id) OVER (PARTITION BY user_id, chat_id, date_event) AS keep_id "
+        "FROM holidays WHERE user_id IS NOT NULL"
+        ") h WHERE id <> keep_id"
+    )
+    op.execute(
+        "DELETE FROM report a USING report b "
+        "WHERE a.user_id = b.user_id AND a.chat_id = b.chat_id AND a.id <> b.id "
+        "AND COALESCE((SELECT keep_id FROM holiday_keep WHERE id = a.holiday_id), a.holiday_id) "
+        "= COALESCE((SELECT keep_id FROM holiday_keep WHERE id = b.holiday_id), b.holiday_id) "
+        "AND (b.status > a.status OR (b.status = a.status AND b.id < a.id))"
+    )
+    op.execute("UPDATE report SET holiday_id = k.keep_id FROM holiday_keep k WHERE report.holiday_id = k.id")
+    op.execute("DELETE FROM admin_panel USING holiday_keep k WHERE admin_panel.holiday_id = k.id")
+    op.execute("DELETE FROM holidays USING holiday_keep k WHERE holidays.id = k.id")
+    op.create_unique_constraint("uq_holidays_user_chat_date", "holidays", ["user_id", "chat_id", "date_event"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_holidays_user_chat_date", "holidays", type_="unique")
@@ -33,6 +33,20 @@ REDIS_NUMBER_DB = 2
 """ DataBase 'birthday_bot' on Linux Ubuntu in Digital Ocean """
 URI_DB = os.environ.get("UBUNTU_URI_DB")
 
+""" Пул з'єднань з DataBase: розмір, скільки з'єднань понад розмір, скільки секунд чекаємо вільне з'єднання,
+через скільки секунд з'єднання перевідкривається. DB_POOL_PRE_PING=1 - перевірка з'єднання при кожному checkout
+(зайвий запит до бази, розірвані з'єднання і так повторює retry_on_db_error) """
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = int(os.environ.get("DB_POOL_PRE_PING", 0))
+""" Кеш prepared statements asyncpg на з'єднання. DB_PGBOUNCER=1 - pgbouncer в режимі transaction: кеш вимкнено,
+а advisory lock лідера йде в Postgres напряму по URI_DB_DIRECT (без нього планувальник не стартує) """
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 100))
+DB_PGBOUNCER = int(os.environ.get("DB_PGBOUNCER", 0))
+URI_DB_DIRECT = os.environ.get("UBUNTU_URI_DB_DIRECT")
+
 """Connect to DataBase 'BirthdayBot' on MongoDB."""
 MONGO_URI = os.environ.get("MONGO_URI")
 
@@ -57,3 +71,66 @@ my_banc_card = os.environ.get("MY_BANC_CARD")
 GROUP_R_D = int(os.environ.get("GROUP_R_D", 0))
 GROUP_TEST = int(os.environ.get("GROUP_TEST", 0))
 VALID_GROUPS_FOR_BOT = [GROUP_R_D, GROUP_TEST]
+
+""" Scheduler: скільки чатів обробляємо одночасно під час щоденної перевірки """
+SCHEDULER_CHATS_CONCURRENCY = int(os.environ.get("SCHEDULER_CHATS_CONCURRENCY", 10))
+
+""" Telegram limits for fan-out: ~30 msg/s for bot, 1 msg/s for private chat, 20 msg/min for group """
+FAN_OUT_CONCURRENCY = int(os.environ.get("FAN_OUT_CONCURRENCY", 8))
+TELEGRAM_GLOBAL_RATE = 25
+TELEGRAM_CHAT_RATE = 1
+TELEGRAM_GROUP_RATE = 20 / 60
+FAN_OUT_MAX_CHAT_LIMITERS = 1000  # скільки лімітерів чатів тримаємо, вільні від черги видаляються
+
+""" Outbox: черга повідомлень від scheduler """
+OUTBOX_CONSUMERS = int(os.environ.get("OUTBOX_CONSUMERS", 2))
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_POLL_INTERVAL = 5  # seconds
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_RETRY_DELAY = 30  # seconds, подвоюється з кожною спробою
+OUTBOX_LEASE = 300  # seconds, після цього взяте, але не підтверджене повідомлення знову доступне
+
+""" Run ledger: через скільки секунд не завершена робота (claimed) може бути взята повторно """
+RUN_LEDGER_LEASE = 900
+
+""" Scheduler: як часто перечитуємо налаштування задач з system_data (секунди) """
+SCHEDULER_SETTINGS_REFRESH = int(os.environ.get("SCHEDULER_SETTINGS_REFRESH", 600))
+
+""" Scheduler catch-up: пропущені вікна за останні дні запускаємо при старті пачками з паузою """
+SCHEDULER_CATCH_UP_DAYS = int(os.environ.get("SCHEDULER_CATCH_UP_DAYS", 3))
+SCHEDULER_CATCH_UP_BATCH = 2  # вікон в одній пачці
+SCHEDULER_CATCH_UP_PAUSE = 60  # seconds між пачками
+
+""" Вікно доставки повідомлень чату за замовчуванням (Chat.timezone, Chat.send_from, Chat.send_to) """
+CHAT_TIMEZONE = "Europe/Kyiv"
+CHAT_SEND_FROM = "09:00"
+CHAT_SEND_TO = "21:00"
+
+""" AI: скільки варіантів прохання про внесок генеруємо одним запитом на подію, 0 - запит на кожного учасника """
+AI_ASKING_VARIANTS = int(os.environ.get("AI_ASKING_VARIANTS", 5))
+
+""" Привітання на завтра готуються заздалегідь (о PREPARE_GREETINGS_AT) і зберігаються PREPARED_CONTENT_TTL годин """
+PREPARE_GREETINGS_AT = os.environ.get("PREPARE_GREETINGS_AT", "22:00")
+PREPARED_CONTENT_TTL = int(os.environ.get("PREPARED_CONTENT_TTL", 36))
+
+""" Кілька реплік планувальника: лідер тримає advisory lock, інші перевіряють його кожні LEADER_CHECK_INTERVAL секунд """
+LEADER_LOCK_NAME = os.environ.get("LEADER_LOCK_NAME", "birthday_bot_scheduler")
+LEADER_CHECK_INTERVAL = int(os.environ.get("LEADER_CHECK_INTERVAL", 10))
+""" Окремий чат (не адмінський), куди нове зображення завантажується один раз: outbox будь-якої репліки відправляє
+його за Telegram file_id. 0 - не налаштовано: зображення відправляє з файлу тільки репліка, яка його створила """
+IMAGE_STORAGE_CHAT = int(os.environ.get("IMAGE_STORAGE_CHAT", 0))
+
+""" Скільки процесів ділять чати щоденної перевірки (Chat.id % SCHEDULER_SHARDS), 1 - все в процесі планувальника """
+SCHEDULER_SHARDS = int(os.environ.get("SCHEDULER_SHARDS", 1))
+
+""" Назва групи зберігається в Chat.title, щоденна задача оновлює назви, старші за CHAT_TITLE_MAX_AGE годин """
+CHAT_TITLE_MAX_AGE = int(os.environ.get("CHAT_TITLE_MAX_AGE", 24))
+
+""" Bulk insert / upsert: скільки рядків в одному INSERT (Postgres приймає не більше 32767 параметрів на запит) """
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", 1000))
+
+""" Кеш User за telegram_id: LRU в процесі на USER_CACHE_SIZE записів з TTL (секунди), USER_CACHE_REDIS=1 - ще й Redis """
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 60))
+USER_CACHE_REDIS = int(os.environ.get("USER_CACHE_REDIS", 0))
+USER_CACHE_REDIS_TTL = int(os.environ.get("USER_CACHE_REDIS_TTL", 600))
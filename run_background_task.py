@@ -1,6 +1,18 @@
+from asyncio import gather
 from asyncio import run as asyncio_run
 
+from src.bot_app.dir_service.image_cache import check_image_storage
+from src.dir_schedule.leader import Leader
+from src.dir_schedule.outbox_worker import OutboxWorker
 from src.dir_schedule.some_schedule import check_schedule
 
+
+async def main():
+    """Scheduler produces messages into outbox, OutboxWorker delivers them.
+    Several replicas can run: scheduler works only on the leader, outbox is consumed by all of them"""
+    check_image_storage()
+    await gather(Leader().run(work=check_schedule), OutboxWorker().run())
+
+
 if __name__ == "__main__":
-    asyncio_run(main=check_schedule())
+    asyncio_run(main=main())
@@ -0,0 +1,30 @@
+from argparse import ArgumentParser
+from asyncio import run as asyncio_run
+from datetime import date
+from json import dumps
+
+from src.dir_schedule.simulation import DryRun, SyntheticData
+
+
+async def main():
+    """Dry-run of the daily birthday check: nothing is sent and nothing is written to DataBase"""
+    parser = ArgumentParser(description="Simulate check_users_birthday over a range of dates")
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today(), help="first date, YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=1, help="number of simulated days")
+    parser.add_argument("--users", type=int, default=0, help="synthetic users, 0 - read DataBase")
+    parser.add_argument("--members", type=int, default=50, help="synthetic members per chat")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--days-to-birthday", type=int, default=10)
+    parser.add_argument("--ai-latency", type=float, default=0.0, help="seconds of every stub AI call")
+    parser.add_argument("--details", action="store_true", help="list every planned message")
+    args = parser.parse_args()
+    data = SyntheticData(users=args.users, members_per_chat=args.members, seed=args.seed) if args.users else None
+    dry_run = DryRun(
+        data=data, days_to_birthday=args.days_to_birthday, ai_latency=args.ai_latency, details=args.details
+    )
+    plan = await dry_run.run(start=args.start, days=args.days)
+    print(dumps(plan, ensure_ascii=False, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    asyncio_run(main=main())
@@ -281,8 +281,8 @@ class SetEvent:
             holiday.status = False if holiday.status else True
             holiday: Holiday = await func_db.doc_update(doc=holiday)
             await callback_query.answer(text="Статус події змінено!", show_alert=True)
-            await callback_query.message.delete()
-            await panel_set_holidays(chat=chat, holiday=holiday)
+            """Панель редагується на місці - адмін не отримує нове повідомлення"""
+            await panel_set_holidays(chat=chat, holiday=holiday, message_id=callback_query.message.message_id)
 
 
 class Settings:
@@ -1,5 +1,7 @@
 from asyncio import sleep
-from typing import List, Optional
+from datetime import date
+from hashlib import sha1
+from typing import Any, Dict, List, Optional
 
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup
 
@@ -7,16 +9,102 @@ from config import bot_link
 from src.bot_app.create_bot import bot
 from src.bot_app.dir_menu.buttons_for_menu import buttons_for_event_settings
 from src.dir_schedule.some_tools import DataAI
+from src.dir_schedule.writes import schedule_writes
 from src.service.create_data import user_data
+from src.service.loggers.py_logger_tel_bot import get_logger
 from src.sql.func_db import get_doc_by_id, get_user_reports
+from src.sql.func_outbox_db import outbox_message
+from src.sql.func_panel_db import get_admin_panel, save_admin_panel
 from src.sql.models import Chat, Holiday, Report, User, UserChat
+from src.sql.tool_db import db_failed
 
+logger = get_logger(__name__)
 
-async def panel_set_holidays(chat: Chat, holiday: Holiday):
-    """Send panel for Admin to set Holiday in DataBase"""
+
+async def panel_set_holidays(chat: Chat, holiday: Holiday, message_id: Optional[int] = None):
+    """Show panel for Admin to set Holiday in DataBase, int: message_id - panel pressed by admin"""
+    panel = await get_panel_set_holidays(chat=chat, holiday=holiday)
+    await show_panel(holiday=holiday, panel=panel, message_id=message_id)
+
+
+def panel_hash(panel: Dict[str, Any]) -> str:
+    """Hash of panel content: chat_id of admin, text and buttons"""
+    reply_markup = panel.get("reply_markup")
+    markup = reply_markup.model_dump_json(exclude_none=True) if reply_markup else ""
+    return sha1(f"{panel['chat_id']}\n{panel['text']}\n{markup}".encode()).hexdigest()
+
+
+async def show_panel(holiday: Holiday, panel: Dict[str, Any], message_id: Optional[int] = None) -> bool:
+    """Panel is edited in place (message_id or the last panel of holiday) and sent as a new message only when
+    there is nothing to edit. The same content is not sent again. True - admin sees the panel"""
+    content_hash = panel_hash(panel=panel)
+    stored = await get_admin_panel(holiday_id=holiday.id)
+    if stored and stored.chat_id == panel["chat_id"]:
+        if stored.content_hash == content_hash and message_id in (None, stored.message_id):
+            logger.debug(f"panel of holiday: {holiday.id} is not changed")
+            return True
+        message_id = message_id or stored.message_id
+    shown_id = None
+    if message_id:
+        try:
+            await bot.edit_message_text(message_id=message_id, **panel)
+            shown_id = message_id
+        except Exception as e:
+            if "message is not modified" in str(e):
+                shown_id = message_id
+            else:
+                logger.warning(f"panel of holiday: {holiday.id} is not edited, send new one: {e}")
+    if shown_id is None:
+        try:
+            message = await bot.send_message(**panel)
+        except Exception as e:
+            logger.error(f"panel of holiday: {holiday.id} is not sent: {e}")
+            return False
+        shown_id = message.message_id
+    await save_admin_panel(
+        holiday_id=holiday.id,
+        chat_id=panel["chat_id"],
+        message_id=shown_id,
+        content_hash=content_hash,
+        pending_hash=None,
+        dedup_key=None,
+    )
+    return True
+
+
+async def panel_outbox_message(
+    chat: Chat, holiday: Holiday, run_date: date, b_user: Optional[User] = None
+) -> Optional[Dict[str, Any]]:
+    """Panel for outbox (scheduler): it edits the last panel of admin. None - admin already has the same panel,
+    then a panel with other content still waiting in outbox is cancelled"""
+    panel = await get_panel_set_holidays(chat=chat, holiday=holiday, b_user=b_user)
+    content_hash = panel_hash(panel=panel)
+    stored = await get_admin_panel(holiday_id=holiday.id)
+    if stored and stored.chat_id == panel["chat_id"] and stored.content_hash == content_hash:
+        pending_key = stored.dedup_key
+        if pending_key:
+            """Вміст повернувся до доставленого (A -> B -> A): панель B з outbox перезаписала б A"""
+            await schedule_writes().save_admin_panel(
+                holiday_id=holiday.id, chat_id=panel["chat_id"], pending_hash=None, dedup_key=None
+            )
+            await schedule_writes().cancel_messages(dedup_keys=[pending_key])
+        return None
+    edit_message_id = stored.message_id if stored and stored.chat_id == panel["chat_id"] else None
+    dedup_key = f"panel:{run_date}:{holiday.id}:{content_hash[:16]}"
+    """Після доставки OutboxWorker запам'ятовує message_id і pending_hash стає content_hash"""
+    await schedule_writes().save_admin_panel(
+        holiday_id=holiday.id, chat_id=panel["chat_id"], pending_hash=content_hash, dedup_key=dedup_key
+    )
+    return outbox_message(kind="panel", dedup_key=dedup_key, edit_message_id=edit_message_id, **panel)
+
+
+async def get_panel_set_holidays(chat: Chat, holiday: Holiday, b_user: Optional[User] = None) -> Dict[str, Any]:
+    """Panel for Admin to set Holiday in DataBase: chat_id of admin, text and reply_markup.
+    User: b_user - birthday user if caller has it already"""
     title = await DataAI().get_title(chat=chat)
     admin: User = await get_doc_by_id(model="user", doc_id=chat.user_id)
-    b_user: Optional[User] = await get_doc_by_id(model="user", doc_id=holiday.user_id)
+    if not b_user or b_user.id != holiday.user_id:
+        b_user: Optional[User] = await get_doc_by_id(model="user", doc_id=holiday.user_id)
     if b_user:
         text = f"чат: <b>{title}</b>\n{user_data(user=b_user, is_birthday=True)}\nсума внеску: <b>{holiday.amount}</b>"
     else:
@@ -26,13 +114,13 @@ async def panel_set_holidays(chat: Chat, holiday: Holiday):
         )
     buttons = buttons_for_event_settings(role=admin.info, holiday=holiday)
     reply_markup = InlineKeyboardMarkup(inline_keyboard=buttons)
-    await bot.send_message(chat_id=admin.telegram_id, text=text, reply_markup=reply_markup)
+    return {"chat_id": admin.telegram_id, "text": text, "reply_markup": reply_markup}
 
 
 async def panel_make_payment(user: User, callback_query: CallbackQuery):
     """User check debt before his chats"""
     reports: List[Report] = await get_user_reports(user_id=user.id, status=False)
-    if reports is not None:
+    if not db_failed(reports):
         if reports:
             text, text_list = str(), list()
             for n, report in enumerate(start=1, iterable=reports):
@@ -1,4 +1,5 @@
 import os
+from functools import partial
 from io import BytesIO
 from typing import Dict, Optional, Union
 
@@ -17,9 +18,18 @@ from PIL import Image
 from config import bot_link, media_file_path
 from src.bot_app.create_bot import bot
 from src.bot_app.dir_menu.buttons_for_menu import b_my_groups
+from src.bot_app.dir_service.fan_out import FanOut, send_limited
+from src.service.clock import clock
 from src.service.loggers.py_logger_tel_bot import get_logger
-from src.service.service_tools import correct_time, validate_phone
-from src.sql.func_db import create_new_doc, doc_update, get_chat_with_user, get_chats, get_user_by_phone, get_user_chat
+from src.service.service_tools import validate_phone
+from src.sql.func_db import (
+    doc_update,
+    get_chat_with_user,
+    get_chats,
+    get_user_by_phone,
+    update_chat_title,
+    upsert_many,
+)
 from src.sql.models import Chat, User, UserChat
 
 logger = get_logger(__name__)
@@ -43,23 +53,20 @@ async def check_user_in_group(telegram_id: int, chat_id: int) -> bool:
 
 
 async def check_user_in_every_chat(user: User) -> Dict[str, int]:
-    """Check: is User member of one or more chats"""
+    """Check: is User member of one or more chats, his UserChat are created or updated by one upsert"""
     logger.info(f"start check_user_in_every_chat for user: {user.telegram_id}, {user.first_name}")
-    new_user_chat, updated_user_chat = 0, 0
+    rows = list()
     chats = await get_chats()
     for chat in chats:
         if await check_user_in_group(telegram_id=user.telegram_id, chat_id=chat.chat_id):
-            user_chat = await get_user_chat(chat_id=chat.id, user_telegram_id=user.telegram_id)
-            if user_chat:
-                # user_chat.status = True
-                user_chat.updated_at = correct_time()
-                r = await doc_update(doc=user_chat)
-                updated_user_chat = updated_user_chat + 1 if r else updated_user_chat
-            else:
-                user_chat = {"chat_id": chat.id, "user_telegram_id": user.telegram_id, "status": True}
-                r = await create_new_doc(model="user_chat", data=user_chat, data_has_datatime=False)
-                new_user_chat = new_user_chat + 1 if r else new_user_chat
-    res = {"new_user_chat": new_user_chat, "updated_user_chat": updated_user_chat}
+            rows.append(
+                {"chat_id": chat.id, "user_telegram_id": user.telegram_id, "status": True, "updated_at": clock.now()}
+            )
+    """Існуючий UserChat: оновлюємо тільки updated_at, status не змінюємо"""
+    bulk = await upsert_many(
+        model="user_chat", rows=rows, conflict=["chat_id", "user_telegram_id"], update_columns=["updated_at"]
+    )
+    res = {"new_user_chat": bulk.inserted if bulk else 0, "updated_user_chat": bulk.updated if bulk else 0}
     logger.info(str(res))
     return res
 
@@ -73,6 +80,9 @@ async def get_chat_info(
     except Exception as e:
         logger.error(e)
         chat_data = None
+    if chat_data and chat_data.title and chat_data.title != chat.title:
+        chat.title = chat_data.title
+        await update_chat_title(chat_id=chat.chat_id, title=chat_data.title)
     status = await check_user_in_group(telegram_id=admin.telegram_id, chat_id=chat.chat_id)
     if chat.status != status:
         chat.status = status
@@ -166,8 +176,9 @@ async def send_compressed_image(
     filename: str = "compressed_image.jpg",
     disable_notification=True,
     reply_markup: Optional[Union[InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove, ForceReply]] = None,
+    fan_out: Optional[FanOut] = None,
 ) -> bool:
-    """Відправляє стиснене зображення через Telegram"""
+    """Відправляє стиснене зображення через Telegram (в межах лімітів fan_out, якщо він переданий)"""
     # temp_filename = "compressed_image.jpg" - Ім'я тимчасового файлу
     res = False
     file_path = await download_and_compress_image(url=url, filename=filename)
@@ -175,13 +186,15 @@ async def send_compressed_image(
         try:
             # Використовуємо FSInputFile для відправки через Telegram
             input_file = FSInputFile(file_path)
-            await bot.send_photo(
+            send_photo = partial(
+                bot.send_photo,
                 chat_id=chat_id,
                 photo=input_file,
                 caption=caption,
                 reply_markup=reply_markup,
                 disable_notification=disable_notification,
             )
+            await send_limited(fan_out=fan_out, chat_id=chat_id, method=send_photo)
             res = True
         except Exception as e:
             logger.error(f"Error sending image: {e}")
@@ -3,6 +3,7 @@ from typing import List
 from src.bot_app.dir_service.bot_service import get_user_info
 from src.service.loggers.py_logger_tel_bot import get_logger
 from src.sql.complex_func_db import get_intersecting_users
+from src.sql.func_db import get_birthday_calendar
 from src.sql.models import User
 
 logger = get_logger(__name__)
@@ -14,7 +15,8 @@ async def get_schedule_holidays(user: User) -> List[str]:
     users = await get_intersecting_users(telegram_id=user.telegram_id)
     if user not in users:
         users.append(user)
-    sorted_users = sorted(users, key=lambda doc: (doc.birthday.month, doc.birthday.day))
+    calendar = await get_birthday_calendar()
+    sorted_users = sorted(users, key=lambda doc: calendar.sort_key(user_id=doc.id))
     if len(sorted_users) < 7:
         text = "".join(f"\n{get_user_info(user=doc, user_chat=None)}\n ------------" for doc in sorted_users)
         calendar_list.append(text)
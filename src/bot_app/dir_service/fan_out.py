@@ -0,0 +1,145 @@
+from asyncio import Lock, Semaphore, gather, sleep
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from config import (
+    FAN_OUT_CONCURRENCY,
+    FAN_OUT_MAX_CHAT_LIMITERS,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_GROUP_RATE,
+)
+from src.service.loggers.py_logger_tel_bot import get_logger
+from src.sql.tool_db import db_failed
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class SendResult:
+    """Result of one fan-out job for one recipient"""
+
+    recipient: int
+    ok: bool
+    result: Any = None
+    error: Optional[str] = None
+    duration: float = 0.0
+    kind: Optional[str] = None
+
+
+class RateLimiter:
+    """Give out time slots not more often than int: rate per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self.next_slot = 0.0
+        self.lock = Lock()
+
+    async def wait(self):
+        """Wait for the next free slot"""
+        async with self.lock:
+            now = monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            await sleep(slot - now)
+
+    def pause(self, seconds: float):
+        """Do not give out slots for the next seconds (Telegram flood control)"""
+        self.next_slot = max(self.next_slot, monotonic() + seconds)
+
+
+class FanOut:
+    """Bounded, rate-aware executor for jobs that send messages to many recipients"""
+
+    def __init__(
+        self,
+        concurrency: int = FAN_OUT_CONCURRENCY,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        group_rate: float = TELEGRAM_GROUP_RATE,
+        max_retries: int = 3,
+        max_chat_limiters: int = FAN_OUT_MAX_CHAT_LIMITERS,
+    ):
+        self.semaphore = Semaphore(value=concurrency)
+        self.global_limiter = RateLimiter(rate=global_rate)
+        self.chat_rate, self.group_rate = chat_rate, group_rate
+        self.chat_limiters: Dict[int, RateLimiter] = dict()
+        self.max_chat_limiters = max_chat_limiters
+        self.max_retries = max_retries
+
+    def chat_limiter(self, chat_id: int) -> RateLimiter:
+        """Per-chat limiter: groups (chat_id < 0) are slower than private chats"""
+        if chat_id not in self.chat_limiters:
+            if len(self.chat_limiters) >= self.max_chat_limiters:
+                self.evict_idle()
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            self.chat_limiters[chat_id] = RateLimiter(rate=rate)
+        return self.chat_limiters[chat_id]
+
+    def evict_idle(self) -> int:
+        """Drop limiters without slots in the future: such limiter gives a slot at once, the same as a new one,
+        so a long-living FanOut (outbox worker) does not keep a limiter for every chat it has ever sent to"""
+        now = monotonic()
+        idle = [chat_id for chat_id, limiter in self.chat_limiters.items() if limiter.next_slot <= now]
+        for chat_id in idle:
+            del self.chat_limiters[chat_id]
+        return len(idle)
+
+    async def send(self, chat_id: int, method: Callable[[], Awaitable[T]]) -> T:
+        """Call Telegram method for chat_id within global and per-chat limits, wait and retry on RetryAfter"""
+        for attempt in range(1, self.max_retries + 1):
+            await self.global_limiter.wait()
+            await self.chat_limiter(chat_id=chat_id).wait()
+            try:
+                return await method()
+            except Exception as e:
+                """TelegramRetryAfter має 'retry_after' - Телеграм просить почекати, інші помилки не повторюємо"""
+                retry_after = getattr(e, "retry_after", None)
+                if not isinstance(retry_after, (int, float)) or attempt == self.max_retries:
+                    raise
+                logger.warning(f"RetryAfter {retry_after}s for chat: {chat_id} (attempt {attempt})")
+                self.global_limiter.pause(seconds=retry_after)
+                await sleep(retry_after)
+
+    async def run_job(
+        self, recipient: int, job: Callable[[], Awaitable[Any]], kind: Optional[str] = None
+    ) -> SendResult:
+        """Run one job under the concurrency cap and measure it"""
+        async with self.semaphore:
+            start = monotonic()
+            try:
+                result = await job()
+                """Job повертає False або None, якщо нічого не зроблено, DBError - база недоступна"""
+                ok = result is not False and result is not None and not db_failed(result)
+                error = None if ok else "not delivered"
+                duration = monotonic() - start
+                return SendResult(recipient, ok=ok, result=result, error=error, duration=duration, kind=kind)
+            except Exception as e:
+                logger.error(f"fan-out job for {recipient} failed: {e}")
+                return SendResult(recipient, ok=False, error=str(e), duration=monotonic() - start, kind=kind)
+
+    async def run(
+        self, jobs: Iterable[Tuple[int, Callable[[], Awaitable[Any]]]], kind: Optional[str] = None
+    ) -> List[SendResult]:
+        """Run jobs (recipient, job) and return results in the same order"""
+        return list(await gather(*(self.run_job(recipient=recipient, job=job, kind=kind) for recipient, job in jobs)))
+
+
+async def send_limited(fan_out: Optional[FanOut], chat_id: int, method: Callable[[], Awaitable[T]]) -> T:
+    """Send through fan_out limits if it is given, otherwise call method directly"""
+    if fan_out:
+        return await fan_out.send(chat_id=chat_id, method=method)
+    return await method()
+
+
+def summary(results: List[SendResult]) -> Dict[str, float]:
+    """Short statistics for log: sent, failed and the slowest job"""
+    return {
+        "sent": sum(1 for res in results if res.ok),
+        "failed": sum(1 for res in results if not res.ok),
+        "max_duration": round(max((res.duration for res in results), default=0.0), 3),
+    }
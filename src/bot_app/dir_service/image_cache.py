@@ -0,0 +1,117 @@
+import os
+from functools import partial
+from hashlib import sha1
+from typing import Optional, Union
+
+from aiogram.types import ForceReply, FSInputFile, InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove
+
+from config import IMAGE_STORAGE_CHAT, media_file_path
+from src.bot_app.create_bot import bot
+from src.bot_app.dir_service.bot_service import download_and_compress_image
+from src.bot_app.dir_service.fan_out import FanOut, send_limited
+from src.dir_open_ai.open_ai_tools import ResponseImageAI
+from src.service.loggers.py_logger_tel_bot import get_logger
+from src.service.run_metrics import count, timer
+from src.sql.func_asset_db import get_image_asset, save_image_asset, set_image_file_id
+from src.sql.tool_db import db_failed
+
+logger = get_logger(__name__)
+
+CACHE_DIR = "cache"  # in media_file_path/images
+
+
+def image_key(subject: str, chat_pk: int, prompt: str) -> str:
+    """Key of image: subject ('holiday:{id}' | 'birthday:{user.id}:{year}'), Chat.id and hash of prompt"""
+    return f"{subject}:{chat_pk}:{sha1(prompt.encode()).hexdigest()[:16]}"
+
+
+async def get_or_create_image(key: str, prompt: str) -> Optional[str]:
+    """Return key of image ready to send: AI generation, download and compression happen only for a new key.
+    The file is only on disk of this replica, so the image is uploaded to IMAGE_STORAGE_CHAT at once and the outbox
+    of every replica sends it by file_id. None - there is no image (AI or download failed)"""
+    asset = await get_image_asset(key=key)
+    if asset:
+        logger.debug(f"image {key} from cache")
+        count(name="images_cached")
+        if not asset.file_id and asset.file_path and os.path.exists(asset.file_path):
+            await upload_image(key=key, file_path=asset.file_path)
+        return key
+    with timer(stage="ai_image"):
+        data_image = await ResponseImageAI().get_image_from_ai(prompt_for_ai=prompt)
+    url = data_image["image_url"] if isinstance(data_image, dict) and data_image.get("image_url") else None
+    if not url:
+        return None
+    os.makedirs(os.path.join(media_file_path, "images", CACHE_DIR), exist_ok=True)
+    filename = f"{CACHE_DIR}/{sha1(key.encode()).hexdigest()}.jpg"
+    file_path = await download_and_compress_image(url=url, filename=filename)
+    if not file_path:
+        return None
+    if db_failed(await save_image_asset(key=key, url=url, file_path=file_path)):
+        return None
+    count(name="images_generated")
+    await upload_image(key=key, file_path=file_path)
+    return key
+
+
+def check_image_storage(storage_chat: int = IMAGE_STORAGE_CHAT) -> bool:
+    """Log once at startup if IMAGE_STORAGE_CHAT is not set: images are not uploaded then"""
+    if not storage_chat:
+        logger.warning("IMAGE_STORAGE_CHAT is not set: images are sent from file only by the replica that created them")
+    return bool(storage_chat)
+
+
+async def upload_image(key: str, file_path: str, storage_chat: int = IMAGE_STORAGE_CHAT) -> Optional[str]:
+    """Upload file to storage_chat and remember its file_id. None - storage_chat is not set or upload failed:
+    then only this replica can send the image (from file), the others send text"""
+    if not storage_chat:
+        return None
+    try:
+        with timer(stage="image_upload"):
+            message = await bot.send_photo(
+                chat_id=storage_chat, photo=FSInputFile(file_path), caption=key, disable_notification=True
+            )
+    except Exception as e:
+        logger.error(f"Error uploading image {key}: {e}")
+        return None
+    file_id = message.photo[-1].file_id
+    await set_image_file_id(key=key, file_id=file_id)
+    return file_id
+
+
+async def send_cached_image(
+    chat_id: int,
+    key: str,
+    caption: str = None,
+    disable_notification=True,
+    reply_markup: Optional[Union[InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove, ForceReply]] = None,
+    fan_out: Optional[FanOut] = None,
+) -> bool:
+    """Send image from cache: by Telegram file_id if it was uploaded before, otherwise upload the file once
+    and remember its file_id"""
+    asset = await get_image_asset(key=key)
+    if not asset:
+        return False
+    if asset.file_id:
+        photo = asset.file_id
+    elif asset.file_path and os.path.exists(asset.file_path):
+        photo = FSInputFile(asset.file_path)
+    else:
+        logger.error(f"image {key} has neither file_id nor file")
+        return False
+    try:
+        send_photo = partial(
+            bot.send_photo,
+            chat_id=chat_id,
+            photo=photo,
+            caption=caption,
+            reply_markup=reply_markup,
+            disable_notification=disable_notification,
+        )
+        message = await send_limited(fan_out=fan_out, chat_id=chat_id, method=send_photo)
+    except Exception as e:
+        logger.error(f"Error sending image {key}: {e}")
+        return False
+    if not asset.file_id and message and message.photo:
+        """Далі Телеграм віддає це зображення за file_id - без повторного завантаження файлу"""
+        await set_image_file_id(key=key, file_id=message.photo[-1].file_id)
+    return True
@@ -4,7 +4,7 @@ import re
 from typing import Optional
 
 from aiogram import F
-from aiogram.types import FSInputFile, InputMediaDocument, Message
+from aiogram.types import ChatMemberUpdated, FSInputFile, InputMediaDocument, Message
 
 from config import (
     VALID_GROUPS_FOR_BOT,
@@ -20,9 +20,14 @@ from src.bot_app.dir_menu.send_panel import panel_set_holidays
 from src.bot_app.dir_service.bot_service import check_admin, check_user_in_group
 from src.service.loggers.py_logger_tel_bot import get_logger
 from src.service.msg_tools.voice_data import handle_voice
+from src.service.run_metrics import runs_report
 from src.service.service_tools import check_card_number
+from src.service.user_cache import user_cache
 from src.sql import func_db
+from src.sql.connect import pool_report
+from src.sql.func_system_db import get_scheduler_runs
 from src.sql.models import Chat, Holiday, User
+from src.sql.tool_db import db_failed, db_report
 
 logger = get_logger(__name__)
 menu = Menu()
@@ -59,6 +64,12 @@ async def working(message: Message):
                     except Exception as e:
                         text = f"ERROR in sending file '{log_file_}':\n{e}"
                         await bot.send_message(chat_id=telegram_id, text=text)
+        elif message.text == "runs" and (telegram_id == sb_telegram_id or (user and user.info == "super-admin")):
+            """Метрики останніх запусків планувальника"""
+            runs = await get_scheduler_runs(limit=5)
+            text = runs_report(runs=runs) if not db_failed(runs) else "Помилка читання запусків з бази даних"
+            text += f"\n\n{user_cache.report()}\n\n{db_report()}\n{pool_report()}"
+            await bot.send_message(chat_id=telegram_id, text=text)
         elif message.text.startswith(bot_user_name):
             """Get commands from admin and super-admin"""
             error_msg, success_msg = "Дані не валідні 🤬", "Дані оновлено ✌️"
@@ -159,3 +170,16 @@ async def working(message: Message):
     if del_msg:
         await message.delete()
         await menu.start_command(user=user)
+
+
+@dp.message(F.new_chat_title)
+async def new_chat_title(message: Message):
+    """Group was renamed - keep Chat.title up to date"""
+    await func_db.update_chat_title(chat_id=message.chat.id, title=message.new_chat_title)
+
+
+@dp.my_chat_member()
+async def my_chat_member(update: ChatMemberUpdated):
+    """Bot was added to group or its rights were changed - update brings the current title of group"""
+    if update.chat.title:
+        await func_db.update_chat_title(chat_id=update.chat.id, title=update.chat.title)
@@ -0,0 +1,201 @@
+from asyncio import sleep
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from heapq import heappop, heappush
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import (
+    SCHEDULER_CATCH_UP_BATCH,
+    SCHEDULER_CATCH_UP_DAYS,
+    SCHEDULER_CATCH_UP_PAUSE,
+    SCHEDULER_SETTINGS_REFRESH,
+)
+from src.service.clock import clock
+from src.service.loggers.py_logger_tel_bot import get_logger
+from src.service.run_metrics import track_run
+from src.sql.connect import pool_metrics
+from src.sql.func_system_db import get_last_runs, get_systems_data, save_scheduler_run
+from src.sql.models import SystemData
+from src.sql.tool_db import db_failed
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Job:
+    """Daily job: handler(job, fire) runs every day at 'HH:MM'.
+    SystemData with title=name overrides time (data_text) and number (data_digital)"""
+
+    name: str
+    handler: Callable[["Job", datetime], Awaitable[Any]]
+    default_at: str = "08:00"
+    default_digital: Optional[int] = None
+    at: str = field(init=False)
+    digital: Optional[int] = field(init=False)
+    next_run: Optional[datetime] = field(default=None, init=False)
+    last_run: Optional[datetime] = field(default=None, init=False)
+
+    def __post_init__(self):
+        self.at, self.digital = self.default_at, self.default_digital
+
+    def next_fire(self, after: datetime) -> datetime:
+        """The first 'HH:MM' strictly after datetime: after"""
+        hour, minute = map(int, self.at.split(":"))
+        fire = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if fire <= after:
+            fire += timedelta(days=1)
+        return fire
+
+    def missed(self, last_run_date: Optional[date], time_now: datetime, max_days: int) -> List[datetime]:
+        """Fire times after the day of the last done run up to time_now, not older than max_days.
+        Without any done run only today's window is checked"""
+        hour, minute = map(int, self.at.split(":"))
+        first_day = last_run_date + timedelta(days=1) if last_run_date else time_now.date()
+        first_day = max(first_day, time_now.date() - timedelta(days=max_days - 1))
+        windows = list()
+        for n in range((time_now.date() - first_day).days + 1):
+            fire = datetime.combine(first_day + timedelta(days=n), time(hour=hour, minute=minute))
+            if fire <= time_now:
+                windows.append(fire)
+        return windows
+
+    def apply(self, doc: Optional[SystemData]) -> bool:
+        """Take settings from SystemData (defaults if there is no doc), True - settings are changed"""
+        at = doc.data_text if doc and doc.data_text else self.default_at
+        digital = doc.data_digital if doc and doc.data_digital else self.default_digital
+        changed = (at, digital) != (self.at, self.digital)
+        self.at, self.digital = at, digital
+        return changed
+
+
+class JobRegistry:
+    """Registered jobs and heap of their next fire times: scheduler sleeps exactly until the next due job"""
+
+    def __init__(
+        self,
+        settings_refresh: float = SCHEDULER_SETTINGS_REFRESH,
+        catch_up_days: int = SCHEDULER_CATCH_UP_DAYS,
+        catch_up_batch: int = SCHEDULER_CATCH_UP_BATCH,
+        catch_up_pause: float = SCHEDULER_CATCH_UP_PAUSE,
+    ):
+        self.jobs: Dict[str, Job] = dict()
+        self.heap: List[Tuple[datetime, str]] = list()
+        self.settings_refresh = timedelta(seconds=settings_refresh)
+        self.catch_up_days = catch_up_days
+        self.catch_up_batch = catch_up_batch
+        self.catch_up_pause = catch_up_pause
+        self.settings_loaded_at: Optional[datetime] = None
+
+    def register(
+        self, name: str, handler: Callable[[Job, datetime], Awaitable[Any]], at: str = "08:00", digital: int = None
+    ) -> Job:
+        """Add job, it is scheduled with the first reload of settings"""
+        job = Job(name=name, handler=handler, default_at=at, default_digital=digital)
+        self.jobs[name] = job
+        return job
+
+    def schedule(self, job: Job, after: datetime):
+        """Push the next fire time of job into heap, the old entry of job becomes stale"""
+        job.next_run = job.next_fire(after=after)
+        heappush(self.heap, (job.next_run, job.name))
+
+    def next_runs(self) -> Dict[str, Optional[datetime]]:
+        """Next run time for every job"""
+        return {name: job.next_run for name, job in self.jobs.items()}
+
+    async def reload_settings(self, time_now: datetime) -> List[str]:
+        """Read SystemData of all jobs by one query and reschedule only jobs with changed settings"""
+        docs = await get_systems_data(titles=self.jobs)
+        self.settings_loaded_at = time_now
+        changed = list()
+        for name, job in self.jobs.items():
+            """База недоступна - лишаємо поточні налаштування до наступного оновлення"""
+            if (not db_failed(docs) and job.apply(doc=docs.get(name))) or job.next_run is None:
+                self.schedule(job=job, after=time_now)
+                changed.append(name)
+        if changed:
+            logger.info(f"jobs {changed} scheduled, next runs: {self.next_runs()}")
+        return changed
+
+    def pop_due(self, time_now: datetime) -> List[Tuple[Job, datetime]]:
+        """Take due jobs from heap in order of fire time, stale entries are skipped"""
+        due = list()
+        while self.heap and self.heap[0][0] <= time_now:
+            fire, name = heappop(self.heap)
+            job = self.jobs.get(name)
+            if job and job.next_run == fire:
+                due.append((job, fire))
+        return due
+
+    def delay(self, time_now: datetime) -> float:
+        """Seconds until the next due job or the next reload of settings"""
+        wake_up = [(self.settings_loaded_at or time_now) + self.settings_refresh]
+        if self.heap:
+            wake_up.append(self.heap[0][0])
+        return max((min(wake_up) - time_now).total_seconds(), 0.0)
+
+    async def run_job(self, job: Job, fire: datetime) -> bool:
+        """Run one job, errors of job do not stop scheduler. False - job failed or did nothing"""
+        logger.info(f"⏱ run job '{job.name}' for {fire}")
+        job.last_run = fire
+        pool_metrics.reset_peak()
+        with track_run(job=job.name, run_date=fire.date()) as metrics:
+            try:
+                ok = await job.handler(job, fire) is not False
+            except Exception as e:
+                logger.exception("⛔ Error during job '%s': %s", job.name, str(e))
+                ok = False
+            """Скільки з'єднань з базою було зайнято одночасно - за цим розміром налаштовується пул"""
+            peak = pool_metrics.reset_peak()
+            if peak:
+                metrics.count(name="db_pool_peak", n=peak)
+        """Метрики запуску зберігаються в базі - адмін бачить їх командою 'runs'"""
+        report = metrics.report()
+        logger.info(f"⏱ job '{job.name}' finished: {report}")
+        await save_scheduler_run(ok=ok, **report)
+        return ok
+
+    async def catch_up(self, time_now: datetime) -> List[Dict[str, Any]]:
+        """Run windows missed while scheduler was down: in order of fire time, by batches of catch_up_batch
+        windows with catch_up_pause between them. Return report [{job, window, ok}]"""
+        last_runs = await get_last_runs(jobs=self.jobs)
+        if db_failed(last_runs):
+            logger.error("get_last_runs() failed - skip catch-up")
+            return []
+        windows = sorted(
+            (fire, name)
+            for name, job in self.jobs.items()
+            for fire in job.missed(last_run_date=last_runs.get(name), time_now=time_now, max_days=self.catch_up_days)
+        )
+        report = list()
+        for number, (fire, name) in enumerate(windows):
+            if number and number % self.catch_up_batch == 0:
+                await sleep(self.catch_up_pause)
+            ok = await self.run_job(job=self.jobs[name], fire=fire)
+            report.append({"job": name, "window": fire, "ok": ok})
+        if report:
+            logger.info(f"catch-up: {len(report)} missed windows: {report}")
+        return report
+
+    async def tick(self) -> List[str]:
+        """Reload settings if it is time and run all due jobs"""
+        time_now = clock.now()
+        if not self.settings_loaded_at or time_now - self.settings_loaded_at >= self.settings_refresh:
+            await self.reload_settings(time_now=time_now)
+        due = self.pop_due(time_now=time_now)
+        for job, fire in due:
+            self.schedule(job=job, after=time_now)
+            await self.run_job(job=job, fire=fire)
+        if due:
+            logger.info(f"next runs: {self.next_runs()}")
+        return [job.name for job, _ in due]
+
+    async def run(self):
+        """Scheduler loop, it starts with catch-up of missed windows"""
+        await self.reload_settings(time_now=clock.now())
+        await self.catch_up(time_now=clock.now())
+        while True:
+            await self.tick()
+            delay = self.delay(time_now=clock.now())
+            logger.debug(f"⏱ sleep {delay:.0f}s, next runs: {self.next_runs()}")
+            await sleep(delay)
@@ -0,0 +1,46 @@
+from asyncio import CancelledError, create_task, sleep, wait
+from typing import Any, Awaitable, Callable
+
+from config import LEADER_CHECK_INTERVAL, LEADER_LOCK_NAME
+from src.service.loggers.py_logger_tel_bot import get_logger
+from src.sql.func_lock_db import AdvisoryLock
+
+logger = get_logger(__name__)
+
+
+class Leader:
+    """Leader election between scheduler replicas by Postgres advisory lock: only the holder of the lock runs work,
+    the other replicas stand by and try to take the lock every check_interval seconds"""
+
+    def __init__(self, lock_name: str = LEADER_LOCK_NAME, check_interval: float = LEADER_CHECK_INTERVAL):
+        self.lock = AdvisoryLock(name=lock_name)
+        self.check_interval = check_interval
+
+    async def lead(self, work: Callable[[], Awaitable[Any]]):
+        """Run work while the lock is held, work is cancelled as soon as the lock is lost"""
+        task = create_task(work())
+        try:
+            while not task.done():
+                await wait({task}, timeout=self.check_interval)
+                if not task.done() and not await self.lock.alive():
+                    logger.error("leadership is lost - stop work")
+                    break
+            if task.done() and not task.cancelled() and task.exception():
+                logger.error(f"work of leader failed: {task.exception()}")
+        finally:
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except CancelledError:
+                    pass
+            await self.lock.release()
+
+    async def run(self, work: Callable[[], Awaitable[Any]]):
+        """Stand by until this replica becomes leader, lead, and stand by again after leadership is lost"""
+        logger.info(f"replica stands by for leadership '{self.lock.name}'")
+        while True:
+            if await self.lock.try_acquire():
+                logger.info(f"👑 replica is leader '{self.lock.name}'")
+                await self.lead(work=work)
+            await sleep(self.check_interval)
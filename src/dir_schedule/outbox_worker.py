@@ -0,0 +1,175 @@
+from asyncio import gather, sleep
+from collections import Counter
+from datetime import timedelta
+from functools import partial
+from typing import Dict, List, Optional
+
+from aiogram.types import InlineKeyboardMarkup
+
+from config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_CONSUMERS,
+    OUTBOX_LEASE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETRY_DELAY,
+)
+from src.bot_app.create_bot import bot
+from src.bot_app.dir_service.bot_service import send_compressed_image
+from src.bot_app.dir_service.fan_out import FanOut, send_limited, summary
+from src.bot_app.dir_service.image_cache import send_cached_image
+from src.service.clock import clock
+from src.service.loggers.py_logger_tel_bot import get_logger
+from src.service.run_metrics import count
+from src.sql.func_outbox_db import claim_messages, mark_failed, mark_sent
+from src.sql.func_panel_db import panel_is_pending, set_panel_message
+from src.sql.models import Outbox
+from src.sql.tool_db import db_failed
+
+logger = get_logger(__name__)
+
+
+class OutboxWorker:
+    """Deliver messages from table 'outbox' to Telegram: retries with backoff and dead letters"""
+
+    def __init__(
+        self,
+        consumers: int = OUTBOX_CONSUMERS,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        retry_delay: float = OUTBOX_RETRY_DELAY,
+        lease: float = OUTBOX_LEASE,
+    ):
+        self.consumers = consumers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease = timedelta(seconds=lease)
+        self.fan_out = FanOut()
+        """Лічильники від старту: outbox_mark_failed - доставлені, але не позначені sent (будуть відправлені вдруге)"""
+        self.counters: Counter = Counter()
+
+    def backoff(self, attempts: int) -> timedelta:
+        """Delay before the next attempt: retry_delay * 2^(attempts-1)"""
+        return timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+
+    async def deliver(self, message: Outbox) -> bool:
+        """Send message to chat_id, if it fails - to fallback_chat_id. Photo (cached or by url) falls back to text.
+        Panel with edit_message_id edits the panel of admin, if it can not be edited - it is sent as a new one"""
+        reply_markup = InlineKeyboardMarkup.model_validate_json(message.reply_markup) if message.reply_markup else None
+        if message.kind == "panel" and await panel_is_pending(dedup_key=message.dedup_key) is False:
+            """Адмін вже змінив подію - панель в outbox застаріла"""
+            logger.debug(f"outbox message: {message.id} - panel is outdated")
+            return True
+        if message.edit_message_id:
+            try:
+                edit = partial(
+                    bot.edit_message_text,
+                    chat_id=message.chat_id,
+                    message_id=message.edit_message_id,
+                    text=message.text,
+                    reply_markup=reply_markup,
+                )
+                await send_limited(fan_out=self.fan_out, chat_id=message.chat_id, method=edit)
+            except Exception as e:
+                if "message is not modified" not in str(e):
+                    logger.warning(f"outbox message: {message.id} is not edited, send new one: {e}")
+                    return await self.send(message=message, reply_markup=reply_markup)
+            await self.delivered(message=message, message_id=message.edit_message_id)
+            return True
+        return await self.send(message=message, reply_markup=reply_markup)
+
+    async def send(self, message: Outbox, reply_markup: Optional[InlineKeyboardMarkup]) -> bool:
+        """Send message as a new one"""
+        error = None
+        for chat_id in filter(None, [message.chat_id, message.fallback_chat_id]):
+            if message.image_key:
+                sent = await send_cached_image(
+                    chat_id=chat_id,
+                    key=message.image_key,
+                    caption=message.text,
+                    disable_notification=False,
+                    reply_markup=reply_markup,
+                    fan_out=self.fan_out,
+                )
+                if sent:
+                    return True
+            elif message.image_url:
+                sent = await send_compressed_image(
+                    chat_id=chat_id,
+                    url=message.image_url,
+                    caption=message.text,
+                    filename=f"outbox_{message.id}.jpg",
+                    disable_notification=False,
+                    reply_markup=reply_markup,
+                    fan_out=self.fan_out,
+                )
+                if sent:
+                    return True
+            try:
+                send = partial(bot.send_message, chat_id=chat_id, text=message.text, reply_markup=reply_markup)
+                sent = await send_limited(fan_out=self.fan_out, chat_id=chat_id, method=send)
+                if chat_id == message.chat_id:
+                    await self.delivered(message=message, message_id=getattr(sent, "message_id", None))
+                return True
+            except Exception as e:
+                logger.error(f"outbox message: {message.id} to chat: {chat_id}: {e}")
+                error = e
+        raise RuntimeError(f"not delivered: {error}")
+
+    @staticmethod
+    async def delivered(message: Outbox, message_id: Optional[int]):
+        """Panel is shown to admin: remember its message_id for the next edit"""
+        if message.kind == "panel" and message_id:
+            await set_panel_message(dedup_key=message.dedup_key, message_id=message_id)
+
+    async def run_once(self) -> Dict[str, float]:
+        """Claim one batch of due messages and deliver it"""
+        messages: List[Outbox] = await claim_messages(limit=self.batch_size, lease=self.lease) or []
+        if not messages:
+            return {"sent": 0, "failed": 0, "max_duration": 0.0}
+        jobs = [(message.id, partial(self.deliver, message=message)) for message in messages]
+        results = await self.fan_out.run(jobs=jobs)
+        await self.mark_sent(message_ids=[res.recipient for res in results if res.ok])
+        attempts = {message.id: message.attempts for message in messages}
+        for res in results:
+            if not res.ok:
+                """Після max_attempts спроб повідомлення йде в dead letters"""
+                next_attempt_at = None
+                if attempts[res.recipient] < self.max_attempts:
+                    next_attempt_at = clock.now() + self.backoff(attempts=attempts[res.recipient])
+                await mark_failed(message_id=res.recipient, error=res.error or "", next_attempt_at=next_attempt_at)
+        stats = summary(results=results)
+        logger.info(f"outbox batch: {stats}")
+        return stats
+
+    async def mark_sent(self, message_ids: List[int]) -> bool:
+        """Mark delivered messages, one more attempt if DataBase fails. Messages that are still not marked
+        are claimed again after lease and sent twice (at-least-once) - it is logged and counted"""
+        for attempt in range(2):
+            if not db_failed(await mark_sent(message_ids=message_ids)):
+                return True
+            if not attempt:
+                await sleep(self.poll_interval)
+        logger.error(f"outbox messages: {message_ids} are delivered but not marked sent - they will be sent again")
+        self.counters["outbox_mark_failed"] += len(message_ids)
+        count(name="outbox_mark_failed", n=len(message_ids))
+        return False
+
+    async def consume(self, number: int):
+        """One consumer: deliver batches while they are full, then wait poll_interval"""
+        logger.info(f"outbox consumer {number} started")
+        while True:
+            try:
+                stats = await self.run_once()
+                if stats["sent"] + stats["failed"] >= self.batch_size:
+                    continue
+            except Exception as e:
+                logger.exception("⛔ Error in outbox consumer %s: %s", number, str(e))
+            await sleep(self.poll_interval)
+
+    async def run(self):
+        """Run all consumers"""
+        await gather(*(self.consume(number=number) for number in range(1, self.consumers + 1)))
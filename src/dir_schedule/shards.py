@@ -0,0 +1,100 @@
+from asyncio import gather, get_running_loop
+from asyncio import run as asyncio_run
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+from config import SCHEDULER_SHARDS
+from src.bot_app.create_bot import bot
+from src.dir_schedule.some_task import JOB_CHECK_BIRTHDAY, BackgroundTask
+from src.service.loggers.py_logger_tel_bot import get_logger
+from src.service.run_metrics import current_run, track_run
+from src.sql.connect import engine
+from src.sql.tool_db import db_failed
+
+logger = get_logger(__name__)
+
+SUM_KEYS = ("tasks", "ok", "failed", "sent", "running", "total_duration")
+MAX_KEYS = ("max_duration", "wall_time")
+
+
+async def check_shard(index: int, count: int, days_to_birthday: int, run_date: date) -> Dict[str, Any]:
+    """Check birthdays of chats with Chat.id % count == index, return report of the shard"""
+    background_task = BackgroundTask(shard=(index, count))
+    try:
+        with track_run(job=JOB_CHECK_BIRTHDAY, run_date=run_date) as metrics:
+            results = await background_task.check_users_birthday(days_to_birthday=days_to_birthday, run_date=run_date)
+    finally:
+        """Процес шарда завершується разом з циклом подій - закриваємо його сесію бота і пул з'єднань"""
+        await bot.session.close()
+        await engine.dispose()
+    return {
+        "shard": index,
+        **background_task.last_report,
+        "scan_failed": db_failed(results),
+        "metrics": metrics.report(),
+    }
+
+
+def run_shard(index: int, count: int, days_to_birthday: int, run_date: date) -> Dict[str, Any]:
+    """Entry point of shard process: own event loop, DB engine and bot session"""
+    return asyncio_run(check_shard(index=index, count=count, days_to_birthday=days_to_birthday, run_date=run_date))
+
+
+def merge_reports(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One report of all shards: totals are summed, durations - the slowest shard"""
+    merged: Dict[str, Any] = {key: 0 for key in SUM_KEYS + MAX_KEYS}
+    by_kind = Counter()
+    for report in reports:
+        for key in SUM_KEYS:
+            merged[key] += report.get(key, 0)
+        for key in MAX_KEYS:
+            merged[key] = max(merged[key], report.get(key, 0))
+        by_kind.update(report.get("by_kind", {}))
+    merged["by_kind"] = dict(by_kind)
+    merged["shards"] = len(reports)
+    return merged
+
+
+async def check_users_birthday_sharded(
+    days_to_birthday: int,
+    run_date: date,
+    shards: int = SCHEDULER_SHARDS,
+    background_task: Optional[BackgroundTask] = None,
+) -> Dict[str, Any]:
+    """Daily check split by Chat.id hash between int: shards processes, coordinator merges their reports.
+    shards <= 1 - the check runs in this process. report["scan_failed"] - some chats were not checked
+    (DataBase failed or shard crashed), the window must be caught up"""
+    if shards <= 1:
+        background_task = background_task or BackgroundTask()
+        results = await background_task.check_users_birthday(days_to_birthday=days_to_birthday, run_date=run_date)
+        return {**background_task.last_report, "shards": 1, "scan_failed": db_failed(results)}
+    loop = get_running_loop()
+    """spawn, не fork: дочірній процес не має успадковувати з'єднання пулу і сесію бота батька"""
+    with ProcessPoolExecutor(max_workers=shards, mp_context=get_context("spawn")) as pool:
+        results = await gather(
+            *(
+                loop.run_in_executor(pool, run_shard, index, shards, days_to_birthday, run_date)
+                for index in range(shards)
+            ),
+            return_exceptions=True,
+        )
+    reports = [res for res in results if isinstance(res, dict)]
+    failed_shards = [index for index, res in enumerate(results) if not isinstance(res, dict)]
+    for index in failed_shards:
+        logger.error(f"shard {index}/{shards} failed: {results[index]}")
+    merged = {
+        **merge_reports(reports=reports),
+        "failed_shards": failed_shards,
+        "scan_failed": bool(failed_shards) or any(report.get("scan_failed") for report in reports),
+    }
+    """Метрики шардів додаються до метрик запуску в процесі координатора"""
+    metrics = current_run.get()
+    if metrics is not None:
+        for report in reports:
+            metrics.merge(report=report.get("metrics", {}))
+        metrics.count(name="shards_failed", n=len(failed_shards))
+    logger.info(f"check_users_birthday() in {shards} shards finished: {merged}")
+    return merged
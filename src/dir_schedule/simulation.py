@@ -0,0 +1,384 @@
+from asyncio import sleep
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime, time, timedelta
+from functools import wraps
+from json import dumps
+from random import Random
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from unittest.mock import patch
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+import src.bot_app.dir_menu.send_panel as send_panel_module
+import src.dir_schedule.some_task as some_task_module
+import src.dir_schedule.some_tools as some_tools_module
+import src.sql.func_db as func_db_module
+import src.sql.func_panel_db as func_panel_db_module
+from config import SCHEDULER_CHATS_CONCURRENCY
+from src.dir_schedule.some_task import BackgroundTask
+from src.dir_schedule.some_tools import AskingMoney, GreetingsUser
+from src.dir_schedule.writes import use_writes
+from src.service.birthday_calendar import BirthdayCalendar
+from src.service.clock import clock
+from src.service.loggers.py_logger_tel_bot import get_logger
+from src.sql.func_db import BulkResult
+from src.sql.models import Chat, Holiday, Report, User, UserChat
+
+logger = get_logger(__name__)
+
+"""Реальні функції бази - у режимі dry-run по базі читаємо з неї, а все що пише - підміняємо"""
+db_get_doc_by_id = func_db_module.get_doc_by_id
+db_get_report = func_db_module.get_report
+db_get_admin_panel = func_panel_db_module.get_admin_panel
+
+
+class SyntheticData:
+    """Synthetic population in memory: users with random birthdays in chats of members_per_chat members"""
+
+    def __init__(self, users: int = 100_000, members_per_chat: int = 50, seed: int = 1):
+        rnd = Random(seed)
+        leap_years = range(1960, 2008, 4)  # 29.02 теж може бути днем народження
+        self.users: Dict[int, User] = dict()
+        self.chats: Dict[int, Chat] = dict()
+        self.members: Dict[int, List[UserChat]] = defaultdict(list)  # Chat.id -> UserChat
+        self.memberships: Dict[int, List[UserChat]] = defaultdict(list)  # User.id -> UserChat
+        for n in range(1, users + 1):
+            birthday = date(rnd.choice(leap_years), 1, 1) + timedelta(days=rnd.randrange(366))
+            user = User(id=n, telegram_id=10**9 + n, first_name=f"User {n}", birthday=birthday, info="user")
+            chat_pk = (n - 1) // members_per_chat + 1
+            if chat_pk not in self.chats:
+                user.info = "admin"
+                self.chats[chat_pk] = Chat(
+                    id=chat_pk, chat_id=-(10**12 + chat_pk), user_id=n, card_number="4111111111111111", status=True
+                )
+            user_chat = UserChat(id=n, chat_id=chat_pk, user_telegram_id=user.telegram_id, status=True)
+            """Зв'язки без backref-подій - інакше 100k об'єктів створюються в рази довше"""
+            set_committed_value(user_chat, "user", user)
+            set_committed_value(user_chat, "chat", self.chats[chat_pk])
+            self.users[n] = user
+            self.members[chat_pk].append(user_chat)
+            self.memberships[n].append(user_chat)
+
+    def calendar(self) -> BirthdayCalendar:
+        calendar = BirthdayCalendar()
+        calendar.load(users_birthdays=((user.id, user.birthday) for user in self.users.values()))
+        return calendar
+
+
+class StubTextAI:
+    """ResponseTextAI without OpenAI"""
+
+    latency: float = 0.0
+
+    def __init__(self, role: str = None, prompt_for_ai: Optional[str] = None, messages_for_ai: Any = None):
+        self.prompt_for_ai = prompt_for_ai
+
+    async def get_content(self, *args, **kwargs) -> Dict[str, Any]:
+        await sleep(self.latency)
+        if '"variants"' in self.prompt_for_ai:
+            return {"content": dumps({"variants": [f"[dry-run {n}] {{name}}" for n in range(3)]})}
+        return {"content": f"[dry-run] {self.prompt_for_ai[:80]}"}
+
+
+class StubImageAI:
+    """ResponseImageAI without OpenAI"""
+
+    latency: float = 0.0
+
+    async def get_image_from_ai(self, prompt_for_ai: str) -> Dict[str, Any]:
+        await sleep(self.latency)
+        return {"image_url": None}
+
+
+class StubBot:
+    """Bot without Telegram: only what the scan reads"""
+
+    async def get_chat(self, chat_id: int) -> SimpleNamespace:
+        return SimpleNamespace(title=f"chat {chat_id}")
+
+
+class Timings:
+    """Calls and durations of stages of the scan"""
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name].append(perf_counter() - start)
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with self.stage(name=stage):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """{stage: {calls, total, max}} and reset, stages overlap - they run concurrently and nested"""
+        report = {
+            stage: {"calls": len(durations), "total": round(sum(durations), 4), "max": round(max(durations), 4)}
+            for stage, durations in self.stages.items()
+        }
+        self.stages = defaultdict(list)
+        return report
+
+
+class DryRun:
+    """Run BackgroundTask.check_users_birthday over a range of dates with the frozen clock.
+    Bot and AI are stubs, nothing is written to DataBase or outbox - the result is a plan with counts and timings.
+    DryRun itself replaces ScheduleWrites (use_writes), so every write of the scan lands in memory.
+    data=None - read users, chats and holidays from DataBase, otherwise - use SyntheticData"""
+
+    def __init__(
+        self,
+        data: Optional[SyntheticData] = None,
+        days_to_birthday: int = 10,
+        job_time: str = "08:00",
+        ai_latency: float = 0.0,
+        details: bool = False,
+        chats_concurrency: Optional[int] = None,
+    ):
+        self.data = data
+        self.chats_concurrency = chats_concurrency
+        self.days_to_birthday = days_to_birthday
+        self.job_time = time.fromisoformat(job_time)
+        self.ai_latency = ai_latency
+        self.details = details
+        self.calendar: Optional[BirthdayCalendar] = None
+        self.holidays: Dict[int, Holiday] = dict()
+        self.chat_holidays: Dict[Tuple[int, int], Holiday] = dict()  # (Chat.id, User.id) -> Holiday
+        self.reports: Dict[Tuple[int, int, int], Report] = dict()
+        self.ledger: Set[Tuple] = set()
+        self.images: Set[str] = set()
+        self.prepared: Dict[str, SimpleNamespace] = dict()
+        self.panels: Dict[int, SimpleNamespace] = dict()  # Holiday.id -> the last panel of admin
+        self.messages: List[Dict[str, Any]] = list()
+        self.created: Counter = Counter()
+        self.last_id = 0
+        self.timings = Timings()
+
+    """ScheduleWrites in memory"""
+
+    async def claim_runs(self, run_date, job, kind, chat_id=0, recipient_ids=(0,), **kwargs) -> Set[int]:
+        claimed = {rid for rid in recipient_ids if (run_date, job, kind, chat_id, rid) not in self.ledger}
+        self.ledger.update((run_date, job, kind, chat_id, rid) for rid in claimed)
+        return claimed
+
+    async def finish_runs(self, run_date, job, kind, chat_id=0, recipient_ids=(0,), done=True) -> int:
+        if not done:
+            self.ledger.difference_update((run_date, job, kind, chat_id, rid) for rid in recipient_ids)
+        return len(list(recipient_ids))
+
+    async def get_or_create_image(self, key: str, prompt: str) -> Optional[str]:
+        """Image cache without AI, disk and DataBase: every key is generated once"""
+        with self.timings.stage(name="image"):
+            if key not in self.images:
+                await StubImageAI().get_image_from_ai(prompt_for_ai=prompt)
+                self.images.add(key)
+        return key
+
+    async def update_chat_title(self, chat_id: int, title: str) -> int:
+        return 1
+
+    async def save_prepared_content(self, key: str, text: str, image_key: Optional[str], expires_at: datetime) -> bool:
+        self.prepared[key] = SimpleNamespace(key=key, text=text, image_key=image_key, expires_at=expires_at)
+        return True
+
+    async def delete_expired_content(self) -> int:
+        expired = [key for key, content in self.prepared.items() if content.expires_at <= clock.now()]
+        for key in expired:
+            del self.prepared[key]
+        return len(expired)
+
+    async def save_admin_panel(self, holiday_id: int, chat_id: int, **values) -> bool:
+        """Panel from outbox is taken as delivered at once - the next day the same panel is not sent"""
+        content_hash = values.get("pending_hash") or values.get("content_hash")
+        self.panels[holiday_id] = SimpleNamespace(
+            chat_id=chat_id, message_id=None, content_hash=content_hash, dedup_key=None
+        )
+        return True
+
+    async def enqueue_messages(self, messages: List[Dict[str, Any]]) -> int:
+        with self.timings.stage(name="enqueue"):
+            self.messages += messages
+        return len(messages)
+
+    async def cancel_messages(self, dedup_keys: List[str]) -> int:
+        count = len(self.messages)
+        self.messages = [message for message in self.messages if message["dedup_key"] not in dedup_keys]
+        return count - len(self.messages)
+
+    async def provision_reports(self, holiday: Holiday, user_ids: List[int]) -> Set[int]:
+        """Missing Report of members are created in memory, existing ones are read (from DataBase for real holiday)"""
+        owing = set()
+        for user_id in user_ids:
+            report = await self.get_report(user_pk=user_id, chat_pk=holiday.chat_id, holiday_pk=holiday.id)
+            if report is None:
+                data = {"user_id": user_id, "chat_id": holiday.chat_id, "holiday_id": holiday.id}
+                await self.create_new_doc(model="report", data=data)
+            if report is None or not report.status:
+                owing.add(user_id)
+        return owing
+
+    async def create_new_doc(self, model: str, data: Dict[str, Any]) -> Optional[int]:
+        """Holiday and Report live only in memory, ids are negative - they never clash with DataBase"""
+        self.created[model] += 1
+        self.last_id -= 1
+        doc_id = self.last_id
+        if model == "holiday":
+            holiday = Holiday(id=doc_id, **data)
+            self.holidays[doc_id] = holiday
+            self.chat_holidays[(data["chat_id"], data["user_id"])] = holiday
+        elif model == "report":
+            key = (data["user_id"], data["chat_id"], data["holiday_id"])
+            self.reports[key] = Report(id=doc_id, status=False, **data)
+        return doc_id
+
+    async def upsert_many(
+        self, model: str, rows: List[Dict[str, Any]], returning: Optional[List[str]] = None, **kwargs
+    ) -> BulkResult:
+        """Holiday of user in chat that is already in memory is returned as it is (ON CONFLICT of DataBase)"""
+        bulk = BulkResult()
+        for row in rows:
+            existing = self.chat_holidays.get((row["chat_id"], row["user_id"])) if model == "holiday" else None
+            if existing and existing.date_event == row["date_event"]:
+                values = {column.key: getattr(existing, column.key) for column in Holiday.__table__.columns}
+                bulk.updated += 1
+            else:
+                values = {"id": await self.create_new_doc(model=model, data=row), **row}
+                bulk.inserted += 1
+            if returning:
+                bulk.rows.append({column: values.get(column) for column in returning})
+        return bulk
+
+    """Reads of what was written in memory, then DataBase (or SyntheticData)"""
+
+    async def get_prepared_content(self, key: str) -> Optional[SimpleNamespace]:
+        content = self.prepared.get(key)
+        return content if content and content.expires_at > clock.now() else None
+
+    async def get_admin_panel(self, holiday_id: int) -> Optional[SimpleNamespace]:
+        panel = self.panels.get(holiday_id)
+        if panel is None and self.data is None and holiday_id > 0:
+            return await db_get_admin_panel(holiday_id=holiday_id)
+        return panel
+
+    async def get_doc_by_id(self, model: str, doc_id: int) -> Any:
+        if model == "holiday" and doc_id in self.holidays:
+            return self.holidays[doc_id]
+        if self.data is None:
+            return await db_get_doc_by_id(model=model, doc_id=doc_id)
+        return {"chat": self.data.chats, "user": self.data.users}.get(model, {}).get(doc_id)
+
+    async def get_report(self, user_pk: int, chat_pk: int, holiday_pk: int) -> Optional[Report]:
+        report = self.reports.get((user_pk, chat_pk, holiday_pk))
+        if report is None and self.data is None and holiday_pk > 0:
+            return await db_get_report(user_pk=user_pk, chat_pk=chat_pk, holiday_pk=holiday_pk)
+        return report
+
+    """SyntheticData instead of DataBase reads"""
+
+    async def get_birthday_calendar(self, max_age: Optional[timedelta] = None) -> BirthdayCalendar:
+        if self.calendar is None:
+            self.calendar = self.data.calendar()
+        return self.calendar
+
+    async def get_upcoming_birthdays(
+        self, user_ids: List[int], shard: Optional[Tuple[int, int]] = None
+    ) -> List[Tuple[UserChat, Chat, Optional[Holiday]]]:
+        rows = [
+            (user_chat, user_chat.chat, self.chat_holidays.get((user_chat.chat_id, user_id)))
+            for user_id in user_ids
+            for user_chat in self.data.memberships[user_id]
+            if user_chat.status and user_chat.chat.status and (not shard or user_chat.chat.id % shard[1] == shard[0])
+        ]
+        return sorted(rows, key=lambda row: (row[1].id, row[0].id))
+
+    async def get_all_users_from_chat(self, chat_id: int) -> List[UserChat]:
+        return self.data.members[chat_id]
+
+    @contextmanager
+    def stubs(self) -> Iterator[None]:
+        """Freeze clock, replace DataBase writes by this object at once, bot, AI and reads of what was written
+        (and of SyntheticData) for the time of simulation"""
+        StubTextAI.latency = StubImageAI.latency = self.ai_latency
+        replace = [
+            (some_tools_module, "bot", StubBot()),
+            (some_tools_module, "ResponseTextAI", StubTextAI),
+            (some_tools_module, "ResponseImageAI", StubImageAI),
+            (some_tools_module, "get_prepared_content", self.get_prepared_content),
+            (some_tools_module, "get_doc_by_id", self.get_doc_by_id),
+            (send_panel_module, "get_doc_by_id", self.get_doc_by_id),
+            (send_panel_module, "get_admin_panel", self.get_admin_panel),
+            (
+                some_task_module,
+                "panel_outbox_message",
+                self.timings.wrap("panel", send_panel_module.panel_outbox_message),
+            ),
+            (GreetingsUser, "start_greet", self.timings.wrap("greeting", GreetingsUser.start_greet)),
+            (AskingMoney, "start_asking", self.timings.wrap("asking", AskingMoney.start_asking)),
+            (BackgroundTask, "check_chat_birthdays", self.timings.wrap("chat", BackgroundTask.check_chat_birthdays)),
+        ]
+        if self.data is None:
+            calendar, upcoming = some_task_module.get_birthday_calendar, some_task_module.get_upcoming_birthdays
+        else:
+            calendar, upcoming = self.get_birthday_calendar, self.get_upcoming_birthdays
+            replace.append((some_task_module, "get_all_users_from_chat", self.get_all_users_from_chat))
+        replace.append((some_task_module, "get_birthday_calendar", self.timings.wrap("calendar", calendar)))
+        replace.append((some_task_module, "get_upcoming_birthdays", self.timings.wrap("query", upcoming)))
+        with ExitStack() as stack:
+            """Годинник зупиняємо - кожен день симуляції ставить його на час запуску задачі"""
+            stack.enter_context(clock.frozen())
+            stack.enter_context(use_writes(self))
+            for target, name, value in replace:
+                stack.enter_context(patch.object(target, name, value))
+            yield
+
+    async def run_day(self, run_date: date) -> Dict[str, Any]:
+        """Plan of one day: what would be sent, what would be created and how long every stage takes"""
+        clock.freeze(at=datetime.combine(run_date, self.job_time))
+        self.messages, self.created = list(), Counter()
+        start = perf_counter()
+        background_task = BackgroundTask(chats_concurrency=self.chats_concurrency or SCHEDULER_CHATS_CONCURRENCY)
+        results = await background_task.check_users_birthday(days_to_birthday=self.days_to_birthday, run_date=run_date)
+        duration = perf_counter() - start
+        kinds = Counter(message["kind"] for message in self.messages)
+        day = {
+            "date": str(run_date),
+            "greetings": kinds["greeting"],
+            "asks": kinds["asking_money"],
+            "panels": kinds["panel"],
+            "failed": sum(1 for res in results if not res.ok),
+            "holidays_created": self.created["holiday"],
+            "reports_created": self.created["report"],
+            "duration": round(duration, 4),
+            "stages": self.timings.report(),
+        }
+        if self.details:
+            day["messages"] = [
+                {key: message[key] for key in ("kind", "chat_id", "next_attempt_at")} for message in self.messages
+            ]
+        return day
+
+    async def run(self, start: date, days: int = 1) -> Dict[str, Any]:
+        """Simulate days from start, return plan {days: [...], totals: {...}}"""
+        plan = {"days": list(), "totals": Counter()}
+        with self.stubs():
+            for n in range(days):
+                day = await self.run_day(run_date=start + timedelta(days=n))
+                logger.info(
+                    f"dry-run {day['date']}: {day['greetings']} greetings, {day['asks']} asks, {day['panels']} panels"
+                )
+                plan["days"].append(day)
+                plan["totals"].update({key: day[key] for key in ("greetings", "asks", "panels", "failed", "duration")})
+        plan["totals"] = dict(plan["totals"])
+        return plan
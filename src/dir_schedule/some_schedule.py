@@ -1,36 +1,96 @@
-from asyncio import sleep
+from datetime import datetime, timedelta
+from functools import partial
 
-from src.dir_schedule.some_task import BackgroundTask
+from config import CHAT_TITLE_MAX_AGE, PREPARE_GREETINGS_AT
+from src.dir_schedule.job_registry import Job, JobRegistry
+from src.dir_schedule.shards import check_users_birthday_sharded
+from src.dir_schedule.some_task import (
+    JOB_CHECK_BIRTHDAY,
+    JOB_PREPARE_GREETINGS,
+    JOB_REFRESH_CHAT_TITLES,
+    BackgroundTask,
+)
 from src.service.loggers.py_logger_tel_bot import get_logger
-from src.service.service_tools import correct_time
-from src.sql.func_system_db import get_system_data
+from src.sql.func_db import get_birthday_calendar
+from src.sql.func_system_db import claim_runs, finish_runs
 
 logger = get_logger(__name__)
 
 
-async def wait_next_min():
-    """Sleep until the next minute."""
-    delay_ = 60 - correct_time().second
-    await sleep(delay_)
+async def check_birthday(job: Job, fire: datetime, background_task: BackgroundTask) -> bool:
+    """Check users birthdays for the day of fire, job.digital - days to birthday.
+    False - window is already done or the scan failed (the window stays open for catch-up).
+    The day row is only a marker: an unfinished run (crash, restart, new leader) is taken over at once (lease=0),
+    claims of every recipient keep it from repeating what was already sent"""
+    run = dict(run_date=fire.date(), job=JOB_CHECK_BIRTHDAY, kind="run")
+    if not await claim_runs(**run, lease=0):
+        return False
+    report = await check_users_birthday_sharded(
+        days_to_birthday=job.digital or 10, run_date=fire.date(), background_task=background_task
+    )
+    if report.get("scan_failed"):
+        logger.error(f"check_birthday({fire.date()}) scan failed - window stays open for catch-up")
+        await finish_runs(**run, done=False)
+        return False
+    await finish_runs(**run)
+    return True
+
+
+async def prepare_greetings(job: Job, fire: datetime, background_task: BackgroundTask) -> bool:
+    """Generate greetings of the next day after fire off-peak. False - window is already done.
+    An unfinished run is taken over at once (lease=0) and a failed one releases the window for catch-up:
+    greetings that are not prepared would be generated live at peak"""
+    run = dict(run_date=fire.date(), job=JOB_PREPARE_GREETINGS, kind="run")
+    if not await claim_runs(**run, lease=0):
+        return False
+    try:
+        await background_task.prepare_greetings(greet_date=fire.date() + timedelta(days=1))
+    except Exception:
+        await finish_runs(**run, done=False)
+        raise
+    await finish_runs(**run)
+    return True
+
+
+async def refresh_chat_titles(job: Job, fire: datetime, background_task: BackgroundTask) -> bool:
+    """Refresh titles of chats, job.digital - max age of title in hours. False - window is already done.
+    The run row tells catch-up that the window is done, otherwise every restart of scheduler repeats it"""
+    run = dict(run_date=fire.date(), job=JOB_REFRESH_CHAT_TITLES, kind="run")
+    if not await claim_runs(**run, lease=0):
+        return False
+    try:
+        await background_task.refresh_chat_titles(max_age=job.digital or CHAT_TITLE_MAX_AGE)
+    except Exception:
+        await finish_runs(**run, done=False)
+        raise
+    await finish_runs(**run)
+    return True
+
+
+def create_registry(background_task: BackgroundTask) -> JobRegistry:
+    """All scheduler jobs, time and number of every job can be changed in SystemData(title=job name)"""
+    registry = JobRegistry()
+    registry.register(
+        name=JOB_CHECK_BIRTHDAY,
+        handler=partial(check_birthday, background_task=background_task),
+        at="08:00",
+        digital=10,
+    )
+    registry.register(
+        name=JOB_PREPARE_GREETINGS,
+        handler=partial(prepare_greetings, background_task=background_task),
+        at=PREPARE_GREETINGS_AT,
+    )
+    registry.register(
+        name=JOB_REFRESH_CHAT_TITLES,
+        handler=partial(refresh_chat_titles, background_task=background_task),
+        at="03:00",
+    )
+    return registry
 
 
 async def check_schedule():
-    """Check schedule every int: seconds"""
-    background_task = BackgroundTask()
-    while True:
-        """Дані для запуску перевірки дат народження користувачів, які долучені до подій"""
-        doc = await get_system_data(title="check_birthday")
-        days_to_birthday = doc.data_digital if doc and doc.data_digital else 10
-        time_to_check_birthday = doc.data_text if doc and doc.data_text else "08:00"
-        """ Дані длі запуску перевірки reports """
-        # doc_report = await get_system_data(title='check_report')
-        # time_to_check_report = doc_report.data_text if doc_report and doc_report.data_text else "15:00"
-        time_now = correct_time()
-        try:
-            logger.debug(f"⏱ Time now: {time_now}, waiting for {time_to_check_birthday}")
-            if str(time_now)[11:16] == time_to_check_birthday:
-                await background_task.check_users_birthday(days_to_birthday=days_to_birthday)
-                await sleep(delay=60)
-        except Exception as e:
-            logger.exception("⛔ Error during check_users_birthday: %s", str(e))
-        await wait_next_min()
+    """Run registered jobs, sleep until the next due job"""
+    await get_birthday_calendar()
+    registry = create_registry(background_task=BackgroundTask())
+    await registry.run()
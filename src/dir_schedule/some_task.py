@@ -1,99 +1,294 @@
-from asyncio import create_task
-from datetime import date, timedelta
-from typing import Optional
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from config import amount
-from src.bot_app.dir_menu.send_panel import panel_set_holidays
-from src.dir_schedule.some_tools import AskingMoney, GreetingsUser
+from config import (
+    CHAT_SEND_FROM,
+    CHAT_SEND_TO,
+    CHAT_TIMEZONE,
+    CHAT_TITLE_MAX_AGE,
+    SCHEDULER_CHATS_CONCURRENCY,
+    amount,
+)
+from src.bot_app.dir_menu.send_panel import panel_outbox_message
+from src.bot_app.dir_service.fan_out import FanOut, SendResult, summary
+from src.dir_schedule.some_tools import AskingMoney, DataAI, GreetingsUser
+from src.dir_schedule.writes import schedule_writes
+from src.service.clock import clock
 from src.service.loggers.py_logger_tel_bot import get_logger
-from src.service.service_tools import correct_time
-from src.sql.func_db import create_new_doc, get_all_users_from_chat, get_chats, get_doc_by_id, get_holiday
-from src.sql.models import Chat, Holiday
+from src.service.run_metrics import count, timer
+from src.service.service_tools import get_send_time
+from src.service.task_group import TaskGroup
+from src.sql.complex_func_db import get_upcoming_birthdays
+from src.sql.func_db import get_all_users_from_chat, get_birthday_calendar, get_chats_with_stale_title
+from src.sql.models import Chat, Holiday, UserChat
+from src.sql.tool_db import DBError, db_failed
 
 logger = get_logger(__name__)
 
+JOB_CHECK_BIRTHDAY = "check_birthday"
+JOB_PREPARE_GREETINGS = "prepare_greetings"
+JOB_REFRESH_CHAT_TITLES = "refresh_chat_titles"
+
+"""Унікальний ключ holidays (uq_holidays_user_chat_date)"""
+HOLIDAY_KEY = ["user_id", "chat_id", "date_event"]
+
 
 class BackgroundTask:
     """Class for start background task"""
 
-    def __init__(self):
-        pass
-
-    async def check_users_birthday(self, days_to_birthday: int = 10):
-        """Check users birthdays in DataBase, send sms for chat members - start one time per day"""
-        logger.info(f">>> check_users_birthday()")
-        date_today_str = str(correct_time())[:10]
-        date_today: date = date.fromisoformat(date_today_str)
-        to_birthday_list = [{n: str(date_today + timedelta(days=n))[5:]} for n in range(days_to_birthday + 1)]
-        chats = await get_chats(status=True)
-        for chat in chats:
-            """Get all users from chat"""
-            users_chats = await get_all_users_from_chat(chat_id=chat.id)
-            for user_chat in users_chats:
-                if user_chat.status:
-                    """If user take part of chat party - якщо він приймає участь у зборі внесків"""
-                    user = user_chat.user
-                    if user.birthday:
-                        for data_birthday in to_birthday_list:
-                            for key, value in data_birthday.items():
-                                days_to_birthday: int = key  # 0 | 1 | 2 ...
-                                birthday_str: str = value  # '10-19'
-                                if str(user.birthday)[5:] == birthday_str:
-                                    if days_to_birthday == 0:
-                                        """User has birthday today - AI sends greetings to the user personally
-                                        and in the group"""
-                                        logger.info(f"user: {user.first_name}|{user.telegram_id} has birthday today.")
-                                        greet_user = GreetingsUser()
-                                        try:
-                                            task = create_task(greet_user.start_greet(user_chat=user_chat))
-                                            logger.info(f"GreetingsUser().start_greet(): {task}")
-                                        except Exception as e:
-                                            logger.error(e)
-                                    else:
-                                        chat: Chat = await get_doc_by_id(model="chat", doc_id=user_chat.chat_id)
-                                        holiday: Optional[Holiday] = await get_holiday(user_pk=user.id, chat_pk=chat.id)
-                                        if not holiday:
-                                            """По дефолту новий holiday.status=True, тобто подія активна,
-                                            щоб інші користувачі НЕ отримували СМС з проханням зробити внесок
-                                            - Адмін має ЗАКРИТИ подію"""
-                                            info = f"<b>{user.first_name}</b>\n<code>{user.phone_number}</code>"
-                                            holiday_data = {
-                                                "user_id": user.id,
-                                                "chat_id": chat.id,
-                                                "status": True,
-                                                "date_event": user.birthday,
-                                                "amount": amount,
-                                                "info": info,
-                                            }
-                                            await create_new_doc(model="holiday", data=holiday_data)
-
-                                        holiday: Holiday = await get_holiday(user_pk=user.id, chat_pk=chat.id)
-                                        """Send panel for Admin to set Holiday in DataBase"""
-                                        await panel_set_holidays(chat=chat, holiday=holiday)
-
-                                        if days_to_birthday < 8:
-                                            """days_to_birthday < 8"""
-                                            if holiday.status:
-                                                """Подія активна"""
-                                                """User has birthday in int: 'days_to_birthday' - we send another users
-                                                the admin card with request for transferring money"""
-                                                logger.info(
-                                                    f"user: {user.first_name}|{user.telegram_id} has birthday in "
-                                                    f"{days_to_birthday} days."
-                                                )
-                                                money_asker = AskingMoney()
-                                                try:
-                                                    task = create_task(
-                                                        money_asker.start_asking(
-                                                            birthday_user=user,
-                                                            users_chats=users_chats,
-                                                            days_to_birthday=days_to_birthday,
-                                                            holiday=holiday,
-                                                        )
-                                                    )
-                                                    logger.info(f"AskingMoney().send_asking(): {task}")
-                                                except Exception as e:
-                                                    logger.error(e)
+    def __init__(self, chats_concurrency: int = SCHEDULER_CHATS_CONCURRENCY, shard: Optional[Tuple[int, int]] = None):
+        """shard=(index, count) - this task processes only chats with Chat.id % count == index"""
+        self.chats_concurrency = chats_concurrency
+        self.shard = shard
+        self.fan_out: Optional[FanOut] = None
+        self.run_date: Optional[date] = None
+        """Чати обробляються в групі задач: не більше chats_concurrency одночасно, помилки не губляться"""
+        self.tasks = TaskGroup(name=JOB_CHECK_BIRTHDAY, limit=chats_concurrency)
+        self.last_report: Dict[str, Any] = dict()
+
+    async def check_users_birthday(
+        self, days_to_birthday: int = 10, run_date: Optional[date] = None
+    ) -> Union[List[SendResult], DBError]:
+        """Check users birthdays in DataBase, prepare sms for chat members and put them in outbox - one time per day.
+        Every greeting, panel and asking is claimed in RunLedger first, so a restart or a second replica
+        does not repeat work of this day. run_date - day of the window (today by default, earlier for catch-up).
+        DBError - the scan gave up on DataBase failure, the window must stay open for catch-up"""
+        logger.info(f">>> check_users_birthday(run_date={run_date})")
+        self.run_date = run_date or clock.now().date()
+        self.last_report = dict()
+        """Календар перечитуємо з бази раз на добу - дні народження змінюються в процесі web-додатку"""
+        with timer(stage="calendar"):
+            calendar = await get_birthday_calendar(max_age=timedelta(hours=23))
+            upcoming = calendar.upcoming(date_today=self.run_date, days=days_to_birthday)
+        if not calendar.loaded:
+            logger.error("birthday calendar is not loaded - skip check_users_birthday")
+            return DBError(func="get_birthday_calendar", error="calendar is not loaded")
+        with timer(stage="query"):
+            rows = await get_upcoming_birthdays(user_ids=list(upcoming), shard=self.shard)
+        if db_failed(rows):
+            logger.error("get_upcoming_birthdays() failed - skip check_users_birthday")
+            return rows
+        """Групуємо знайдених іменинників по чатах і обробляємо чати пачками з обмеженням паралельності"""
+        chats_rows: Dict[int, List[Tuple[UserChat, Chat, Optional[Holiday]]]] = defaultdict(list)
+        for row in rows:
+            chats_rows[row[1].id].append(row)
+        logger.info(f"check_users_birthday(): {len(rows)} birthdays in {len(chats_rows)} chats")
+        count(name="upcoming_users", n=len(upcoming))
+        count(name="candidates", n=len(rows))
+        count(name="chats", n=len(chats_rows))
+        """Один FanOut на весь запуск - обмежує паралельні запити до AI для всіх чатів"""
+        self.fan_out = FanOut()
+        for chat_pk, chat_rows in chats_rows.items():
+            self.tasks.spawn(
+                self.check_chat_birthdays(chat_rows=chat_rows, upcoming=upcoming), name=f"chat-{chat_pk}", kind="chat"
+            )
+        with timer(stage="chats"):
+            chats_results = await self.tasks.join()
+        results = [res for task_result in chats_results if task_result.ok for res in task_result.result]
+        count(name="chats_failed", n=sum(1 for task_result in chats_results if not task_result.ok))
+        self.last_report = {**self.tasks.report(), **summary(results=results)}
+        logger.info(f"check_users_birthday() finished: {self.last_report}")
+        return results
+
+    async def prepare_greetings(self, greet_date: date) -> List[SendResult]:
+        """Off-peak stage: AI generates greetings of day greet_date in advance and stores them,
+        so the morning run only delivers them (greetings without prepared content are generated live)"""
+        logger.info(f">>> prepare_greetings(greet_date={greet_date})")
+        calendar = await get_birthday_calendar(max_age=timedelta(hours=23))
+        upcoming = calendar.upcoming(date_today=greet_date, days=0)
+        rows = await get_upcoming_birthdays(user_ids=list(upcoming))
+        if db_failed(rows):
+            logger.error("get_upcoming_birthdays() failed - skip prepare_greetings")
+            return []
+        count(name="candidates", n=len(rows))
+        greetings = GreetingsUser()
+        results = await FanOut().run(
+            jobs=(
+                (
+                    user_chat.user.telegram_id,
+                    partial(greetings.prepare, chat=chat, user=user_chat.user, greet_date=greet_date),
+                )
+                for user_chat, chat, _ in rows
+            ),
+            kind="prepared_greeting",
+        )
+        count(name="prepared", n=sum(1 for res in results if res.ok))
+        count(name="failed", n=sum(1 for res in results if not res.ok))
+        deleted = await schedule_writes().delete_expired_content()
+        logger.info(f"prepare_greetings() finished: {summary(results=results)}, expired deleted: {deleted}")
+        return results
+
+    async def refresh_chat_titles(self, max_age: int = CHAT_TITLE_MAX_AGE) -> List[SendResult]:
+        """Periodic refresh of Chat.title for active chats with title older than max_age hours:
+        renames are caught by updates, this catches the ones the bot missed"""
+        chats = await get_chats_with_stale_title(older_than=clock.now() - timedelta(hours=max_age))
+        if db_failed(chats):
+            logger.error("get_chats_with_stale_title() failed - skip refresh_chat_titles")
+            return []
+        data_ai = DataAI()
+        results = await FanOut().run(
+            jobs=((chat.chat_id, partial(data_ai.refresh_title, chat=chat)) for chat in chats), kind="chat_title"
+        )
+        count(name="chats", n=len(chats))
+        count(name="titles_refreshed", n=sum(1 for res in results if res.ok))
+        logger.info(f"refresh_chat_titles() finished: {summary(results=results)}")
+        return results
+
+    async def check_chat_birthdays(
+        self,
+        chat_rows: List[Tuple[UserChat, Chat, Optional[Holiday]]],
+        upcoming: Dict[int, int],
+    ) -> List[SendResult]:
+        """Process every upcoming birthday of one chat, messages of the chat go to outbox by one bulk insert
+        and are delivered at the chat's own slot inside its local send window"""
+        results: List[SendResult] = list()
+        users_chats: Optional[List[UserChat]] = None
+        created = await self.create_holidays(chat_rows=chat_rows, upcoming=upcoming)
+        for user_chat, chat, holiday in chat_rows:
+            """Claims of the row without result yet: (kind, recipient_ids), released if the row fails"""
+            pending: Optional[Tuple[str, List[int]]] = None
+            try:
+                user = user_chat.user
+                days_to_birthday: int = upcoming[user.id]  # 0 | 1 | 2 ...
+                if days_to_birthday == 0:
+                    """User has birthday today - AI prepares greetings for the group (or for the user personally)"""
+                    logger.info(f"user: {user.first_name}|{user.telegram_id} has birthday today.")
+                    if await self.claim(chat=chat, kind="greeting", recipient_id=user.telegram_id):
+                        pending = ("greeting", [user.telegram_id])
+                        greet = partial(GreetingsUser().start_greet, user_chat=user_chat, greet_date=self.run_date)
+                        results.append(
+                            await self.fan_out.run_job(recipient=user.telegram_id, job=greet, kind="greeting")
+                        )
+                    continue
+                if not holiday:
+                    holiday = created.get(user.id)
+                    if not holiday:
+                        logger.error(f"holiday for user: {user.id} in chat: {chat.id} was not created")
+                        continue
+                """Panel for Admin to set Holiday in DataBase: only if its content is changed"""
+                if await self.claim(chat=chat, kind="panel", recipient_id=user.telegram_id):
+                    pending = ("panel", [user.telegram_id])
+                    message = await panel_outbox_message(
+                        chat=chat, holiday=holiday, run_date=self.run_date, b_user=user
+                    )
+                    if message:
+                        results.append(SendResult(recipient=user.telegram_id, ok=True, result=message, kind="panel"))
+                    else:
+                        count(name="panels_unchanged")
+                        panel = SendResult(recipient=user.telegram_id, ok=True, kind="panel")
+                        await self.finish(chat=chat, results=[panel], enqueued=True)
+                    pending = None
+
+                if days_to_birthday < 8 and holiday.status:
+                    """Подія активна - we send another users the admin card with request for transferring money"""
+                    logger.info(f"user: {user.first_name}|{user.telegram_id} has birthday in {days_to_birthday} days.")
+                    if users_chats is None:
+                        users_chats = await get_all_users_from_chat(chat_id=chat.id) or []
+                    """start_asking claims members itself - on failure all of them are released"""
+                    pending = (
+                        AskingMoney.ledger_kind(holiday=holiday),
+                        [uc.user_telegram_id for uc in users_chats if uc.user_telegram_id != user.telegram_id],
+                    )
+                    results += await AskingMoney().start_asking(
+                        birthday_user=user,
+                        users_chats=users_chats,
+                        days_to_birthday=days_to_birthday,
+                        holiday=holiday,
+                        fan_out=self.fan_out,
+                        run_date=self.run_date,
+                        ledger_job=JOB_CHECK_BIRTHDAY,
+                    )
+                    pending = None
+            except Exception as e:
+                logger.error(e)
+                if pending:
+                    """Failed result goes to finish() - the claim is released and the next run repeats the work"""
+                    kind, recipient_ids = pending
+                    results += [SendResult(recipient=rid, ok=False, error=str(e), kind=kind) for rid in recipient_ids]
+        try:
+            send_at = self.send_time(chat=chat_rows[0][1])
+            messages = [{**res.result, "next_attempt_at": send_at} for res in results if res.ok]
+            with timer(stage="enqueue"):
+                enqueued = await schedule_writes().enqueue_messages(messages=messages)
+        except Exception as e:
+            """Повідомлення не потрапили в outbox - звільняємо claims, щоб наступна спроба їх повторила"""
+            logger.error(f"enqueue of chat: {chat_rows[0][1].id} failed: {e}")
+            enqueued = DBError(func="enqueue_messages", error=str(e))
+        await self.finish(chat=chat_rows[0][1], results=results, enqueued=not db_failed(enqueued))
+        for res in results:
+            count(name=f"{(res.kind or 'job').split(':')[0]}_{'ok' if res.ok else 'failed'}")
+        count(name="enqueued", n=enqueued or 0)
+        return results
+
+    async def create_holidays(
+        self, chat_rows: List[Tuple[UserChat, Chat, Optional[Holiday]]], upcoming: Dict[int, int]
+    ) -> Dict[int, Holiday]:
+        """Missing Holiday of upcoming birthdays (not today) of chat are created by one multi-row INSERT,
+        return {User.id: Holiday}. INSERT ... ON CONFLICT (HOLIDAY_KEY): a retried or repeated insert returns
+        the existing Holiday instead of a duplicate, the no-op update of user_id keeps what admin has changed"""
+        rows = list()
+        for user_chat, chat, holiday in chat_rows:
+            user = user_chat.user
+            if not holiday and upcoming[user.id] != 0:
+                """По дефолту новий holiday.status=True, тобто подія активна,
+                щоб інші користувачі НЕ отримували СМС з проханням зробити внесок
+                - Адмін має ЗАКРИТИ подію"""
+                info = f"<b>{user.first_name}</b>\n<code>{user.phone_number}</code>"
+                rows.append(
+                    {
+                        "user_id": user.id,
+                        "chat_id": chat.id,
+                        "status": True,
+                        "date_event": user.birthday,
+                        "amount": amount,
+                        "info": info,
+                    }
+                )
+        if not rows:
+            return dict()
+        with timer(stage="holidays"):
+            bulk = await schedule_writes().upsert_many(
+                model="holiday", rows=rows, conflict=HOLIDAY_KEY, update_columns=["user_id"], returning=["id", *rows[0]]
+            )
+        if db_failed(bulk):
+            logger.error(f"holidays for chat: {chat_rows[0][1].id} were not created")
+            return dict()
+        count(name="holidays_created", n=bulk.inserted)
+        return {row["user_id"]: Holiday(**row) for row in bulk.rows}
+
+    def send_time(self, chat: Chat) -> datetime:
+        """Slot of chat on run_date inside its local window, chats are spread across the window by Chat.id"""
+        return get_send_time(
+            run_date=self.run_date,
+            key=chat.id,
+            timezone_=chat.timezone or CHAT_TIMEZONE,
+            send_from=chat.send_from or CHAT_SEND_FROM,
+            send_to=chat.send_to or CHAT_SEND_TO,
+        )
+
+    async def claim(self, chat: Chat, kind: str, recipient_id: int) -> bool:
+        """Claim one piece of work in RunLedger, False - it is already done or in progress"""
+        claimed = await schedule_writes().claim_runs(
+            run_date=self.run_date, job=JOB_CHECK_BIRTHDAY, kind=kind, chat_id=chat.id, recipient_ids=[recipient_id]
+        )
+        return bool(claimed)
+
+    async def finish(self, chat: Chat, results: List[SendResult], enqueued: bool):
+        """Work with message in outbox is done, failed work is released in RunLedger for the next attempt"""
+        kinds: Dict[Tuple[str, bool], List[int]] = defaultdict(list)
+        for res in results:
+            kinds[(res.kind, res.ok and enqueued)].append(res.recipient)
+        for (kind, done), recipient_ids in kinds.items():
+            await schedule_writes().finish_runs(
+                run_date=self.run_date,
+                job=JOB_CHECK_BIRTHDAY,
+                kind=kind,
+                chat_id=chat.id,
+                recipient_ids=recipient_ids,
+                done=done,
+            )
 
 
 if __name__ == "__main__":
@@ -1,26 +1,44 @@
+from datetime import date, datetime, timedelta
+from functools import partial
+from json import JSONDecodeError, loads
 from typing import Any, Dict, List, Optional
 
+from config import AI_ASKING_VARIANTS, PREPARED_CONTENT_TTL
 from src.bot_app.create_bot import bot
-from src.bot_app.dir_service.bot_service import send_compressed_image
+from src.bot_app.dir_service.fan_out import FanOut, SendResult, summary
+from src.bot_app.dir_service.image_cache import image_key
 from src.dir_open_ai.open_ai_tools import ResponseImageAI, ResponseTextAI
+from src.dir_schedule.writes import schedule_writes
+from src.service.clock import clock
 from src.service.create_data import user_data
 from src.service.loggers.py_logger_tel_bot import get_logger
-from src.sql.func_db import create_new_doc, get_doc_by_id, get_report
-from src.sql.models import Chat, Holiday, Report, User, UserChat
+from src.service.run_metrics import count, timer
+from src.sql.func_asset_db import get_prepared_content
+from src.sql.func_db import get_doc_by_id
+from src.sql.func_outbox_db import outbox_message
+from src.sql.models import Chat, Holiday, PreparedContent, User, UserChat
+from src.sql.tool_db import db_failed
 
 logger = get_logger(__name__)
 
 
 class DataAI:
     async def get_title(self, chat: Chat) -> str:
-        """Get title of Group"""
+        """Get title of Group: column Chat.title, Telegram is asked only while title is not known"""
+        if chat.title:
+            return chat.title
+        return await self.refresh_title(chat=chat) or "Аврора"
+
+    async def refresh_title(self, chat: Chat) -> Optional[str]:
+        """Read title of Group from Telegram and store it in Chat.title"""
         try:
             chat_data = await bot.get_chat(chat_id=chat.chat_id)
-            title = chat_data.title
         except Exception as e:
             logger.error(e)
-            title = "Аврора"
-        return title
+            return None
+        chat.title = chat_data.title
+        await schedule_writes().update_chat_title(chat_id=chat.chat_id, title=chat_data.title)
+        return chat_data.title
 
     def get_prompt_for_greet_birthday_user(self, first_name: str, title: str) -> Dict[str, str]:
         """Get prompt for birthday_user"""
@@ -72,6 +90,45 @@ class DataAI:
         )
         return {"get_text_ai": get_text_ai, "get_image_ai": get_image_ai}
 
+    def get_prompt_for_asking_money_variants(
+        self,
+        title: str,
+        amount: int,
+        birthday_user_name: str,
+        days_to_birthday: int,
+        variants: int,
+        user_birthday_data: Optional[str] = None,
+    ) -> Dict[str, str]:
+        """Get one prompt for all members of chat: JSON with variants of asking money, member's name is {name}"""
+        user_birthday_data = user_birthday_data if user_birthday_data else birthday_user_name
+        get_text_ai = (
+            f"Напиши {variants} різних варіантів дружнього і чемного повідомлення для колеги від імені команди "
+            f"{title}. У кожному повідомленні попроси скинутися {amount} грн, бо всі члени команди збирають гроші, "
+            f"щоб зробити подарунок для {user_birthday_data}, у якого день народження за {days_to_birthday} днів. "
+            f"Повідомлення повинні бути легкими і доброзичливими, а також містити подяку за підтримку. "
+            f"Замість імені колеги напиши {{name}}. "
+            f'Відповідь - лише JSON без пояснень: {{"variants": ["перший варіант", "другий варіант"]}}'
+        )
+        get_image_ai = (
+            f"Зробіть зображення, в якому команда {title} просить колег скинутися {amount} грн, бо всі члени "
+            f"команди збирають гроші, щоб зробити подарунок для\n{user_birthday_data}."
+        )
+        return {"get_text_ai": get_text_ai, "get_image_ai": get_image_ai}
+
+    def parse_variants(self, content: Optional[str]) -> List[str]:
+        """Variants from AI answer '{"variants": [...]}', the answer can be wrapped in markdown - [] if it is broken"""
+        if not content or "{" not in content:
+            return []
+        try:
+            data = loads(content[content.index("{") : content.rindex("}") + 1])
+        except (JSONDecodeError, ValueError):
+            logger.error(f"AI variants are not JSON: {content[:100]}")
+            return []
+        variants = data.get("variants") if isinstance(data, dict) else None
+        return (
+            [text for text in variants if isinstance(text, str) and text.strip()] if isinstance(variants, list) else []
+        )
+
     def if_error_ai_get_text_for_asking_money(
         self,
         first_name: str,
@@ -102,65 +159,101 @@ class DataAI:
 class GreetingsUser:
     """Greetings to the user"""
 
-    async def to_group(self, get_text_ai: str, get_image_ai: str, chat: Chat, user: User, title: str):
-        """AI sends Greetings to the user group"""
-        logger.debug(f">>> GreetingsUser().to_group()")
-        data_from_ai = await ResponseTextAI(prompt_for_ai=get_text_ai).get_content()
+    @staticmethod
+    def content_key(chat: Chat, user: User, greet_date: date) -> str:
+        """Key of greeting: dedup key in outbox and key of prepared content"""
+        return f"greeting:{greet_date}:{chat.id}:{user.id}"
+
+    async def generate(self, chat: Chat, user: User, greet_date: date) -> Dict[str, Any]:
+        """AI generates text and image of greeting: {"text", "image_key"}"""
+        data_for_ai = DataAI()
+        title = await data_for_ai.get_title(chat=chat)
+        prompts_ai = data_for_ai.get_prompt_for_greet_birthday_user(first_name=user.first_name, title=title)
+        with timer(stage="ai_text"):
+            data_from_ai = await ResponseTextAI(prompt_for_ai=prompts_ai["get_text_ai"]).get_content()
         if isinstance(data_from_ai, dict) and "content" in data_from_ai:
             text = data_from_ai["content"]
         else:
-            text = DataAI().if_error_ai_get_text_for_birthday_user(first_name=user.first_name, title=title)
-        data_image = await ResponseImageAI().get_image_from_ai(prompt_for_ai=get_image_ai)
-        if isinstance(data_image, dict) and "image_url" in data_image:
-            image_url = data_image["image_url"]
-            filename = f"image_for_{chat.id}.jpg"
-            res: bool = await send_compressed_image(
-                chat_id=chat.chat_id,
-                filename=filename,
-                caption=text,
-                disable_notification=False,
-                url=image_url,
-                reply_markup=None,
-            )
-            if not res:
-                res: bool = await send_compressed_image(
-                    chat_id=user.telegram_id,
-                    filename=filename,
-                    caption=text,
-                    disable_notification=False,
-                    url=image_url,
-                    reply_markup=None,
-                )
-        else:
-            try:
-                await bot.send_message(chat_id=chat.chat_id, text=text)
-            except Exception as e:
-                logger.error(e)
-                await bot.send_message(chat_id=user.telegram_id, text=text)
-
-    async def start_greet(self, user_chat: UserChat):
-        """Start Greeting User"""
-        chat: Optional[Chat] = await get_doc_by_id(model="chat", doc_id=user_chat.chat_id)
-        data_for_ai = DataAI()
-        title = await data_for_ai.get_title(chat=chat)
-        prompts_ai = data_for_ai.get_prompt_for_greet_birthday_user(first_name=user_chat.user.first_name, title=title)
-        get_text_ai = prompts_ai["get_text_ai"]
+            text = data_for_ai.if_error_ai_get_text_for_birthday_user(first_name=user.first_name, title=title)
+        """Зображення генерується один раз на іменинника, чат і рік - повтор бере його з кешу"""
         get_image_ai = prompts_ai["get_image_ai"]
+        key = image_key(subject=f"birthday:{user.id}:{greet_date.year}", chat_pk=chat.id, prompt=get_image_ai)
+        key = await schedule_writes().get_or_create_image(key=key, prompt=get_image_ai)
+        return {"text": text, "image_key": key}
+
+    def to_group(self, content: Dict[str, Any], chat: Chat, user: User, greet_date: date) -> Dict[str, Any]:
+        """Greetings to the user group - message for outbox"""
+        """Якщо група недоступна - привітання отримає сам іменинник"""
+        return outbox_message(
+            kind="greeting",
+            dedup_key=self.content_key(chat=chat, user=user, greet_date=greet_date),
+            chat_id=chat.chat_id,
+            fallback_chat_id=user.telegram_id,
+            text=content["text"],
+            image_key=content["image_key"],
+        )
+
+    async def prepare(self, chat: Chat, user: User, greet_date: date, ttl: int = PREPARED_CONTENT_TTL) -> bool:
+        """Generate greeting for day greet_date in advance and keep it ttl hours after start of that day"""
+        content = await self.generate(chat=chat, user=user, greet_date=greet_date)
+        expires_at = datetime.combine(greet_date, datetime.min.time()) + timedelta(hours=ttl)
+        saved = await schedule_writes().save_prepared_content(
+            key=self.content_key(chat=chat, user=user, greet_date=greet_date), expires_at=expires_at, **content
+        )
+        return bool(saved)
+
+    async def start_greet(self, user_chat: UserChat, greet_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Start Greeting User: prepared content of the day if it exists, otherwise live AI generation"""
+        chat: Optional[Chat] = await get_doc_by_id(model="chat", doc_id=user_chat.chat_id)
+        user = user_chat.user
+        greet_date = greet_date or clock.now().date()
         try:
-            logger.debug(f"send greet")
-            await self.to_group(
-                get_text_ai=get_text_ai, get_image_ai=get_image_ai, chat=chat, user=user_chat.user, title=title
-            )
+            logger.debug(f"prepare greet")
+            key = self.content_key(chat=chat, user=user, greet_date=greet_date)
+            prepared: Optional[PreparedContent] = await get_prepared_content(key=key)
+            count(name="greetings_prepared" if prepared else "greetings_live")
+            if prepared:
+                content = {"text": prepared.text, "image_key": prepared.image_key}
+            else:
+                content = await self.generate(chat=chat, user=user, greet_date=greet_date)
+            message = self.to_group(content=content, chat=chat, user=user, greet_date=greet_date)
             logger.info(
-                f"user {user_chat.user.first_name} | {user_chat.user.telegram_id} was congratulated on his birthday"
+                f"greeting for user {user.first_name} | {user.telegram_id} is ready "
+                f"({'prepared' if prepared else 'live'})"
             )
+            return message
         except Exception as e:
             logger.error(e)
+            return None
+
+
+class TextFields(dict):
+    """Fields for str.format_map: unknown placeholder stays in the text as it is and is remembered in missing"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.missing = set()
+
+    def __missing__(self, key: str) -> str:
+        self.missing.add(key)
+        return f"{{{key}}}"
 
 
 class AskingMoney:
     """Asking for money from chat users"""
 
+    def __init__(self, variants: int = AI_ASKING_VARIANTS):
+        """variants > 0 - one AI generation per holiday personalised for every member, 0 - AI call per member"""
+        self.variants = variants
+
+    @staticmethod
+    def add_card(text: str, card_number: str, birthday_user: Optional[User] = None) -> str:
+        """Add data of birthday user and card for payment to the text"""
+        if birthday_user:
+            cv = user_data(user=birthday_user, is_birthday=True)
+            return text + f"\n\n{cv}\nкарта для перерахування внеску: <code>{card_number}</code>"
+        return text + f"\n\nкарта для перерахування внеску: <code>{card_number}</code>"
+
     async def to_user(
         self,
         get_text_ai: str,
@@ -171,11 +264,13 @@ class AskingMoney:
         birthday_user_name: str,
         days_to_birthday: int,
         card_number: str,
+        dedup_key: str,
         birthday_user: Optional[User] = None,
-    ):
-        """AI sends Greetings to the user group"""
+    ) -> Dict[str, Any]:
+        """AI prepares asking money for the user - message for outbox"""
         logger.debug(f">>> AskingMoney().to_user()")
-        data_from_ai = await ResponseTextAI(prompt_for_ai=get_text_ai).get_content()
+        with timer(stage="ai_text"):
+            data_from_ai = await ResponseTextAI(prompt_for_ai=get_text_ai).get_content()
         if isinstance(data_from_ai, dict) and "content" in data_from_ai:
             text = data_from_ai["content"]
         else:
@@ -187,74 +282,257 @@ class AskingMoney:
                 days_to_birthday=days_to_birthday,
                 birthday_user=birthday_user,
             )
-        if birthday_user:
-            cv = user_data(user=birthday_user, is_birthday=True)
-            text = text + f"\n\n{cv}\nкарта для перерахування внеску: <code>{card_number}</code>"
-        else:
-            text = text + f"\n\nкарта для перерахування внеску: <code>{card_number}</code>"
-        data_image = await ResponseImageAI().get_image_from_ai(prompt_for_ai=get_image_ai)
-        if isinstance(data_image, dict) and "image_url" in data_image:
-            image_url = data_image["image_url"]
-            filename = f"image_for_{user.id}.jpg"
-            await send_compressed_image(
-                chat_id=user.telegram_id,
-                filename=filename,
-                caption=text,
-                disable_notification=False,
-                url=image_url,
-                reply_markup=None,
+        text = self.add_card(text=text, card_number=card_number, birthday_user=birthday_user)
+        with timer(stage="ai_image"):
+            data_image = await ResponseImageAI().get_image_from_ai(prompt_for_ai=get_image_ai)
+        image_url = data_image["image_url"] if isinstance(data_image, dict) and "image_url" in data_image else None
+        return outbox_message(
+            kind="asking_money", dedup_key=dedup_key, chat_id=user.telegram_id, text=text, image_url=image_url
+        )
+
+    async def get_variants(
+        self, title: str, birthday_user: User, days_to_birthday: int, holiday: Holiday
+    ) -> Dict[str, Any]:
+        """One AI generation for all members of holiday: texts with {name} and one cached image"""
+        prompts_ai = DataAI().get_prompt_for_asking_money_variants(
+            title=title,
+            amount=holiday.amount,
+            birthday_user_name=birthday_user.first_name,
+            days_to_birthday=days_to_birthday,
+            variants=self.variants,
+            user_birthday_data=user_data(user=birthday_user, is_birthday=True),
+        )
+        with timer(stage="ai_text"):
+            data_from_ai = await ResponseTextAI(prompt_for_ai=prompts_ai["get_text_ai"]).get_content(
+                max_tokens=400 * self.variants, temperature=0.7
             )
-        else:
-            await bot.send_message(chat_id=user.telegram_id, text=text)
+        content = data_from_ai.get("content") if isinstance(data_from_ai, dict) else None
+        texts = DataAI().parse_variants(content=content)
+        """Одне зображення на подію - для всіх учасників і всіх днів збору"""
+        get_image_ai = prompts_ai["get_image_ai"]
+        key = image_key(subject=f"holiday:{holiday.id}", chat_pk=holiday.chat_id, prompt=get_image_ai)
+        key = await schedule_writes().get_or_create_image(key=key, prompt=get_image_ai)
+        tokens = data_from_ai.get("total_tokens") if isinstance(data_from_ai, dict) else None
+        logger.info(f"asking money variants for holiday {holiday.id}: {len(texts)} texts, {tokens} tokens")
+        return {"texts": texts, "image_key": key}
+
+    def personalise(
+        self,
+        variants: Dict[str, Any],
+        user: User,
+        title: str,
+        amount: int,
+        birthday_user: User,
+        days_to_birthday: int,
+        card_number: str,
+        dedup_key: str,
+    ) -> Dict[str, Any]:
+        """Message for member from generated variants without AI call - message for outbox.
+        Placeholders of member ({name}, {last_name}, {user_data}...) and of holiday ({title}, {amount}...) are filled,
+        a variant with other placeholders is replaced by the own text"""
+        texts: List[str] = variants["texts"]
+        text = None
+        if texts:
+            """Варіант обираємо за User.id - учасник отримує той самий варіант при повторі"""
+            text = self.fill(
+                text=texts[user.id % len(texts)],
+                user=user,
+                title=title,
+                amount=amount,
+                birthday_user=birthday_user,
+                days_to_birthday=days_to_birthday,
+                card_number=card_number,
+            )
+        if text is None:
+            text = DataAI().if_error_ai_get_text_for_asking_money(
+                first_name=user.first_name,
+                title=title,
+                amount=amount,
+                birthday_user_name=birthday_user.first_name,
+                days_to_birthday=days_to_birthday,
+            )
+        text = self.add_card(text=text, card_number=card_number)
+        return outbox_message(
+            kind="asking_money",
+            dedup_key=dedup_key,
+            chat_id=user.telegram_id,
+            text=text,
+            image_key=variants["image_key"],
+        )
+
+    @staticmethod
+    def fill(
+        text: str,
+        user: User,
+        title: str,
+        amount: int,
+        birthday_user: User,
+        days_to_birthday: int,
+        card_number: str,
+    ) -> Optional[str]:
+        """Fill placeholders of AI variant with data of member and holiday. None - unknown placeholder or broken
+        braces in the text"""
+        fields = TextFields(
+            name=user.first_name,
+            first_name=user.first_name,
+            last_name=user.last_name or "",
+            username=f"@{user.username}" if user.username else "",
+            phone_number=user.phone_number or "",
+            user_data=user_data(user=user, is_birthday=False) or user.first_name,
+            title=title,
+            amount=amount,
+            days_to_birthday=days_to_birthday,
+            birthday_user_name=birthday_user.first_name,
+            birthday_user=user_data(user=birthday_user, is_birthday=True) or birthday_user.first_name,
+            card_number=card_number,
+        )
+        try:
+            text = text.format_map(fields)
+        except (ValueError, TypeError, LookupError, AttributeError) as e:
+            logger.warning(f"AI variant is not filled: {e}")
+            return None
+        if fields.missing:
+            logger.warning(f"AI variant has unknown placeholders: {sorted(fields.missing)}")
+            return None
+        return text
+
+    async def ask_user(
+        self,
+        user_chat: UserChat,
+        chat: Chat,
+        title: str,
+        birthday_user: User,
+        days_to_birthday: int,
+        holiday: Holiday,
+        variants: Optional[Dict[str, Any]] = None,
+        run_date: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """Order the text and image from AI for member (or personalise variants of holiday) - message for outbox.
+        run_date - day of the window (today by default), the outbox key is built from it like keys of greetings"""
+        run_date = run_date or clock.now().date()
+        dedup_key = f"asking_money:{run_date}:{holiday.id}:{user_chat.user.id}"
+        if variants is not None:
+            return self.personalise(
+                variants=variants,
+                user=user_chat.user,
+                title=title,
+                amount=holiday.amount,
+                birthday_user=birthday_user,
+                days_to_birthday=days_to_birthday,
+                card_number=chat.card_number,
+                dedup_key=dedup_key,
+            )
+        prompts_ai = DataAI().get_prompt_for_asking_money(
+            first_name=user_chat.user.first_name,
+            title=title,
+            amount=holiday.amount,
+            birthday_user_name=birthday_user.first_name,
+            days_to_birthday=days_to_birthday,
+            user_data=user_data(user=user_chat.user, is_birthday=False),
+            user_birthday_data=user_data(user=birthday_user, is_birthday=True),
+        )
+        logger.debug("prepare asking money to_user")
+        return await self.to_user(
+            get_text_ai=prompts_ai["get_text_ai"],
+            get_image_ai=prompts_ai["get_image_ai"],
+            user=user_chat.user,
+            title=title,
+            amount=holiday.amount,
+            birthday_user_name=birthday_user.first_name,
+            days_to_birthday=days_to_birthday,
+            card_number=chat.card_number,
+            dedup_key=dedup_key,
+        )
 
     async def start_asking(
-        self, birthday_user: User, users_chats: List[UserChat], days_to_birthday: int, holiday: Holiday
-    ):
-        """Start Send asking for money to users"""
-        for user_chat in users_chats:
-            if user_chat.status:
-                """User take part in chat party"""
-                if user_chat.user_telegram_id != birthday_user.telegram_id:
-                    """Order the text and image from AI for user"""
-                    chat: Optional[Chat] = await get_doc_by_id(model="chat", doc_id=user_chat.chat_id)
-                    report: Report = await get_report(user_pk=user_chat.user.id, chat_pk=chat.id, holiday_pk=holiday.id)
-                    if report:
-                        ask_money = False if report.status else True
-                    else:
-                        ask_money = True
-                        report: Dict[str, Any] = {
-                            "user_id": user_chat.user.id,
-                            "chat_id": chat.id,
-                            "holiday_id": holiday.id,
-                        }
-                        await create_new_doc(model="report", data=report)
-                        # report = await get_report(user_pk=user_chat.user.id, chat_pk=chat.id, holiday_pk=holiday.id)
-                    if ask_money:
-                        """Start process asking_money"""
-                        data_for_ai = DataAI()
-                        title = await data_for_ai.get_title(chat=chat)
-                        prompts_ai = data_for_ai.get_prompt_for_asking_money(
-                            first_name=user_chat.user.first_name,
-                            title=title,
-                            amount=holiday.amount,
-                            birthday_user_name=birthday_user.first_name,
-                            days_to_birthday=days_to_birthday,
-                            user_data=user_data(user=user_chat.user, is_birthday=False),
-                            user_birthday_data=user_data(user=birthday_user, is_birthday=True),
-                        )
-                        get_text_ai = prompts_ai["get_text_ai"]
-                        get_image_ai = prompts_ai["get_image_ai"]
-                        try:
-                            logger.debug("send asking money to_user")
-                            await self.to_user(
-                                get_text_ai=get_text_ai,
-                                get_image_ai=get_image_ai,
-                                user=user_chat.user,
-                                title=title,
-                                amount=holiday.amount,
-                                birthday_user_name=birthday_user.first_name,
-                                days_to_birthday=days_to_birthday,
-                                card_number=chat.card_number,
-                            )
-                        except Exception as e:
-                            logger.error(e)
+        self,
+        birthday_user: User,
+        users_chats: List[UserChat],
+        days_to_birthday: int,
+        holiday: Holiday,
+        fan_out: Optional[FanOut] = None,
+        run_date: Optional[date] = None,
+        ledger_job: Optional[str] = None,
+    ) -> List[SendResult]:
+        """Prepare asking for money to users - members are processed in parallel by FanOut,
+        SendResult.result is message for outbox. With run_date and ledger_job members already asked
+        on run_date (RunLedger) are skipped before any DataBase or AI work."""
+        fan_out = fan_out if fan_out else FanOut()
+        kind = self.ledger_kind(holiday=holiday)
+        chat: Optional[Chat] = await get_doc_by_id(model="chat", doc_id=holiday.chat_id)
+        if not chat:
+            logger.error(f"chat for holiday: {holiday.id} not found")
+            return []
+        """User take part in chat party"""
+        members = [
+            user_chat
+            for user_chat in users_chats
+            if user_chat.status and user_chat.user_telegram_id != birthday_user.telegram_id
+        ]
+        if run_date and ledger_job:
+            claimed = await schedule_writes().claim_runs(
+                run_date=run_date,
+                job=ledger_job,
+                kind=kind,
+                chat_id=chat.id,
+                recipient_ids=[user_chat.user_telegram_id for user_chat in members],
+            )
+            members = [user_chat for user_chat in members if user_chat.user_telegram_id in (claimed or set())]
+        if not members:
+            return []
+        """Один запит створює всі відсутні Report події і повертає, хто ще не зробив внесок"""
+        owing = await schedule_writes().provision_reports(
+            holiday=holiday, user_ids=[user_chat.user.id for user_chat in members]
+        )
+        if db_failed(owing):
+            logger.error(f"provision_reports(holiday={holiday.id}) failed - skip asking")
+            if run_date and ledger_job:
+                recipient_ids = [user_chat.user_telegram_id for user_chat in members]
+                await schedule_writes().finish_runs(
+                    run_date=run_date,
+                    job=ledger_job,
+                    kind=kind,
+                    chat_id=chat.id,
+                    recipient_ids=recipient_ids,
+                    done=False,
+                )
+            return []
+        asked = [user_chat for user_chat in members if user_chat.user.id in owing]
+        paid = [user_chat.user_telegram_id for user_chat in members if user_chat.user.id not in owing]
+        title = await DataAI().get_title(chat=chat)
+        variants = None
+        if self.variants and asked:
+            """Один запит до AI на подію замість запиту на кожного учасника"""
+            variants = await self.get_variants(
+                title=title, birthday_user=birthday_user, days_to_birthday=days_to_birthday, holiday=holiday
+            )
+        jobs = [
+            (
+                user_chat.user_telegram_id,
+                partial(
+                    self.ask_user,
+                    user_chat=user_chat,
+                    chat=chat,
+                    title=title,
+                    birthday_user=birthday_user,
+                    days_to_birthday=days_to_birthday,
+                    holiday=holiday,
+                    variants=variants,
+                    run_date=run_date,
+                ),
+            )
+            for user_chat in asked
+        ]
+        if run_date and ledger_job and paid:
+            """Хто вже зробив внесок - на сьогодні робота з ним завершена"""
+            await schedule_writes().finish_runs(
+                run_date=run_date, job=ledger_job, kind=kind, chat_id=chat.id, recipient_ids=paid
+            )
+        results = await fan_out.run(jobs=jobs, kind=kind)
+        logger.info(f"start_asking(holiday={holiday.id}): {summary(results=results)}")
+        return results
+
+    @staticmethod
+    def ledger_kind(holiday: Holiday) -> str:
+        """Kind of work in RunLedger - one member can be asked for several holidays per day"""
+        return f"asking_money:{holiday.id}"
@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from src.bot_app.dir_service.image_cache import get_or_create_image
+from src.sql.func_asset_db import delete_expired_content, save_prepared_content
+from src.sql.func_db import provision_reports, update_chat_title, upsert_many
+from src.sql.func_outbox_db import cancel_messages, enqueue_messages
+from src.sql.func_panel_db import save_admin_panel
+from src.sql.func_system_db import claim_runs, finish_runs
+
+
+class ScheduleWrites:
+    """Every write of the daily scan to DataBase (and to image cache) in one place.
+    Scheduler code calls them through schedule_writes(), dry-run replaces the whole object by use_writes():
+    a write added here and missing in the replacement fails instead of writing"""
+
+    claim_runs = staticmethod(claim_runs)
+    finish_runs = staticmethod(finish_runs)
+    upsert_many = staticmethod(upsert_many)
+    provision_reports = staticmethod(provision_reports)
+    enqueue_messages = staticmethod(enqueue_messages)
+    cancel_messages = staticmethod(cancel_messages)
+    save_admin_panel = staticmethod(save_admin_panel)
+    save_prepared_content = staticmethod(save_prepared_content)
+    delete_expired_content = staticmethod(delete_expired_content)
+    update_chat_title = staticmethod(update_chat_title)
+    get_or_create_image = staticmethod(get_or_create_image)
+
+
+current_writes: ContextVar[Any] = ContextVar("current_writes", default=ScheduleWrites())
+
+
+def schedule_writes() -> Any:
+    """Writes of the current context: ScheduleWrites or replacement of dry-run"""
+    return current_writes.get()
+
+
+@contextmanager
+def use_writes(writes: Any) -> Iterator[Any]:
+    """Replace writes for everything that runs inside 'with' block (tasks started inside it too)"""
+    token = current_writes.set(writes)
+    try:
+        yield writes
+    finally:
+        current_writes.reset(token)
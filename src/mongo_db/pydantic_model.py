@@ -3,7 +3,7 @@ from typing import Optional
 
 from pydantic import BaseModel, Field
 
-from src.service.service_tools import correct_time
+from src.service.clock import clock
 
 
 class UserModel(BaseModel):
@@ -12,7 +12,7 @@ class UserModel(BaseModel):
     last_name: Optional[str] = None
     username: Optional[str] = None
     language_code: Optional[str] = None
-    created_at: datetime = Field(default_factory=correct_time)
+    created_at: datetime = Field(default_factory=clock.now)
     phone_number: Optional[str] = None
     birthday: Optional[datetime] = None
     status: Optional[bool] = False
@@ -0,0 +1,71 @@
+from array import array
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from src.service.clock import clock
+from src.service.service_tools import get_birthday_window
+
+DAYS_IN_CALENDAR = 366
+NO_BIRTHDAY = DAYS_IN_CALENDAR  # sort key for users without birthday - вони йдуть в кінець календаря
+
+
+def day_index(month_day: str) -> int:
+    """Index of 'month-day' in a leap year calendar: '01-01' -> 0, '02-29' -> 59, '12-31' -> 365"""
+    return date.fromisoformat(f"2000-{month_day}").timetuple().tm_yday - 1
+
+
+class BirthdayCalendar:
+    """In-memory calendar: 366 day-of-year buckets with compact arrays of User.id"""
+
+    def __init__(self):
+        self.buckets: List[array] = [array("q") for _ in range(DAYS_IN_CALENDAR)]
+        self.user_days: Dict[int, int] = dict()
+        self.loaded_at: Optional[datetime] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def load(self, users_birthdays: Iterable[Tuple[int, date]]):
+        """Fill calendar from pairs (User.id, User.birthday)"""
+        self.buckets = [array("q") for _ in range(DAYS_IN_CALENDAR)]
+        self.user_days = dict()
+        for user_id, birthday in users_birthdays:
+            if birthday:
+                index = day_index(month_day=birthday.strftime("%m-%d"))
+                self.buckets[index].append(user_id)
+                self.user_days[user_id] = index
+        self.loaded_at = clock.now()
+
+    def update(self, user_id: int, birthday: Optional[Union[date, datetime]]):
+        """Move one user to the bucket of his new birthday (or drop him if birthday is None)"""
+        if not self.loaded:
+            return
+        new_index = day_index(month_day=birthday.strftime("%m-%d")) if birthday else None
+        old_index = self.user_days.get(user_id)
+        if old_index == new_index:
+            return
+        if old_index is not None:
+            self.buckets[old_index].remove(user_id)
+            del self.user_days[user_id]
+        if new_index is not None:
+            self.buckets[new_index].append(user_id)
+            self.user_days[user_id] = new_index
+
+    def upcoming(self, date_today: date, days: int) -> Dict[int, int]:
+        """Users with birthday in the next int: days -> {User.id: days to birthday}, reads at most days + 2 buckets"""
+        result = dict()
+        for month_day, days_to_birthday in get_birthday_window(date_today=date_today, days=days).items():
+            for user_id in self.buckets[day_index(month_day=month_day)]:
+                result.setdefault(user_id, days_to_birthday)
+        return result
+
+    def sort_key(self, user_id: int) -> int:
+        """Position of user's birthday in the year (month-day order)"""
+        return self.user_days.get(user_id, NO_BIRTHDAY)
+
+    def __len__(self) -> int:
+        return len(self.user_days)
+
+
+birthday_calendar = BirthdayCalendar()
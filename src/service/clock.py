@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional
+
+import pytz
+
+
+class Clock:
+    """Server time 'Europe/Kyiv' as naive datetime. Zone is built once, time can be frozen or advanced
+    for simulation, benchmarks and tests"""
+
+    def __init__(self, timezone_: str = "Europe/Kyiv"):
+        self.timezone_ = timezone_
+        self.zone = pytz.timezone(timezone_)
+        self.frozen_at: Optional[datetime] = None
+        self.offset = timedelta(0)
+
+    def now(self) -> datetime:
+        """Time now: object=datetime"""
+        if self.frozen_at is not None:
+            return self.frozen_at
+        return datetime.now(tz=self.zone).replace(tzinfo=None) + self.offset
+
+    def today(self) -> date:
+        return self.now().date()
+
+    def from_timestamp(self, timestamp: float) -> datetime:
+        """Clock time of POSIX timestamp (e.g. LogRecord.created)"""
+        if self.frozen_at is not None:
+            return self.frozen_at
+        return datetime.fromtimestamp(timestamp, tz=self.zone).replace(tzinfo=None) + self.offset
+
+    def freeze(self, at: Optional[datetime] = None):
+        """Stop the clock at datetime: at (now by default)"""
+        self.frozen_at = at if at is not None else self.now()
+
+    def unfreeze(self):
+        self.frozen_at = None
+
+    def advance(self, delta: timedelta):
+        """Move the clock forward (frozen or running)"""
+        if self.frozen_at is not None:
+            self.frozen_at += delta
+        else:
+            self.offset += delta
+
+    def reset(self):
+        """Real time again"""
+        self.frozen_at, self.offset = None, timedelta(0)
+
+    @contextmanager
+    def frozen(self, at: Optional[datetime] = None) -> Iterator["Clock"]:
+        """Freeze the clock inside 'with' block, previous state is restored after it"""
+        state = self.frozen_at, self.offset
+        self.freeze(at=at)
+        try:
+            yield self
+        finally:
+            self.frozen_at, self.offset = state
+
+
+clock = Clock()
@@ -1,14 +1,11 @@
-from datetime import datetime
 from logging import Formatter
 
-import pytz
+from src.service.clock import clock
 
 
 class KyivTimeFormatter(Formatter):
-    """Setting Kyiv time."""
-
-    timezone_: str = "Europe/Kyiv"
+    """Setting Kyiv time: time of the record (record.created) by the clock service."""
 
     def formatTime(self, record, datefmt=None) -> str:
-        kyiv_time = datetime.now(tz=pytz.timezone(self.timezone_)).replace(tzinfo=None)
-        return kyiv_time.strftime("%Y-%m-%d %H:%M:%S")
+        kyiv_time = clock.from_timestamp(timestamp=record.created)
+        return kyiv_time.strftime(datefmt or "%Y-%m-%d %H:%M:%S")
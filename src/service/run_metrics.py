@@ -0,0 +1,101 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from time import monotonic
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.service.clock import clock
+
+
+class RunMetrics:
+    """Counters and wall time per stage of one scheduler run"""
+
+    def __init__(self, job: str, run_date: date):
+        self.job = job
+        self.run_date = run_date
+        self.started_at = clock.now()
+        self.start = monotonic()
+        self.counters: Counter = Counter()
+        self.stages: Dict[str, Dict[str, float]] = dict()
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def add_time(self, stage: str, duration: float, calls: int = 1):
+        """Add duration to stage: {calls, total, max}"""
+        stats = self.stages.setdefault(stage, {"calls": 0, "total": 0.0, "max": 0.0})
+        stats["calls"] += calls
+        stats["total"] += duration
+        stats["max"] = max(stats["max"], duration)
+
+    def merge(self, report: Dict[str, Any]):
+        """Add report of another process (shard) to this run"""
+        self.counters.update(report.get("counters", {}))
+        for stage, stats in report.get("stages", {}).items():
+            self.add_time(stage=stage, duration=stats["total"], calls=stats["calls"])
+            self.stages[stage]["max"] = max(self.stages[stage]["max"], stats["max"])
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "job": self.job,
+            "run_date": self.run_date,
+            "started_at": self.started_at,
+            "duration": round(monotonic() - self.start, 3),
+            "counters": dict(self.counters),
+            "stages": {
+                stage: {"calls": stats["calls"], "total": round(stats["total"], 3), "max": round(stats["max"], 3)}
+                for stage, stats in self.stages.items()
+            },
+        }
+
+
+"""Метрики поточного запуску - видно з будь-якої корутини запуску, в тому числі з задач, створених в ньому"""
+current_run: ContextVar[Optional[RunMetrics]] = ContextVar("current_run", default=None)
+
+
+@contextmanager
+def track_run(job: str, run_date: date) -> Iterator[RunMetrics]:
+    """Collect metrics of everything that runs inside 'with' block"""
+    metrics = RunMetrics(job=job, run_date=run_date)
+    token = current_run.set(metrics)
+    try:
+        yield metrics
+    finally:
+        current_run.reset(token)
+
+
+def count(name: str, n: int = 1):
+    """Add n to counter of the current run (nothing outside of a run)"""
+    metrics = current_run.get()
+    if metrics is not None:
+        metrics.count(name=name, n=n)
+
+
+@contextmanager
+def timer(stage: str) -> Iterator[None]:
+    """Measure wall time of 'with' block as stage of the current run"""
+    start = monotonic()
+    try:
+        yield
+    finally:
+        metrics = current_run.get()
+        if metrics is not None:
+            metrics.add_time(stage=stage, duration=monotonic() - start)
+
+
+def runs_report(runs: List[Any]) -> str:
+    """Text for admin: last runs with counters and the slowest stages"""
+    if not runs:
+        return "Запусків планувальника ще не було"
+    lines = list()
+    for run in runs:
+        status = "✅" if run.ok else "⛔"
+        counters = ", ".join(f"{name}: {value}" for name, value in sorted((run.counters or {}).items()))
+        stages = sorted((run.stages or {}).items(), key=lambda item: item[1]["total"], reverse=True)[:5]
+        stages = ", ".join(f"{stage}: {stats['total']}s/{stats['calls']}" for stage, stats in stages)
+        lines.append(
+            f"{status} <b>{run.job}</b> {run.run_date} ({run.started_at:%H:%M}) - <b>{run.duration}s</b>\n"
+            f"{counters or '-'}\n<i>{stages or '-'}</i>"
+        )
+    return "\n\n".join(lines)
@@ -1,19 +1,57 @@
+import calendar
 import random
 import secrets
 import string
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
 
 import phonenumbers
 import pytz
 from stdnum.luhn import is_valid
 
+from src.service.clock import clock
+
 
 def correct_time(timezone_: str = "Europe/Kyiv") -> datetime:
-    """Back time now 'Europe/Kyiv': object=datetime"""
+    """Back time now 'Europe/Kyiv': object=datetime. Kept for old callers - new code uses src.service.clock"""
+    if timezone_ == clock.timezone_:
+        return clock.now()
     return datetime.now(tz=pytz.timezone(timezone_)).replace(tzinfo=None)
 
 
+def get_birthday_window(date_today: date, days: int) -> Dict[str, int]:
+    """Map 'month-day' of every birthday in the next int: days to days left, e.g. {'10-19': 0, '10-20': 1}.
+    Window crosses the new year by date arithmetic; '02-29' birthdays fall on 28.02 in a non-leap year."""
+    window = dict()
+    for n in range(days + 1):
+        day = date_today + timedelta(days=n)
+        window.setdefault(str(day)[5:], n)
+        if day.month == 2 and day.day == 28 and not calendar.isleap(day.year):
+            window.setdefault("02-29", n)
+    return window
+
+
+def get_send_time(run_date: date, key: int, timezone_: str, send_from: str, send_to: str) -> datetime:
+    """Time to send work of one chat on run_date: a slot inside local window ['HH:MM' send_from, send_to)
+    of timezone_, spread by int: key (the same key gets the same slot every day).
+    Returned as naive 'Europe/Kyiv' datetime, the same as correct_time().
+    Unknown timezone_ or invalid window fall back to 'Europe/Kyiv' 09:00-21:00"""
+    try:
+        zone = pytz.timezone(timezone_)
+    except pytz.UnknownTimeZoneError:
+        zone = pytz.timezone("Europe/Kyiv")
+    try:
+        start = datetime.combine(run_date, datetime.strptime(send_from, "%H:%M").time())
+        end = datetime.combine(run_date, datetime.strptime(send_to, "%H:%M").time())
+    except (TypeError, ValueError):
+        start = datetime.combine(run_date, time(hour=9))
+        end = datetime.combine(run_date, time(hour=21))
+    window = max(int((end - start).total_seconds() // 60), 1)
+    """Множник Кнута розкидає сусідні ключі по всьому вікну"""
+    local = start + timedelta(minutes=key * 2654435761 % window)
+    return zone.localize(local).astimezone(pytz.timezone("Europe/Kyiv")).replace(tzinfo=None)
+
+
 def generate_users_password():
     """Генеруємо 'password' для 'user', безпечний для передачі через URL."""
     characters = string.ascii_letters + string.digits  # Всі латинські літери (малі та великі) + цифри
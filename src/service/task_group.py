@@ -0,0 +1,85 @@
+from asyncio import Semaphore, Task, create_task, gather
+from collections import Counter
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Awaitable, Dict, List, Optional, Set
+
+from src.service.loggers.py_logger_tel_bot import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class TaskResult:
+    """Result (or exception) of one supervised task"""
+
+    name: str
+    kind: Optional[str] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class TaskGroup:
+    """Supervised background tasks: not more than int: limit run at once, the group keeps strong references
+    to tasks (they are not garbage-collected), collects results and exceptions and reports totals and durations.
+    One run = tasks spawned since the previous report()"""
+
+    def __init__(self, name: str, limit: int = 10):
+        self.name = name
+        self.semaphore = Semaphore(value=limit)
+        self.tasks: Set[Task] = set()
+        self.results: List[TaskResult] = list()
+        self.started_at: Optional[float] = None
+
+    def spawn(self, coro: Awaitable[Any], name: Optional[str] = None, kind: Optional[str] = None) -> Task:
+        """Start coroutine in the group, it waits for a free slot before it runs"""
+        if self.started_at is None:
+            self.started_at = monotonic()
+        task = create_task(self.supervise(coro=coro, name=name or f"{self.name}-{len(self.tasks)}", kind=kind))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def supervise(self, coro: Awaitable[Any], name: str, kind: Optional[str]) -> TaskResult:
+        """Run one task under the limit, exception of task is kept in its TaskResult"""
+        async with self.semaphore:
+            start = monotonic()
+            try:
+                task_result = TaskResult(name=name, kind=kind, result=await coro, duration=monotonic() - start)
+            except Exception as e:
+                logger.exception("⛔ task '%s' of group '%s' failed: %s", name, self.name, str(e))
+                task_result = TaskResult(name=name, kind=kind, error=e, duration=monotonic() - start)
+        self.results.append(task_result)
+        return task_result
+
+    @property
+    def running(self) -> int:
+        return len(self.tasks)
+
+    async def join(self) -> List[TaskResult]:
+        """Wait for all spawned tasks (including tasks spawned while waiting), return results of the run"""
+        while self.tasks:
+            await gather(*self.tasks)
+        return list(self.results)
+
+    def report(self) -> Dict[str, Any]:
+        """Totals and durations of the run, the next spawn starts a new run"""
+        durations = [res.duration for res in self.results]
+        report = {
+            "group": self.name,
+            "tasks": len(self.results),
+            "ok": sum(1 for res in self.results if res.ok),
+            "failed": sum(1 for res in self.results if not res.ok),
+            "running": self.running,
+            "by_kind": dict(Counter(res.kind for res in self.results if res.kind)),
+            "total_duration": round(sum(durations), 3),
+            "max_duration": round(max(durations, default=0.0), 3),
+            "wall_time": round(monotonic() - self.started_at, 3) if self.started_at is not None else 0.0,
+        }
+        self.results, self.started_at = list(), None
+        return report
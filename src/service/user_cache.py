@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from datetime import date, datetime
+from json import dumps, loads
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import Date, DateTime
+from sqlalchemy.orm import make_transient_to_detached
+
+from config import (
+    REDIS_HOST,
+    REDIS_NUMBER_DB,
+    REDIS_PORT,
+    REDIS_TIMEOUT,
+    USER_CACHE_REDIS,
+    USER_CACHE_REDIS_TTL,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+)
+from src.service.loggers.py_logger_tel_bot import get_logger
+from src.sql.models import User
+
+logger = get_logger(__name__)
+
+REDIS_KEY = "user:tg:{telegram_id}"
+
+
+def user_to_dict(user: User) -> Dict[str, Any]:
+    """Column values of User, dates as ISO strings"""
+    values = dict()
+    for column in User.__table__.columns:
+        value = user.__dict__.get(column.key)
+        values[column.key] = value.isoformat() if isinstance(value, (date, datetime)) else value
+    return values
+
+
+def user_from_dict(values: Dict[str, Any]) -> User:
+    """New detached User (as if it was loaded by a query) from column values"""
+    data = dict()
+    for column in User.__table__.columns:
+        value = values.get(column.key)
+        if isinstance(value, str) and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif isinstance(value, str) and isinstance(column.type, Date):
+            value = date.fromisoformat(value)
+        data[column.key] = value
+    user = User(**data)
+    make_transient_to_detached(user)
+    return user
+
+
+class UserCache:
+    """Read-through cache of User by telegram_id: in-process LRU of max_size users kept ttl seconds,
+    optional Redis tier shared by processes. Every get returns a new User object - handlers may change it.
+    Users missing in DataBase are not cached"""
+
+    def __init__(
+        self,
+        max_size: int = USER_CACHE_SIZE,
+        ttl: float = USER_CACHE_TTL,
+        redis: Any = None,
+        redis_ttl: int = USER_CACHE_REDIS_TTL,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis = redis
+        self.redis_ttl = redis_ttl
+        self.users: OrderedDict[int, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self.generation = 0
+        self.counters = {"hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0}
+
+    async def get(self, telegram_id: int, load: Callable[[int], Awaitable[Optional[User]]]) -> Optional[User]:
+        """User from cache, on a miss - load(telegram_id) from DataBase and put it into cache"""
+        entry = self.users.get(telegram_id)
+        if entry and monotonic() - entry[0] < self.ttl:
+            self.users.move_to_end(telegram_id)
+            self.counters["hits"] += 1
+            return user_from_dict(values=entry[1])
+        generation = self.generation
+        values = await self.redis_get(telegram_id=telegram_id)
+        if values is not None:
+            self.counters["redis_hits"] += 1
+        else:
+            self.counters["misses"] += 1
+            user = await load(telegram_id)
+            if not user:
+                return user  # None - not found, DBError - DataBase failed
+            values = user_to_dict(user=user)
+            if generation == self.generation:
+                await self.redis_set(telegram_id=telegram_id, values=values)
+        """Користувача змінили поки ми його читали - не кешуємо застарілі дані"""
+        if generation == self.generation:
+            self.put(telegram_id=telegram_id, values=values)
+        return user_from_dict(values=values)
+
+    def put(self, telegram_id: int, values: Dict[str, Any]):
+        """Put user into LRU, the least recently used users are dropped above max_size"""
+        self.users[telegram_id] = (monotonic(), values)
+        self.users.move_to_end(telegram_id)
+        while len(self.users) > self.max_size:
+            self.users.popitem(last=False)
+
+    async def invalidate(self, telegram_id: int):
+        """User is changed in DataBase - drop him from both tiers"""
+        self.generation += 1
+        self.counters["invalidations"] += 1
+        self.users.pop(telegram_id, None)
+        if self.redis is not None:
+            try:
+                await self.redis.delete(REDIS_KEY.format(telegram_id=telegram_id))
+            except Exception as e:
+                logger.error(f"user cache: Redis delete of {telegram_id} failed: {e}")
+
+    async def redis_get(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Redis is optional: when it is down cache works as in-process LRU only"""
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(REDIS_KEY.format(telegram_id=telegram_id))
+        except Exception as e:
+            logger.error(f"user cache: Redis get of {telegram_id} failed: {e}")
+            return None
+        return loads(raw) if raw else None
+
+    async def redis_set(self, telegram_id: int, values: Dict[str, Any]):
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(REDIS_KEY.format(telegram_id=telegram_id), dumps(values), ex=self.redis_ttl)
+        except Exception as e:
+            logger.error(f"user cache: Redis set of {telegram_id} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and hit rate (both tiers) since start"""
+        lookups = self.counters["hits"] + self.counters["redis_hits"] + self.counters["misses"]
+        hit_rate = (self.counters["hits"] + self.counters["redis_hits"]) / lookups if lookups else 0.0
+        return {**self.counters, "size": len(self.users), "hit_rate": round(hit_rate, 3)}
+
+    def report(self) -> str:
+        """Text for admin"""
+        stats = self.stats()
+        return (
+            f"user cache: hit rate {stats['hit_rate']:.0%}, hits {stats['hits']}, redis {stats['redis_hits']}, "
+            f"misses {stats['misses']}, invalidations {stats['invalidations']}, size {stats['size']}"
+        )
+
+
+def create_redis() -> Any:
+    """Redis tier of cache, only if USER_CACHE_REDIS is on. Without Redis cache works as in-process LRU only"""
+    if not USER_CACHE_REDIS:
+        return None
+    try:
+        from redis.asyncio import Redis
+
+        return Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_NUMBER_DB, socket_timeout=REDIS_TIMEOUT)
+    except Exception as e:
+        logger.error(f"user cache: Redis tier is off: {e}")
+        return None
+
+
+user_cache = UserCache(redis=create_redis())
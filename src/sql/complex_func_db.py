@@ -1,11 +1,13 @@
-from typing import List
+from typing import List, Optional, Tuple
 
+from sqlalchemy import and_
 from sqlalchemy.future import select
+from sqlalchemy.orm import contains_eager
 
 from src.service.loggers.py_logger_fast_api import get_logger
 from src.sql.connect import DBSession
-from src.sql.models import User, UserChat
-from src.sql.tool_db import retry_on_db_error
+from src.sql.models import Chat, Holiday, User, UserChat
+from src.sql.tool_db import BATCH_DEADLINE, retry_on_db_error
 
 logger = get_logger(__name__)
 
@@ -31,3 +33,36 @@ async def get_intersecting_users(telegram_id: int) -> List[User]:
         users_in_same_chats = result.scalars().all()
         # Забезпечити унікальність користувачів за допомогою set
         return list(set(users_in_same_chats))
+
+
+@retry_on_db_error(deadline=BATCH_DEADLINE)
+async def get_upcoming_birthdays(
+    user_ids: List[int], shard: Optional[Tuple[int, int]] = None
+) -> List[Tuple[UserChat, Chat, Optional[Holiday]]]:
+    """Get (UserChat with User, Chat, Holiday or None) for every participating membership of users from user_ids
+    in active chats - one joined query, ordered by chat. shard=(index, count) - only chats with Chat.id % count == index
+    """
+    logger.debug(f"get_upcoming_birthdays(user_ids={len(user_ids)}, shard={shard})")
+    if not user_ids:
+        return []
+    async with DBSession() as session:
+        stmt = (
+            select(UserChat, Chat, Holiday)
+            .join(UserChat.chat)
+            .join(UserChat.user)
+            .outerjoin(Holiday, and_(Holiday.user_id == User.id, Holiday.chat_id == Chat.id))
+            .options(contains_eager(UserChat.user), contains_eager(UserChat.chat))
+            .filter(Chat.status.is_(True), UserChat.status.is_(True), User.birthday.isnot(None))
+            .filter(User.id.in_(user_ids))
+            .order_by(Chat.id, UserChat.id, Holiday.id)
+        )
+        if shard:
+            stmt = stmt.filter(Chat.id % shard[1] == shard[0])
+        result = await session.execute(stmt)
+        rows, seen = list(), set()
+        for user_chat, chat, holiday in result.all():
+            # Якщо для пари user-chat є кілька holiday - беремо перший, як і get_holiday()
+            if user_chat.id not in seen:
+                seen.add(user_chat.id)
+                rows.append((user_chat, chat, holiday))
+        return rows
@@ -1,9 +1,152 @@
 """Connect with DataBase 'birthday_bot'."""
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from time import monotonic
+from typing import Any, Dict, Optional
+from uuid import uuid4
 
-from config import URI_DB
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
 
-engine = create_async_engine(url=f"postgresql+asyncpg://{URI_DB}", pool_pre_ping=True)
+from config import (
+    DB_MAX_OVERFLOW,
+    DB_PGBOUNCER,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+    URI_DB,
+    URI_DB_DIRECT,
+)
+from src.service.run_metrics import count, timer
+
+
+class PoolMetrics:
+    """Checkouts of connections from pool since start: how long callers waited for a connection (opening of new
+    connections included), timeouts and the highest number of connections checked out at once"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak = 0
+
+    def checkout(self, wait: float, checked_out: int):
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.peak = max(self.peak, checked_out)
+
+    def reset_peak(self) -> int:
+        """Peak since the last reset (e.g. during one scheduler run)"""
+        peak, self.peak = self.peak, 0
+        return peak
+
+    def stats(self, pool: Pool) -> Dict[str, Any]:
+        """Live state of pool and counters"""
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "peak": self.peak,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_mean": round(self.wait_total / self.checkouts, 4) if self.checkouts else 0.0,
+            "wait_max": round(self.wait_max, 4),
+        }
+
+    def report(self, pool: Pool) -> str:
+        """Text for admin"""
+        stats = self.stats(pool=pool)
+        return (
+            f"DataBase pool: {stats['checked_out']}/{stats['size']} checked out, overflow {stats['overflow']}, "
+            f"peak {stats['peak']}, timeouts {stats['timeouts']}, "
+            f"wait mean {stats['wait_mean'] * 1000:.0f}ms, max {stats['wait_max'] * 1000:.0f}ms"
+        )
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """Pool of asyncio engine that measures every checkout: into pool_metrics and into the current scheduler run"""
+
+    def connect(self):
+        start = monotonic()
+        try:
+            with timer(stage="db_pool_wait"):
+                connection = super().connect()
+        except PoolTimeoutError:
+            pool_metrics.timeouts += 1
+            count(name="db_pool_timeouts")
+            raise
+        pool_metrics.checkout(wait=monotonic() - start, checked_out=self.checkedout())
+        return connection
+
+
+def engine_options(
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: int = DB_POOL_TIMEOUT,
+    pool_recycle: int = DB_POOL_RECYCLE,
+    pre_ping: int = DB_POOL_PRE_PING,
+    statement_cache_size: int = DB_STATEMENT_CACHE_SIZE,
+    pgbouncer: int = DB_PGBOUNCER,
+) -> Dict[str, Any]:
+    """Keyword arguments of create_async_engine from config.
+    pgbouncer in transaction mode gives every transaction any server connection, so prepared statements can't be
+    cached and their names must be unique"""
+    if pgbouncer:
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    else:
+        connect_args = {
+            "statement_cache_size": statement_cache_size,
+            "prepared_statement_cache_size": statement_cache_size,
+        }
+    return {
+        "poolclass": MeteredPool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": bool(pre_ping),
+        "connect_args": connect_args,
+    }
+
+
+engine = create_async_engine(url=f"postgresql+asyncpg://{URI_DB}", **engine_options())
 
 DBSession = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+lock_engine: Optional[AsyncEngine] = None
+
+
+def get_lock_engine(pgbouncer: int = DB_PGBOUNCER, direct_uri: Optional[str] = URI_DB_DIRECT) -> AsyncEngine:
+    """Engine for session advisory locks: the lock belongs to one server connection for the whole session.
+    pgbouncer in transaction mode gives every statement any server connection, so two replicas could both hold
+    the lock or leave it on a connection of another client: with DB_PGBOUNCER=1 locks go to Postgres directly
+    by URI_DB_DIRECT, without it they are refused (RuntimeError)"""
+    global lock_engine
+    if not pgbouncer:
+        return engine
+    if not direct_uri:
+        raise RuntimeError(
+            "DB_PGBOUNCER=1: advisory lock needs direct connection to Postgres, set UBUNTU_URI_DB_DIRECT"
+        )
+    if lock_engine is None:
+        lock_engine = create_async_engine(
+            url=f"postgresql+asyncpg://{direct_uri}", pool_size=1, max_overflow=1, pool_pre_ping=True
+        )
+    return lock_engine
+
+
+def pool_report() -> str:
+    """Live state of engine pool for admin"""
+    return pool_metrics.report(pool=engine.pool)
@@ -0,0 +1,125 @@
+"""EXPLAIN check of hot lookups: every query must be served by its index (alembic/versions/0003_hot_lookup_indexes.py).
+Run against DataBase: python -m src.sql.explain_db"""
+
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from sqlalchemy import and_, func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+
+from src.service.loggers.py_logger_sql import get_logger
+from src.sql.connect import DBSession
+from src.sql.models import AdminPanel, Chat, Holiday, Report, RunLedger, SchedulerRun, User, UserChat
+from src.sql.tool_db import retry_on_db_error
+
+logger = get_logger(__name__)
+
+
+def hot_queries() -> List[Tuple[str, Select, Tuple[str, ...]]]:
+    """(function, its query with sample values, indexes that may serve it). Filters are the same as in func_*_db.py"""
+    return [
+        ("get_user_by_phone", select(User).filter_by(phone_number="+380000000000"), ("ix_users_phone_number",)),
+        (
+            "get_user_chat",
+            select(UserChat).filter(UserChat.chat_id == 1, UserChat.user_telegram_id == 1),
+            ("uq_user_chat_chat_user",),
+        ),
+        ("get_all_users_from_chat", select(UserChat).filter_by(chat_id=1), ("uq_user_chat_chat_user",)),
+        (
+            "get_intersecting_users",
+            select(UserChat.chat_id).filter(UserChat.user_telegram_id == 1),
+            ("ix_user_chat_user_telegram_id",),
+        ),
+        ("get_chats", select(Chat).filter_by(user_id=1), ("ix_chats_user_id",)),
+        (
+            "get_holiday",
+            select(Holiday).where(and_(Holiday.user_id == 1, Holiday.chat_id == 1)),
+            ("ix_holidays_user_id_chat_id",),
+        ),
+        ("Chat.holidays", select(Holiday).filter_by(chat_id=1), ("ix_holidays_chat_id",)),
+        (
+            "get_report",
+            select(Report).where(and_(Report.user_id == 1, Report.chat_id == 1, Report.holiday_id == 1)),
+            ("uq_report_user_chat_holiday",),
+        ),
+        ("get_user_reports", select(Report).where(Report.user_id == 1), ("uq_report_user_chat_holiday",)),
+        ("Holiday.report", select(Report).filter_by(holiday_id=1), ("ix_report_holiday_id_chat_id",)),
+        (
+            "provision_reports",
+            select(Report.user_id).filter(
+                Report.holiday_id == 1, Report.chat_id == 1, Report.user_id.in_([1, 2]), Report.status.is_(False)
+            ),
+            ("ix_report_holiday_id_chat_id", "uq_report_user_chat_holiday"),  # user_id.in_() fits unique key too
+        ),
+        (
+            "get_last_runs",
+            select(RunLedger.job, func.max(RunLedger.run_date))
+            .where(RunLedger.job.in_(["check_birthday"]), RunLedger.kind == "run", RunLedger.status == "done")
+            .group_by(RunLedger.job),
+            ("ix_run_ledger_job_kind_run_date",),
+        ),
+        (
+            "get_scheduler_runs",
+            select(SchedulerRun).order_by(SchedulerRun.started_at.desc()).limit(5),
+            ("ix_scheduler_run_started_at",),
+        ),
+        ("panel_is_pending", select(AdminPanel.id).filter_by(dedup_key="panel:1"), ("ix_admin_panel_dedup_key",)),
+    ]
+
+
+def plan_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """All nodes of EXPLAIN (FORMAT JSON) plan"""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(plan=child)
+
+
+def plan_indexes(plan: Dict[str, Any]) -> Set[str]:
+    """Indexes used by plan (Index Scan, Index Only Scan, Bitmap Index Scan)"""
+    return {node["Index Name"] for node in plan_nodes(plan=plan) if "Index Name" in node}
+
+
+@retry_on_db_error(deadline=None)
+async def explain_hot_queries() -> List[Dict[str, Any]]:
+    """EXPLAIN every hot query -> [{query, index, used, indexes}].
+    Sequential scans are off inside the transaction: on small tables planner reads the whole table anyway,
+    the check is whether the index can serve the query at all"""
+    rows = list()
+    async with DBSession() as session:
+        async with session.begin():
+            await session.execute(text("SET LOCAL enable_seqscan = off"))
+            for name, query, expected in hot_queries():
+                sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+                result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+                plan = result.scalar_one()[0]["Plan"]
+                indexes = plan_indexes(plan=plan)
+                used = bool(indexes.intersection(expected))
+                rows.append({"query": name, "index": " | ".join(expected), "used": used, "indexes": sorted(indexes)})
+    return rows
+
+
+def explain_report(rows: List[Dict[str, Any]]) -> str:
+    """Text report, queries without their index first"""
+    lines = list()
+    for row in sorted(rows, key=lambda row: row["used"]):
+        status = "✅" if row["used"] else "⛔"
+        lines.append(f"{status} {row['query']}: {row['index']} (plan: {', '.join(row['indexes']) or 'no index'})")
+    return "\n".join(lines)
+
+
+async def _demo() -> None:
+    """Check hot queries on DataBase from config"""
+    rows = await explain_hot_queries()
+    if not rows:
+        print(f"EXPLAIN failed: {rows}")
+        return
+    print(explain_report(rows=rows))
+    print(f"{sum(row['used'] for row in rows)} of {len(rows)} hot queries use their index")
+
+
+if __name__ == "__main__":
+    """Run demo function"""
+    import asyncio
+
+    asyncio.run(_demo())
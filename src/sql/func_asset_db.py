@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+
+from src.service.clock import clock
+from src.service.loggers.py_logger_fast_api import get_logger
+from src.sql.connect import DBSession
+from src.sql.models import ImageAsset, PreparedContent
+from src.sql.tool_db import retry_on_db_error
+
+logger = get_logger(__name__)
+
+
+@retry_on_db_error()
+async def get_image_asset(key: str) -> Optional[ImageAsset]:
+    """Get ImageAsset by str: key"""
+    logger.debug(f"get_image_asset(key={key})")
+    async with DBSession() as session:
+        result = await session.execute(select(ImageAsset).filter_by(key=key))
+        return result.scalar_one_or_none()
+
+
+@retry_on_db_error()
+async def save_image_asset(key: str, url: str, file_path: str) -> bool:
+    """Save new ImageAsset, an asset with the same key saved by another worker is kept. True - row is new"""
+    logger.debug(f"save_image_asset(key={key})")
+    async with DBSession() as session:
+        async with session.begin():
+            stmt = (
+                insert(ImageAsset)
+                .values(key=key, url=url, file_path=file_path)
+                .on_conflict_do_nothing(index_elements=[ImageAsset.key])
+                .returning(ImageAsset.id)
+            )
+            result = await session.execute(stmt)
+            return result.scalar() is not None
+
+
+@retry_on_db_error()
+async def set_image_file_id(key: str, file_id: str) -> int:
+    """Remember Telegram file_id of uploaded image"""
+    async with DBSession() as session:
+        async with session.begin():
+            stmt = update(ImageAsset).where(ImageAsset.key == key, ImageAsset.file_id.is_(None)).values(file_id=file_id)
+            result = await session.execute(stmt)
+            return result.rowcount
+
+
+@retry_on_db_error()
+async def save_prepared_content(key: str, text: str, image_key: Optional[str], expires_at: datetime) -> bool:
+    """Save PreparedContent, content with the same key is replaced by the new one"""
+    logger.debug(f"save_prepared_content(key={key})")
+    async with DBSession() as session:
+        async with session.begin():
+            values = dict(text=text, image_key=image_key, expires_at=expires_at, created_at=clock.now())
+            stmt = (
+                insert(PreparedContent)
+                .values(key=key, **values)
+                .on_conflict_do_update(index_elements=[PreparedContent.key], set_=values)
+            )
+            await session.execute(stmt)
+            return True
+
+
+@retry_on_db_error()
+async def get_prepared_content(key: str) -> Optional[PreparedContent]:
+    """Get not expired PreparedContent by str: key"""
+    logger.debug(f"get_prepared_content(key={key})")
+    async with DBSession() as session:
+        stmt = select(PreparedContent).filter(PreparedContent.key == key, PreparedContent.expires_at > clock.now())
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+
+@retry_on_db_error()
+async def delete_expired_content() -> int:
+    """Delete expired PreparedContent, return number of deleted rows"""
+    async with DBSession() as session:
+        async with session.begin():
+            result = await session.execute(delete(PreparedContent).where(PreparedContent.expires_at <= clock.now()))
+            return result.rowcount
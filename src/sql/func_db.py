@@ -1,17 +1,22 @@
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Type, TypeVar, Union
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, TypeVar, Union
 
 from aiogram.types import Message
-from sqlalchemy import and_
+from sqlalchemy import and_, literal_column, or_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.future import select
 from sqlalchemy.inspection import inspect
 from sqlalchemy.orm import DeclarativeBase, joinedload, selectinload
 
+from config import BULK_CHUNK_SIZE
+from src.service.birthday_calendar import BirthdayCalendar, birthday_calendar
+from src.service.clock import clock
 from src.service.loggers.py_logger_fast_api import get_logger
-from src.service.service_tools import correct_time
+from src.service.user_cache import user_cache
 from src.sql.connect import DBSession
 from src.sql.models import Chat, Holiday, Report, User, UserChat, UserLogin
-from src.sql.tool_db import retry_on_db_error
+from src.sql.tool_db import BATCH_DEADLINE, DBError, db_failed, retry_on_db_error
 
 logger = get_logger(__name__)
 
@@ -41,10 +46,16 @@ async def get_doc_by_id(model: str, doc_id: int) -> Optional[ModelType]:
         return doc
 
 
-@retry_on_db_error()
 async def check_user(message: Message) -> Optional[User]:
+    """Get User (from user_cache) or create User and UserLogin in DataBase"""
+    user = await get_user_by_telegram_id(telegram_id=message.from_user.id)
+    return user if user else await create_new_user(message=message)
+
+
+@retry_on_db_error(deadline=BATCH_DEADLINE)
+async def create_new_user(message: Message) -> Optional[User]:
     """Create User and UserLogin in DataBase"""
-    logger.debug(f"check_user(telegram_id={message.from_user.id})")
+    logger.debug(f"create_new_user(telegram_id={message.from_user.id})")
     # Перевірка чи є користувач у базі даних
     async with DBSession() as session:
         async with session.begin():
@@ -62,14 +73,19 @@ async def check_user(message: Message) -> Optional[User]:
                 session.add(user)
                 user_login = UserLogin(user_telegram_id=user.telegram_id)
                 session.add(user_login)
-                logger.info(f"Kyiv_time: {correct_time()} add new_user in db: telegram_id={user.telegram_id}")
+                logger.info(f"Kyiv_time: {clock.now()} add new_user in db: telegram_id={user.telegram_id}")
             return user
 
 
-@retry_on_db_error()
 async def get_user_by_telegram_id(telegram_id: int) -> Optional[User]:
+    """Get User by telegram_id: from user_cache, DataBase is read only on a miss"""
+    return await user_cache.get(telegram_id=telegram_id, load=load_user_by_telegram_id)
+
+
+@retry_on_db_error()
+async def load_user_by_telegram_id(telegram_id: int) -> Optional[User]:
     """Get User from DataBase by telegram_id"""
-    logger.debug(f"get_user_by_telegram_id(telegram_id={telegram_id})")
+    logger.debug(f"load_user_by_telegram_id(telegram_id={telegram_id})")
     async with DBSession() as session:
         # Формуємо запит
         query = select(User).filter_by(telegram_id=telegram_id)
@@ -144,6 +160,7 @@ async def update_phone_number(telegram_id: int, phone_number: str) -> Optional[U
                 # Оновити дані користувача
                 user.phone_number = phone_number
                 await session.commit()
+                await user_cache.invalidate(telegram_id=telegram_id)
                 return user
             else:
                 logger.error(f"User with phone_number={phone_number} is empty in DataBase")
@@ -158,7 +175,12 @@ async def doc_update(doc: ModelType) -> ModelType:
         async with session.begin():
             await session.merge(doc)
             await session.commit()
-            return doc
+    """Тримаємо in-memory календар днів народження в актуальному стані"""
+    user = doc.__dict__.get("user") if isinstance(doc, UserLogin) else doc  # без lazy load у detached object
+    if isinstance(user, User):
+        birthday_calendar.update(user_id=user.id, birthday=user.birthday)
+        await user_cache.invalidate(telegram_id=user.telegram_id)
+    return doc
 
 
 @retry_on_db_error()
@@ -210,6 +232,25 @@ async def get_users(filter_by_birthday: bool = False) -> List[User]:
         return users if users else []
 
 
+@retry_on_db_error(deadline=BATCH_DEADLINE)
+async def get_users_birthdays() -> List[Tuple[int, date]]:
+    """Get pairs (User.id, User.birthday) for all users with birthday set"""
+    logger.debug("get_users_birthdays()")
+    async with DBSession() as session:
+        result = await session.execute(select(User.id, User.birthday).where(User.birthday.isnot(None)))
+        return [(user_id, birthday) for user_id, birthday in result.all()]
+
+
+async def get_birthday_calendar(max_age: Optional[timedelta] = None) -> BirthdayCalendar:
+    """Get in-memory BirthdayCalendar, (re)load it from DataBase if it is empty or older than max_age"""
+    if not birthday_calendar.loaded or (max_age and clock.now() - birthday_calendar.loaded_at > max_age):
+        users_birthdays = await get_users_birthdays()
+        if not db_failed(users_birthdays):
+            birthday_calendar.load(users_birthdays=users_birthdays)
+            logger.info(f"birthday_calendar loaded: {len(birthday_calendar)} users")
+    return birthday_calendar
+
+
 @retry_on_db_error()
 async def get_chats(user_id: int = None, status: bool = None, limit: int = None) -> List[Chat]:
     """Get array with object<SQLAlchemy>: 'Chat' by optional user_id and optional limit"""
@@ -231,6 +272,29 @@ async def get_chats(user_id: int = None, status: bool = None, limit: int = None)
         return chats if chats else []
 
 
+@retry_on_db_error()
+async def update_chat_title(chat_id: int, title: str) -> int:
+    """Update 'title' of Chat by Telegram chat_id, return number of updated rows"""
+    logger.debug(f"update_chat_title(chat_id={chat_id}, title={title})")
+    async with DBSession() as session:
+        async with session.begin():
+            stmt = update(Chat).where(Chat.chat_id == chat_id).values(title=title, title_updated_at=clock.now())
+            result = await session.execute(stmt)
+            return result.rowcount
+
+
+@retry_on_db_error()
+async def get_chats_with_stale_title(older_than: datetime) -> List[Chat]:
+    """Get active chats without title or with title updated before older_than"""
+    logger.debug(f"get_chats_with_stale_title(older_than={older_than})")
+    async with DBSession() as session:
+        stmt = select(Chat).filter(
+            Chat.status.is_(True), or_(Chat.title_updated_at.is_(None), Chat.title_updated_at < older_than)
+        )
+        result = await session.execute(stmt)
+        return result.scalars().all()
+
+
 @retry_on_db_error()
 async def get_user_chat(chat_id: int, user_telegram_id: int) -> Optional[UserChat]:
     """Get UserChat from DataBase by 'chat.id' and 'user.telegram_id'"""
@@ -291,6 +355,35 @@ async def get_report(user_pk: int, chat_pk: int, holiday_pk: int) -> Optional[Re
         return report
 
 
+@retry_on_db_error(deadline=BATCH_DEADLINE)
+async def provision_reports(holiday: Holiday, user_ids: List[int]) -> Set[int]:
+    """Create every missing Report of holiday for users from user_ids by one INSERT ... ON CONFLICT DO NOTHING
+    (unique user_id, chat_id, holiday_id) and return User.id of members still owing (Report.status=False)"""
+    logger.debug(f"provision_reports(holiday={holiday.id}, user_ids={len(user_ids)})")
+    if not user_ids:
+        return set()
+    async with DBSession() as session:
+        async with session.begin():
+            rows = [
+                {"user_id": user_id, "chat_id": holiday.chat_id, "holiday_id": holiday.id, "status": False}
+                for user_id in user_ids
+            ]
+            stmt = (
+                insert(Report)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[Report.user_id, Report.chat_id, Report.holiday_id])
+            )
+            await session.execute(stmt)
+            stmt = select(Report.user_id).filter(
+                Report.holiday_id == holiday.id,
+                Report.chat_id == holiday.chat_id,
+                Report.user_id.in_(user_ids),
+                Report.status.is_(False),
+            )
+            result = await session.execute(stmt)
+            return set(result.scalars().all())
+
+
 def convert_str_to_datetime_fields(data: dict) -> dict:
     """Перетворює строки, які можуть бути датами, на об'єкти datetime."""
     for key, value in data.items():
@@ -304,7 +397,7 @@ def convert_str_to_datetime_fields(data: dict) -> dict:
     return data
 
 
-@retry_on_db_error()
+@retry_on_db_error(idempotent=False)
 async def create_new_doc(model: str, data: dict, data_has_datatime: bool = False) -> Optional[int]:
     """Створюємо новий документ в базі даних, конвертуючи дати зі строк"""
     logger.debug(f"model_name: {model}, data: {data}, data_has_datatime: {data_has_datatime}")
@@ -323,6 +416,106 @@ async def create_new_doc(model: str, data: dict, data_has_datatime: bool = False
             return new_doc.id
 
 
+@dataclass
+class BulkResult:
+    """Result of create_many / upsert_many: counts of inserted, updated and skipped (conflict) rows,
+    rows - values of 'returning' columns of inserted and updated rows"""
+
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def chunks(rows: List[Dict[str, Any]], chunk_size: int) -> List[List[Dict[str, Any]]]:
+    """Split rows so that one INSERT has not more than chunk_size rows and 32767 parameters (Postgres limit)"""
+    columns = max((len(row) for row in rows), default=1) or 1
+    size = max(min(chunk_size, 32767 // columns), 1)
+    return [rows[n : n + size] for n in range(0, len(rows), size)]
+
+
+async def bulk_insert(
+    model: str,
+    rows: List[Dict[str, Any]],
+    conflict: Optional[List[str]],
+    update_columns: Optional[List[str]],
+    returning: Optional[List[str]],
+    chunk_size: int,
+) -> Union[BulkResult, DBError]:
+    """Multi-row INSERT ... ON CONFLICT by chunks in one transaction. No update_columns - DO NOTHING,
+    otherwise - DO UPDATE of update_columns. 'xmax = 0' in RETURNING tells inserted row from updated one.
+    Unknown model - DBError: callers check db_failed()"""
+    if model not in models:
+        logger.error(f"Invalid model name provided: {model}")
+        return DBError(func="bulk_insert", error=f"unknown model {model}")
+    table: Type[ModelType] = models[model]
+    bulk = BulkResult()
+    if not rows:
+        return bulk
+    async with DBSession() as session:
+        async with session.begin():
+            for chunk in chunks(rows=rows, chunk_size=chunk_size):
+                stmt = insert(table).values(chunk)
+                if not update_columns:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=conflict)
+                else:
+                    set_ = {column: stmt.excluded[column] for column in update_columns}
+                    stmt = stmt.on_conflict_do_update(index_elements=conflict, set_=set_)
+                columns = [getattr(table, column) for column in returning or []]
+                stmt = stmt.returning(literal_column("xmax = 0").label("is_inserted"), *columns)
+                result = await session.execute(stmt)
+                for row in result.mappings().all():
+                    if row["is_inserted"]:
+                        bulk.inserted += 1
+                    else:
+                        bulk.updated += 1
+                    if returning:
+                        bulk.rows.append({column: row[column] for column in returning})
+    bulk.skipped = len(rows) - bulk.inserted - bulk.updated
+    logger.info(f"bulk insert (table={model}): {len(rows)} rows, {bulk.inserted} inserted, {bulk.updated} updated")
+    return bulk
+
+
+@retry_on_db_error(deadline=None)
+async def create_many(
+    model: str,
+    rows: List[Dict[str, Any]],
+    conflict: Optional[List[str]] = None,
+    returning: Optional[List[str]] = None,
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> Union[BulkResult, DBError]:
+    """Create docs of table 'model' from list of dicts (the same keys in every dict) by multi-row INSERT.
+    Rows in conflict with existing docs (by unique columns: conflict, None - any unique constraint) are skipped"""
+    logger.debug(f"create_many(model={model}, rows={len(rows)})")
+    return await bulk_insert(
+        model=model, rows=rows, conflict=conflict, update_columns=None, returning=returning, chunk_size=chunk_size
+    )
+
+
+@retry_on_db_error(deadline=None)
+async def upsert_many(
+    model: str,
+    rows: List[Dict[str, Any]],
+    conflict: List[str],
+    update_columns: Optional[List[str]] = None,
+    returning: Optional[List[str]] = None,
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> Union[BulkResult, DBError]:
+    """Create or update docs of table 'model' by multi-row INSERT ... ON CONFLICT (conflict) DO UPDATE.
+    update_columns=None - all columns of rows except conflict columns"""
+    logger.debug(f"upsert_many(model={model}, rows={len(rows)}, conflict={conflict})")
+    if update_columns is None:
+        update_columns = [column for column in (rows[0] if rows else {}) if column not in conflict]
+    return await bulk_insert(
+        model=model,
+        rows=rows,
+        conflict=conflict,
+        update_columns=update_columns,
+        returning=returning,
+        chunk_size=chunk_size,
+    )
+
+
 async def object_as_dict(obj: object) -> Dict[str, Any]:
     """Перетворюємо object з DataBase на dict"""
     if not hasattr(obj, "__table__"):
@@ -0,0 +1,85 @@
+from typing import Optional
+from zlib import crc32
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.service.loggers.py_logger_sql import get_logger
+from src.sql.connect import get_lock_engine
+
+logger = get_logger(__name__)
+
+
+class AdvisoryLock:
+    """Postgres session advisory lock held on its own connection: it is released by unlock or by Postgres itself
+    as soon as the connection of the holder is lost (crash, network, restart).
+    The connection is in AUTOCOMMIT: it never stays "idle in transaction" while the lock is held, so
+    idle_in_transaction_session_timeout can't drop leadership and VACUUM is not blocked"""
+
+    def __init__(self, name: str):
+        """Behind pgbouncer the lock needs a direct connection, without it the lock (and scheduler) does not start"""
+        self.name = name
+        self.engine: AsyncEngine = get_lock_engine()
+        self.key = crc32(name.encode())  # pg_advisory_lock(bigint)
+        self.connection: Optional[AsyncConnection] = None
+
+    @property
+    def held(self) -> bool:
+        return self.connection is not None
+
+    async def try_acquire(self) -> bool:
+        """Take the lock without waiting, True - lock is held by this process"""
+        if self.held:
+            return await self.alive()
+        connection = None
+        try:
+            connection = await self.engine.connect()
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            result = await connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})
+            if result.scalar():
+                self.connection = connection
+                logger.info(f"advisory lock '{self.name}' ({self.key}) is acquired")
+                return True
+        except Exception as e:
+            logger.error(f"try_acquire('{self.name}') failed: {e}")
+        if connection is not None:
+            await self.close(connection=connection)
+        return False
+
+    async def alive(self) -> bool:
+        """Check the connection of the held lock (outside of transaction), the lock is lost together with the
+        connection"""
+        if not self.held:
+            return False
+        try:
+            await self.connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"advisory lock '{self.name}' is lost: {e}")
+            connection, self.connection = self.connection, None
+            await self.close(connection=connection, invalidate=True)
+            return False
+
+    async def release(self):
+        """Unlock and return connection to pool"""
+        if not self.held:
+            return
+        connection, self.connection = self.connection, None
+        invalidate = False
+        try:
+            await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            logger.info(f"advisory lock '{self.name}' is released")
+        except Exception as e:
+            logger.error(f"release('{self.name}') failed: {e}")
+            invalidate = True
+        await self.close(connection=connection, invalidate=invalidate)
+
+    @staticmethod
+    async def close(connection: AsyncConnection, invalidate: bool = False):
+        """Return connection to pool. invalidate=True - drop it: a pooled connection must never keep the lock"""
+        try:
+            if invalidate:
+                await connection.invalidate()
+            await connection.close()
+        except Exception as e:
+            logger.error(f"close connection of advisory lock failed: {e}")
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+
+from src.service.clock import clock
+from src.service.loggers.py_logger_fast_api import get_logger
+from src.sql.connect import DBSession
+from src.sql.models import Outbox
+from src.sql.tool_db import BATCH_DEADLINE, retry_on_db_error
+
+logger = get_logger(__name__)
+
+
+def outbox_message(
+    kind: str,
+    dedup_key: str,
+    chat_id: int,
+    text: str,
+    image_url: Optional[str] = None,
+    fallback_chat_id: Optional[int] = None,
+    reply_markup: Optional[Any] = None,
+    image_key: Optional[str] = None,
+    edit_message_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Create dict for one row of table 'outbox', reply_markup (InlineKeyboardMarkup) is stored as json,
+    image_key - image from ImageAsset cache, edit_message_id - message of chat_id to edit instead of sending"""
+    return {
+        "kind": kind,
+        "dedup_key": dedup_key,
+        "chat_id": chat_id,
+        "fallback_chat_id": fallback_chat_id,
+        "text": text,
+        "image_url": image_url,
+        "image_key": image_key,
+        "reply_markup": reply_markup.model_dump_json(exclude_none=True) if reply_markup else None,
+        "edit_message_id": edit_message_id,
+    }
+
+
+@retry_on_db_error(deadline=BATCH_DEADLINE)
+async def enqueue_messages(messages: List[Dict[str, Any]]) -> int:
+    """Bulk insert messages into 'outbox', messages with existing dedup_key are skipped. Return count of new rows.
+    Message is delivered not before its 'next_attempt_at' (now if it is not set)"""
+    logger.debug(f"enqueue_messages(messages={len(messages)})")
+    if not messages:
+        return 0
+    async with DBSession() as session:
+        async with session.begin():
+            stmt = (
+                insert(Outbox)
+                .values([{"next_attempt_at": clock.now(), **message} for message in messages])
+                .on_conflict_do_nothing(index_elements=[Outbox.dedup_key])
+                .returning(Outbox.id)
+            )
+            result = await session.execute(stmt)
+            count = len(result.all())
+    logger.info(f"enqueue_messages(): {count} new of {len(messages)}")
+    return count
+
+
+@retry_on_db_error()
+async def claim_messages(limit: int, lease: timedelta) -> List[Outbox]:
+    """Take due messages for delivery: 'FOR UPDATE SKIP LOCKED' lets several consumers work in parallel,
+    lease moves next_attempt_at forward so a message of crashed consumer becomes due again"""
+    time_now = clock.now()
+    async with DBSession() as session:
+        async with session.begin():
+            due = (
+                select(Outbox.id)
+                .where(Outbox.status == "new", Outbox.next_attempt_at <= time_now)
+                .order_by(Outbox.next_attempt_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            stmt = (
+                update(Outbox)
+                .where(Outbox.id.in_(due.scalar_subquery()))
+                .values(attempts=Outbox.attempts + 1, next_attempt_at=time_now + lease)
+                .returning(Outbox)
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.execute(stmt)
+            return list(result.scalars().all())
+
+
+@retry_on_db_error()
+async def mark_sent(message_ids: List[int]) -> int:
+    """Mark delivered messages"""
+    if not message_ids:
+        return 0
+    async with DBSession() as session:
+        async with session.begin():
+            stmt = (
+                update(Outbox)
+                .where(Outbox.id.in_(message_ids))
+                .values(status="sent", sent_at=clock.now(), last_error=None)
+            )
+            result = await session.execute(stmt)
+            return result.rowcount
+
+
+@retry_on_db_error()
+async def cancel_messages(dedup_keys: List[str]) -> int:
+    """Messages not delivered yet are not needed anymore (status='obsolete')"""
+    if not dedup_keys:
+        return 0
+    async with DBSession() as session:
+        async with session.begin():
+            stmt = (
+                update(Outbox).where(Outbox.dedup_key.in_(dedup_keys), Outbox.status == "new").values(status="obsolete")
+            )
+            result = await session.execute(stmt)
+            return result.rowcount
+
+
+@retry_on_db_error()
+async def mark_failed(message_id: int, error: str, next_attempt_at: Optional[datetime]) -> int:
+    """Schedule next attempt for message, next_attempt_at=None moves message to dead letters (status='dead')"""
+    values = {"last_error": error[:1000]}
+    if next_attempt_at:
+        values["next_attempt_at"] = next_attempt_at
+    else:
+        values["status"] = "dead"
+        logger.error(f"outbox message: {message_id} is dead: {error}")
+    async with DBSession() as session:
+        async with session.begin():
+            result = await session.execute(update(Outbox).where(Outbox.id == message_id).values(**values))
+            return result.rowcount
+
+
+@retry_on_db_error()
+async def get_dead_messages(limit: int = 100) -> List[Outbox]:
+    """Get dead letters for review"""
+    async with DBSession() as session:
+        query = select(Outbox).where(Outbox.status == "dead").order_by(Outbox.id.desc()).limit(limit)
+        result = await session.execute(query)
+        return list(result.scalars().all())
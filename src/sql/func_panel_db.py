@@ -0,0 +1,66 @@
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+
+from src.service.clock import clock
+from src.service.loggers.py_logger_fast_api import get_logger
+from src.sql.connect import DBSession
+from src.sql.models import AdminPanel
+from src.sql.tool_db import retry_on_db_error
+
+logger = get_logger(__name__)
+
+
+@retry_on_db_error()
+async def get_admin_panel(holiday_id: int) -> Optional[AdminPanel]:
+    """Get the last panel of Holiday sent to admin"""
+    logger.debug(f"get_admin_panel(holiday_id={holiday_id})")
+    async with DBSession() as session:
+        result = await session.execute(select(AdminPanel).filter_by(holiday_id=holiday_id))
+        return result.scalar_one_or_none()
+
+
+@retry_on_db_error()
+async def save_admin_panel(holiday_id: int, chat_id: int, **values) -> bool:
+    """Create or update panel of Holiday: message_id, content_hash (delivered), pending_hash and dedup_key (in outbox)"""
+    logger.debug(f"save_admin_panel(holiday_id={holiday_id}, {values})")
+    async with DBSession() as session:
+        async with session.begin():
+            values = dict(values, chat_id=chat_id, updated_at=clock.now())
+            stmt = (
+                insert(AdminPanel)
+                .values(holiday_id=holiday_id, **values)
+                .on_conflict_do_update(index_elements=[AdminPanel.holiday_id], set_=values)
+            )
+            await session.execute(stmt)
+            return True
+
+
+@retry_on_db_error()
+async def set_panel_message(dedup_key: str, message_id: int) -> int:
+    """Panel from outbox is delivered: remember its message_id, pending content becomes delivered"""
+    async with DBSession() as session:
+        async with session.begin():
+            stmt = (
+                update(AdminPanel)
+                .where(AdminPanel.dedup_key == dedup_key)
+                .values(
+                    message_id=message_id,
+                    content_hash=AdminPanel.pending_hash,
+                    pending_hash=None,
+                    dedup_key=None,
+                    updated_at=clock.now(),
+                )
+            )
+            result = await session.execute(stmt)
+            return result.rowcount
+
+
+@retry_on_db_error()
+async def panel_is_pending(dedup_key: str) -> bool:
+    """True - panel from outbox is still the latest content of its Holiday"""
+    async with DBSession() as session:
+        result = await session.execute(select(AdminPanel.id).filter_by(dedup_key=dedup_key))
+        return result.scalar_one_or_none() is not None
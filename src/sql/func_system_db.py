@@ -1,11 +1,16 @@
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
 
+from sqlalchemy import and_, delete, func, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.future import select
 
+from config import RUN_LEDGER_LEASE
+from src.service.clock import clock
 from src.service.loggers.py_logger_fast_api import get_logger
 from src.sql.connect import DBSession
-from src.sql.models import SystemData
-from src.sql.tool_db import retry_on_db_error
+from src.sql.models import RunLedger, SchedulerRun, SystemData
+from src.sql.tool_db import BATCH_DEADLINE, retry_on_db_error
 
 logger = get_logger(__name__)
 
@@ -37,6 +42,144 @@ async def get_system_data(title: str) -> Optional[SystemData]:
         return doc
 
 
+@retry_on_db_error()
+async def get_systems_data(titles: Iterable[str]) -> Dict[str, SystemData]:
+    """Get SystemData for several titles by one query -> {title: SystemData}"""
+    titles = list(titles)
+    logger.debug(f"get_systems_data(titles={titles})")
+    async with DBSession() as session:
+        query = select(SystemData).where(SystemData.title.in_(titles))
+        result = await session.execute(query)
+        return {doc.title: doc for doc in result.scalars().all()}
+
+
+@retry_on_db_error(deadline=BATCH_DEADLINE)
+async def claim_runs(
+    run_date: date,
+    job: str,
+    kind: str,
+    chat_id: int = 0,
+    recipient_ids: Iterable[int] = (0,),
+    lease: int = RUN_LEDGER_LEASE,
+) -> Set[int]:
+    """Claim work in RunLedger by one INSERT ... ON CONFLICT and return recipient_ids claimed now.
+    Work that is done or was claimed less than lease seconds ago is not returned."""
+    recipient_ids = list(recipient_ids)
+    logger.debug(f"claim_runs(run_date={run_date}, job={job}, kind={kind}, chat_id={chat_id}, {len(recipient_ids)})")
+    if not recipient_ids:
+        return set()
+    time_now = clock.now()
+    values = [
+        {
+            "run_date": run_date,
+            "job": job,
+            "chat_id": chat_id,
+            "recipient_id": recipient_id,
+            "kind": kind,
+            "status": "claimed",
+            "claimed_at": time_now,
+        }
+        for recipient_id in recipient_ids
+    ]
+    async with DBSession() as session:
+        async with session.begin():
+            stmt = (
+                insert(RunLedger)
+                .values(values)
+                .on_conflict_do_update(
+                    constraint="uq_run_ledger_key",
+                    set_={"claimed_at": time_now},
+                    where=and_(
+                        RunLedger.status == "claimed", RunLedger.claimed_at < time_now - timedelta(seconds=lease)
+                    ),
+                )
+                .returning(RunLedger.recipient_id)
+            )
+            result = await session.execute(stmt)
+            return set(result.scalars().all())
+
+
+@retry_on_db_error()
+async def finish_runs(
+    run_date: date, job: str, kind: str, chat_id: int = 0, recipient_ids: Iterable[int] = (0,), done: bool = True
+) -> int:
+    """done=True - mark claimed work as done, done=False - release claim so the work can be done again"""
+    recipient_ids = list(recipient_ids)
+    if not recipient_ids:
+        return 0
+    condition = and_(
+        RunLedger.run_date == run_date,
+        RunLedger.job == job,
+        RunLedger.kind == kind,
+        RunLedger.chat_id == chat_id,
+        RunLedger.recipient_id.in_(recipient_ids),
+        RunLedger.status == "claimed",
+    )
+    async with DBSession() as session:
+        async with session.begin():
+            if done:
+                stmt = update(RunLedger).where(condition).values(status="done", finished_at=clock.now())
+            else:
+                stmt = delete(RunLedger).where(condition)
+            result = await session.execute(stmt)
+            return result.rowcount
+
+
+@retry_on_db_error()
+async def get_last_runs(jobs: Iterable[str]) -> Dict[str, date]:
+    """Date of the last done run (kind='run') of every job -> {job: run_date}"""
+    jobs = list(jobs)
+    logger.debug(f"get_last_runs(jobs={jobs})")
+    async with DBSession() as session:
+        query = (
+            select(RunLedger.job, func.max(RunLedger.run_date))
+            .where(RunLedger.job.in_(jobs), RunLedger.kind == "run", RunLedger.status == "done")
+            .group_by(RunLedger.job)
+        )
+        result = await session.execute(query)
+        return {job: run_date for job, run_date in result.all()}
+
+
+@retry_on_db_error(idempotent=False)
+async def save_scheduler_run(
+    job: str,
+    run_date: date,
+    started_at: datetime,
+    duration: float,
+    ok: bool,
+    counters: Dict[str, int],
+    stages: Dict[str, Dict[str, float]],
+) -> int:
+    """Save metrics of scheduler run, return SchedulerRun.id"""
+    logger.debug(f"save_scheduler_run(job={job}, run_date={run_date})")
+    async with DBSession() as session:
+        async with session.begin():
+            run = SchedulerRun(
+                job=job,
+                run_date=run_date,
+                started_at=started_at,
+                duration=duration,
+                ok=ok,
+                counters=counters,
+                stages=stages,
+            )
+            session.add(run)
+            await session.flush()
+            return run.id
+
+
+@retry_on_db_error()
+async def get_scheduler_runs(limit: int = 5, job: Optional[str] = None) -> List[SchedulerRun]:
+    """Get the last scheduler runs, the newest first"""
+    logger.debug(f"get_scheduler_runs(limit={limit}, job={job})")
+    async with DBSession() as session:
+        query = select(SchedulerRun).order_by(SchedulerRun.started_at.desc()).limit(limit)
+        if job:
+            query = query.filter_by(job=job)
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+
 async def _demo():
     """Demo function to get SystemData."""
     doc = await get_system_data(title="check_report")
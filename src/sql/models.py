@@ -1,8 +1,24 @@
-from sqlalchemy import BigInteger, Boolean, CheckConstraint, Column, Date, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    CheckConstraint,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import declarative_base, relationship
 
 from config import amount as amount_data
-from src.service.service_tools import correct_time, generate_users_password
+from src.service.clock import clock
+from src.service.service_tools import generate_users_password
 
 Base = declarative_base()
 
@@ -29,7 +45,7 @@ class User(Base):
     last_name = Column(type_=String, nullable=True, default=None)
     username = Column(type_=String, nullable=True, default=None)
     language_code = Column(type_=String(3), nullable=True, default=None)
-    created_at = Column(type_=DateTime, nullable=False, default=correct_time)
+    created_at = Column(type_=DateTime, nullable=False, default=clock.now)
     phone_number = Column(type_=String(30), nullable=True, default=None)
     birthday = Column(type_=Date, nullable=True, default=None)
     status = Column(type_=Boolean, nullable=False, default=False)
@@ -40,6 +56,8 @@ class User(Base):
     holidays = relationship("Holiday", back_populates="user")
     report = relationship("Report", back_populates="user")
 
+    __table_args__ = (Index("ix_users_phone_number", "phone_number"),)
+
 
 class UserLogin(Base):
     __tablename__ = "user_login"
@@ -55,10 +73,16 @@ class UserChat(Base):
     chat_id = Column(Integer, ForeignKey("chats.id"), unique=False, nullable=False)
     user_telegram_id = Column(BigInteger, ForeignKey("users.telegram_id"), unique=False, nullable=False)
     status = Column(type_=Boolean, nullable=False, default=True)
-    updated_at = Column(type_=DateTime, nullable=False, default=correct_time)
+    updated_at = Column(type_=DateTime, nullable=False, default=clock.now)
     chat = relationship("Chat", back_populates="user_chat")
     user = relationship("User", back_populates="user_chat")
 
+    """Унікальний індекс (chat_id, user_telegram_id) - і для учасників чату, окремий - для чатів користувача"""
+    __table_args__ = (
+        UniqueConstraint("chat_id", "user_telegram_id", name="uq_user_chat_chat_user"),
+        Index("ix_user_chat_user_telegram_id", "user_telegram_id"),
+    )
+
 
 class Chat(Base):
     __tablename__ = "chats"
@@ -67,12 +91,19 @@ class Chat(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     card_number = Column(type_=String(length=16), nullable=False)
     status = Column(type_=Boolean, nullable=False, default=False)
-    created_at = Column(type_=DateTime, nullable=False, default=correct_time)
+    timezone = Column(type_=String(40), nullable=True, default=None)  # None - CHAT_TIMEZONE
+    send_from = Column(type_=String(5), nullable=True, default=None)  # 'HH:MM' local, None - CHAT_SEND_FROM
+    send_to = Column(type_=String(5), nullable=True, default=None)  # 'HH:MM' local, None - CHAT_SEND_TO
+    title = Column(type_=String, nullable=True, default=None)  # title of Telegram group, None - not known yet
+    title_updated_at = Column(type_=DateTime, nullable=True, default=None)
+    created_at = Column(type_=DateTime, nullable=False, default=clock.now)
     user = relationship("User", back_populates="chats")
     user_chat = relationship("UserChat", back_populates="chat")
     holidays = relationship("Holiday", back_populates="chat")
     report = relationship("Report", back_populates="chat")
 
+    __table_args__ = (Index("ix_chats_user_id", "user_id"),)
+
 
 class Holiday(Base):
     __tablename__ = "holidays"
@@ -83,14 +114,26 @@ class Holiday(Base):
     date_event = Column(type_=Date, nullable=False)
     amount = Column(type_=Integer, nullable=False, default=amount_data)  # 500 (int)
     status = Column(type_=Boolean, nullable=False, default=False)
-    created_at = Column(type_=DateTime, nullable=False, default=correct_time)
+    created_at = Column(type_=DateTime, nullable=False, default=clock.now)
     user = relationship("User", back_populates="holidays")
     chat = relationship("Chat", back_populates="holidays")
     report = relationship("Report", back_populates="holidays")
 
+    """Одна подія на день народження користувача в чаті - повторний INSERT планувальника її не дублює"""
+    __table_args__ = (
+        UniqueConstraint("user_id", "chat_id", "date_event", name="uq_holidays_user_chat_date"),
+        Index("ix_holidays_user_id_chat_id", "user_id", "chat_id"),
+        Index("ix_holidays_chat_id", "chat_id"),
+    )
+
 
 class Report(Base):
     __tablename__ = "report"
+    """Унікальний індекс (user_id, chat_id, holiday_id) - і для звітів користувача, окремий - для звітів події"""
+    __table_args__ = (
+        UniqueConstraint("user_id", "chat_id", "holiday_id", name="uq_report_user_chat_holiday"),
+        Index("ix_report_holiday_id_chat_id", "holiday_id", "chat_id"),
+    )
     id = Column(type_=Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False)
@@ -108,3 +151,103 @@ class SystemData(Base):
     data_digital = Column(type_=BigInteger, nullable=True, default=None)
     data_text = Column(type_=String, nullable=True, default=None)
     data_status = Column(type_=Boolean, nullable=True, default=None)
+
+
+class Outbox(Base):
+    """Persistent queue of messages produced by scheduler, delivered by OutboxWorker"""
+
+    __tablename__ = "outbox"
+    id = Column(type_=Integer, primary_key=True)
+    dedup_key = Column(type_=String, nullable=False, unique=True)
+    kind = Column(type_=String(30), nullable=False)  # greeting | asking_money | panel
+    chat_id = Column(type_=BigInteger, nullable=False)  # telegram chat_id
+    fallback_chat_id = Column(type_=BigInteger, nullable=True, default=None)
+    text = Column(type_=String, nullable=False)
+    image_url = Column(type_=String, nullable=True, default=None)
+    image_key = Column(type_=String, nullable=True, default=None)  # ImageAsset.key, it is used before image_url
+    reply_markup = Column(type_=String, nullable=True, default=None)  # InlineKeyboardMarkup as json
+    edit_message_id = Column(type_=BigInteger, nullable=True, default=None)  # edit this message instead of sending
+    status = Column(type_=String(10), nullable=False, default="new")  # new | sent | dead | obsolete
+    attempts = Column(type_=Integer, nullable=False, default=0)
+    next_attempt_at = Column(type_=DateTime, nullable=False, default=clock.now)
+    last_error = Column(type_=String, nullable=True, default=None)
+    created_at = Column(type_=DateTime, nullable=False, default=clock.now)
+    sent_at = Column(type_=DateTime, nullable=True, default=None)
+
+    __table_args__ = (Index("ix_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
+
+
+class RunLedger(Base):
+    """Record of scheduler work done for (date, job, chat, recipient, kind) - restarts and replicas do it only once"""
+
+    __tablename__ = "run_ledger"
+    id = Column(type_=Integer, primary_key=True)
+    run_date = Column(type_=Date, nullable=False)
+    job = Column(type_=String(30), nullable=False)  # check_birthday | ...
+    chat_id = Column(type_=Integer, nullable=False, default=0)  # chats.id, 0 - for whole job
+    recipient_id = Column(type_=BigInteger, nullable=False, default=0)  # telegram_id, 0 - for whole job
+    kind = Column(type_=String(30), nullable=False)  # run | greeting | panel | asking_money:{holiday.id}
+    status = Column(type_=String(10), nullable=False, default="claimed")  # claimed | done
+    claimed_at = Column(type_=DateTime, nullable=False, default=clock.now)
+    finished_at = Column(type_=DateTime, nullable=True, default=None)
+
+    __table_args__ = (
+        UniqueConstraint("run_date", "job", "chat_id", "recipient_id", "kind", name="uq_run_ledger_key"),
+        Index("ix_run_ledger_job_kind_run_date", "job", "kind", "run_date"),
+    )
+
+
+class ImageAsset(Base):
+    """AI image generated once per (holiday | birthday user, chat, prompt): compressed JPEG on disk
+    and Telegram file_id after the first upload"""
+
+    __tablename__ = "image_asset"
+    id = Column(type_=Integer, primary_key=True)
+    key = Column(type_=String, nullable=False, unique=True)
+    url = Column(type_=String, nullable=True, default=None)  # source url from AI
+    file_path = Column(type_=String, nullable=True, default=None)
+    file_id = Column(type_=String, nullable=True, default=None)  # Telegram file_id
+    created_at = Column(type_=DateTime, nullable=False, default=clock.now)
+
+
+class PreparedContent(Base):
+    """Content generated off-peak before the day of sending (e.g. tomorrow's greeting): text and image key.
+    Used only until expires_at, without it the message is generated live"""
+
+    __tablename__ = "prepared_content"
+    id = Column(type_=Integer, primary_key=True)
+    key = Column(type_=String, nullable=False, unique=True)  # e.g. 'greeting:2024-10-19:{Chat.id}:{User.id}'
+    text = Column(type_=String, nullable=False)
+    image_key = Column(type_=String, nullable=True, default=None)  # ImageAsset.key
+    expires_at = Column(type_=DateTime, nullable=False)
+    created_at = Column(type_=DateTime, nullable=False, default=clock.now)
+
+
+class SchedulerRun(Base):
+    """Metrics of one scheduler job run: counters and wall time per stage"""
+
+    __tablename__ = "scheduler_run"
+    id = Column(type_=Integer, primary_key=True)
+    job = Column(type_=String(50), nullable=False)
+    run_date = Column(type_=Date, nullable=False)
+    started_at = Column(type_=DateTime, nullable=False)
+    duration = Column(type_=Float, nullable=False)  # seconds
+    ok = Column(type_=Boolean, nullable=False)
+    counters = Column(type_=JSON, nullable=False, default=dict)  # {"chats": 3, "ai_text": 5, ...}
+    stages = Column(type_=JSON, nullable=False, default=dict)  # {stage: {"calls", "total", "max"}}
+
+    __table_args__ = (Index("ix_scheduler_run_started_at", "started_at"),)
+
+
+class AdminPanel(Base):
+    """The last panel of Holiday sent to admin: it is edited in place and resent only when its content changes"""
+
+    __tablename__ = "admin_panel"
+    id = Column(type_=Integer, primary_key=True)
+    holiday_id = Column(Integer, ForeignKey("holidays.id"), nullable=False, unique=True)
+    chat_id = Column(type_=BigInteger, nullable=False)  # telegram_id of admin
+    message_id = Column(type_=BigInteger, nullable=True, default=None)  # Telegram message of the panel
+    content_hash = Column(type_=String(40), nullable=True, default=None)  # hash of delivered panel
+    pending_hash = Column(type_=String(40), nullable=True, default=None)  # hash of panel waiting in outbox
+    dedup_key = Column(type_=String, nullable=True, default=None, index=True)  # Outbox.dedup_key of pending panel
+    updated_at = Column(type_=DateTime, nullable=False, default=clock.now)
@@ -1,35 +1,198 @@
 import asyncio
+from collections import defaultdict
 from functools import wraps
+from random import uniform
+from time import monotonic
+from typing import Any, Dict, Optional
 
-from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, SQLAlchemyError
 
 from src.service.loggers.py_logger_sql import get_logger
+from src.service.run_metrics import count
 
 logger = get_logger(__name__)
 
+"""Помилки з'єднання, після яких база вважається недоступною: їх повторюємо і рахуємо в circuit breaker.
+Дедлайн самого виклику (retry_on_db_error(deadline=...)) сюди не входить - він не означає, що база недоступна"""
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
 
-def retry_on_db_error(max_retries: int = 3, delay: float = 0.5):
-    """Декоратор для повтору асинхронних запитів до БД при помилках підключення."""
+"""Дедлайн пакетних запитів (багато рядків за раз), звичайним запитам вистачає дедлайну за замовчуванням"""
+BATCH_DEADLINE = 60.0
+
+
+class DBError:
+    """Result of DataBase function that failed: DataBase is down, circuit is open or query error.
+    It is falsy and empty like None and [] - 'if not result' keeps working, but 'not found' (None)
+    and 'DataBase failed' (db_failed(result)) are different"""
+
+    __slots__ = ("func", "error")
+
+    def __init__(self, func: str, error: str):
+        self.func = func
+        self.error = error
+
+    def __len__(self) -> int:
+        return 0
+
+    def __iter__(self):
+        return iter(())
+
+    def __repr__(self) -> str:
+        return f"DBError({self.func}: {self.error})"
+
+
+def db_failed(result: Any) -> bool:
+    """True - DataBase function failed (result of retry_on_db_error)"""
+    return isinstance(result, DBError)
+
+
+def is_transient(error: BaseException) -> bool:
+    """Connection errors and timeouts, not errors of query (IntegrityError, ProgrammingError ...)"""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class CircuitBreaker:
+    """Shared state of DataBase health: after int: failures transient errors in a row the circuit opens
+    and calls fail fast for int: reset seconds, then one trial call (half-open) closes or reopens it"""
+
+    def __init__(self, failures: int = 5, reset: float = 30):
+        self.failures = failures
+        self.reset = reset
+        self.errors = 0
+        self.opened_at: Optional[float] = None
+        self.trial_at: Optional[float] = None  # trial call of half-open state, it expires after reset seconds
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if monotonic() - self.opened_at < self.reset else "half-open"
+
+    def allow(self) -> bool:
+        """False - fail fast without DataBase. In half-open state only one trial call goes through"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and (self.trial_at is None or monotonic() - self.trial_at >= self.reset):
+            self.trial_at = monotonic()
+            return True
+        return False
+
+    def success(self):
+        if self.opened_at is not None:
+            logger.info("circuit breaker: DataBase is back, circuit closed")
+        self.errors, self.opened_at, self.trial_at = 0, None, None
+
+    def failure(self):
+        self.errors += 1
+        if self.trial_at is not None or self.errors >= self.failures:
+            logger.error(f"circuit breaker: {self.errors} DataBase errors in a row, circuit open for {self.reset}s")
+            self.opened_at, self.trial_at = monotonic(), None
+
+
+db_breaker = CircuitBreaker()
+
+"""Лічильники по функціях: calls, ok, failed, retries, timeouts, fast_failed, total_time, max_time"""
+db_stats: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+
+def record_time(stats: Dict[str, float], duration: float):
+    stats["total_time"] += duration
+    stats["max_time"] = max(stats["max_time"], duration)
+
+
+def backoff(attempt: int, delay: float, max_delay: float) -> float:
+    """Exponential backoff with full jitter: random in [0, min(max_delay, delay * 2^attempt)]"""
+    return uniform(0, min(max_delay, delay * 2**attempt))
+
+
+def retry_on_db_error(
+    max_retries: int = 3,
+    delay: float = 0.2,
+    max_delay: float = 2.0,
+    deadline: Optional[float] = 10.0,
+    idempotent: bool = True,
+    breaker: Optional[CircuitBreaker] = None,
+):
+    """Декоратор для повтору асинхронних запитів до БД при помилках підключення: експоненційна затримка з jitter,
+    дедлайн на виклик разом з повторами (deadline секунд, None - без дедлайну), спільний circuit breaker.
+    Вичерпаний дедлайн завершує виклик без повтору і не рахується в circuit breaker - довгий запит не означає,
+    що база недоступна. idempotent=False - запис, який після таймауту вже міг закомітитись: його не повторюємо.
+    Помилки запиту стан circuit breaker не змінюють. Якщо не вдалося - повертає DBError (а не None)"""
 
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
+            circuit = breaker or db_breaker
+            stats = db_stats[func.__name__]
+            stats["calls"] += 1
+            if not circuit.allow():
+                stats["fast_failed"] += 1
+                count(name="db_fast_failed")
+                return DBError(func=func.__name__, error="circuit open")
+            start = monotonic()
+            error: Optional[BaseException] = None
             for attempt in range(max_retries):
+                remaining = None if deadline is None else deadline - (monotonic() - start)
+                if remaining is not None and remaining <= 0:
+                    break
+                scope = asyncio.timeout(remaining)
                 try:
                     logger.debug(msg=f"Executing {func.__name__} (attempt {attempt + 1})")
-                    return await func(*args, **kwargs)  # Виконуємо асинхронну функцію
-                except OperationalError as e:
-                    logger.error(msg=f"Database connection error on attempt {attempt + 1}: {e}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(delay)  # Асинхронна затримка перед повтором
-                except SQLAlchemyError as e:
-                    logger.error(msg=f"SQLAlchemy error in {func.__name__}: {e}")
-                    break  # Інші помилки SQLAlchemy не повторюємо
+                    async with scope:
+                        result = await func(*args, **kwargs)
+                    circuit.success()
+                    stats["ok"] += 1
+                    record_time(stats=stats, duration=monotonic() - start)
+                    return result
                 except Exception as e:
-                    logger.error(msg=f"Unexpected error in {func.__name__}: {e}")
+                    error = e
+                if scope.expired():
+                    stats["timeouts"] += 1
+                    logger.error(msg=f"Deadline {deadline}s of {func.__name__} exceeded on attempt {attempt + 1}")
+                    break
+                if not is_transient(error=error):
+                    """Інші помилки (SQLAlchemy і не тільки) не повторюємо - база при цьому доступна"""
+                    kind = "SQLAlchemy" if isinstance(error, SQLAlchemyError) else "Unexpected"
+                    logger.error(msg=f"{kind} error in {func.__name__}: {error}")
                     break
-            return None  # Якщо всі спроби не вдалися
+                logger.error(msg=f"Database connection error in {func.__name__} on attempt {attempt + 1}: {error}")
+                circuit.failure()
+                if isinstance(error, asyncio.TimeoutError) and not idempotent:
+                    """Запис міг вже закомітитись - повтор створив би його вдруге"""
+                    break
+                if attempt == max_retries - 1 or not circuit.allow():
+                    break
+                stats["retries"] += 1
+                count(name="db_retries")
+                pause = backoff(attempt=attempt, delay=delay, max_delay=max_delay)
+                await asyncio.sleep(pause if remaining is None else min(pause, remaining))
+            stats["failed"] += 1
+            count(name="db_failed")
+            record_time(stats=stats, duration=monotonic() - start)
+            return DBError(func=func.__name__, error=str(error) if error else "deadline exceeded")
 
         return wrapper
 
     return decorator
+
+
+def db_report(limit: int = 10) -> str:
+    """Text for admin: DataBase functions with failures and retries first, then the slowest ones"""
+    if not db_stats:
+        return f"DataBase: circuit {db_breaker.state}, no calls yet"
+    rows = sorted(
+        db_stats.items(),
+        key=lambda item: (item[1]["failed"] + item[1]["fast_failed"], item[1]["retries"], item[1]["total_time"]),
+        reverse=True,
+    )[:limit]
+    lines = [f"DataBase: circuit {db_breaker.state}"]
+    for name, stats in rows:
+        mean = stats["total_time"] / stats["calls"] if stats["calls"] else 0.0
+        lines.append(
+            f"{name}: {stats['calls']:.0f} calls, {stats['failed']:.0f} failed, {stats['fast_failed']:.0f} fast, "
+            f"{stats['retries']:.0f} retries, mean {mean * 1000:.0f}ms, max {stats['max_time'] * 1000:.0f}ms"
+        )
+    return "\n".join(lines)
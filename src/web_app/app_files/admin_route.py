@@ -8,8 +8,8 @@ from fastapi_limiter.depends import RateLimiter
 
 from config import file_log_fast_api, file_log_tel_bot, sb_telegram_id
 from src.bot_app.create_bot import bot
+from src.service.clock import clock
 from src.service.loggers.py_logger_fast_api import get_logger
-from src.service.service_tools import correct_time
 from src.sql.models import AdminApp
 from src.web_app.app_files.app_access import get_current_admin
 from src.web_app.create_app import app, templates
@@ -26,7 +26,7 @@ logger = get_logger(__name__)
 )
 async def home(request: Request, admin: AdminApp = Depends(get_current_admin)):
     """Перевірка робота додатка"""
-    time_now = correct_time()
+    time_now = clock.now()
     headers = dict(request.headers)
     ip_address, page = headers.get("x-forwarded-for"), "home"
     logger.info(f"{time_now}: {admin.login} in page '{page}'\nip_address: {ip_address}")
@@ -48,7 +48,7 @@ async def home(request: Request, admin: AdminApp = Depends(get_current_admin)):
 )
 async def log(request: Request, admin: AdminApp = Depends(get_current_admin)):
     """Запит на файл з логами"""
-    time_now = correct_time()
+    time_now = clock.now()
     headers = dict(request.headers)
     ip_address, user_agent = headers.get("x-forwarded-for"), headers.get("user-agent")
     logger.info(f"{time_now}: {admin.login} enter in '/log'\nip_address: {ip_address}\nuser_agent: {user_agent}")
@@ -77,7 +77,7 @@ async def log(request: Request, admin: AdminApp = Depends(get_current_admin)):
     dependencies=[Depends(RateLimiter(times=60, seconds=60))],
 )
 async def docs(request: Request, admin: AdminApp = Depends(get_current_admin)):
-    time_now = correct_time()
+    time_now = clock.now()
     headers = dict(request.headers)
     ip_address, user_agent, page = headers.get("x-forwarded-for"), headers.get("user-agent"), "docs"
     logger.info(f"{time_now}: '{admin.login}' in page '{page}':\nip_address: {ip_address}\nuser_agent: {user_agent}")
@@ -91,7 +91,7 @@ async def docs(request: Request, admin: AdminApp = Depends(get_current_admin)):
     dependencies=[Depends(RateLimiter(times=60, seconds=60))],
 )
 async def redoc(request: Request, admin: AdminApp = Depends(get_current_admin)):
-    time_now = correct_time()
+    time_now = clock.now()
     headers = dict(request.headers)
     ip_address, user_agent, page = headers.get("x-forwarded-for"), headers.get("user-agent"), "redoc"
     logger.info(f"{time_now}: '{admin.login}' in page '{page}':\nip_address: {ip_address}\nuser_agent: {user_agent}")
@@ -105,7 +105,7 @@ async def redoc(request: Request, admin: AdminApp = Depends(get_current_admin)):
     dependencies=[Depends(RateLimiter(times=60, seconds=60))],
 )
 async def open_api_endpoint(request: Request, admin: AdminApp = Depends(get_current_admin)):
-    time_now = correct_time()
+    time_now = clock.now()
     headers = dict(request.headers)
     ip_address, user_agent, page = headers.get("x-forwarded-for"), headers.get("user-agent"), "open_api_endpoint"
     logger.info(f"{time_now}: '{admin.login}' in page '{page}':\nip_address: {ip_address}\nuser_agent: {user_agent}")
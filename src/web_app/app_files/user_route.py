@@ -6,8 +6,8 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi_limiter.depends import RateLimiter
 
 from src.bot_app.dir_menu.menu import Menu
+from src.service.clock import clock
 from src.service.loggers.py_logger_fast_api import get_logger
-from src.service.service_tools import correct_time
 from src.sql.func_db import doc_update, get_user_by_login
 from src.web_app.create_app import app, templates
 
@@ -50,7 +50,7 @@ async def login(request: Request, response: Response, telegram_id: int, password
     https://holiday-organizer-dp6b4.ondigitalocean.app/path/login/620527199/HEdE8Bx8geKWe1UPB5DIoSLkQiM2
     """
     ip_address, page = dict(request.headers).get("x-forwarded-for"), "login"
-    logger.info(f"time_now: {correct_time()}, /{page}/telegram_id={telegram_id}, ip_address={ip_address}")
+    logger.info(f"time_now: {clock.now()}, /{page}/telegram_id={telegram_id}, ip_address={ip_address}")
     # Перевірка користувача
     user = await get_user_by_login(telegram_id=telegram_id, password=password)
     if user:
@@ -80,7 +80,7 @@ async def set_birthday(request: Request):
     """
     ip_address, page = dict(request.headers).get("x-forwarded-for"), "birthday"
     telegram_id, password = request.cookies.get("telegram_id"), request.cookies.get("user_password")
-    logger.info(f"time_now: {correct_time()}, /{page} telegram_id={telegram_id}, ip_address={ip_address}")
+    logger.info(f"time_now: {clock.now()}, /{page} telegram_id={telegram_id}, ip_address={ip_address}")
     # Перевірка користувача в базі даних
     user_login = (
         await get_user_by_login(telegram_id=int(telegram_id), password=password) if telegram_id and password else None
@@ -129,7 +129,7 @@ async def get_birthday(request: Request, birthday: str = Form(...)):
     """
     ip_address, page = dict(request.headers).get("x-forwarded-for"), "get_birthday"
     telegram_id, password = request.cookies.get("telegram_id"), request.cookies.get("user_password")
-    logger.info(f"time_now: {correct_time()}, /{page} telegram_id={telegram_id}, ip_address={ip_address}")
+    logger.info(f"time_now: {clock.now()}, /{page} telegram_id={telegram_id}, ip_address={ip_address}")
     # Перевірка користувача в базі даних
     user_login = (
         await get_user_by_login(telegram_id=int(telegram_id), password=password) if telegram_id and password else None
@@ -0,0 +1,107 @@
+"""
+Тести для панелі адміна в send_panel.py
+"""
+
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+def make_panel(text: str = "panel") -> dict:
+    return {"chat_id": 5, "text": text, "reply_markup": None}
+
+
+class TestShowPanel:
+    """Тести для показу панелі адміну."""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_panel_is_not_sent(self):
+        """Панель з тим самим вмістом не надсилається і не редагується."""
+        from src.bot_app.dir_menu.send_panel import panel_hash, show_panel
+
+        panel = make_panel()
+        stored = MagicMock(chat_id=5, message_id=40, content_hash=panel_hash(panel=panel))
+        mock_bot = MagicMock()
+        with (
+            patch("src.bot_app.dir_menu.send_panel.bot", mock_bot),
+            patch("src.bot_app.dir_menu.send_panel.get_admin_panel", AsyncMock(return_value=stored)),
+            patch("src.bot_app.dir_menu.send_panel.save_admin_panel", AsyncMock()) as mock_save,
+        ):
+            assert await show_panel(holiday=MagicMock(id=7), panel=panel) is True
+
+        mock_bot.edit_message_text.assert_not_called()
+        mock_bot.send_message.assert_not_called()
+        mock_save.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_changed_panel_is_edited(self):
+        """Змінена панель редагується на місці, нова надсилається тільки без попередньої."""
+        from src.bot_app.dir_menu.send_panel import panel_hash, show_panel
+
+        stored = MagicMock(chat_id=5, message_id=40, content_hash=panel_hash(panel=make_panel()))
+        mock_bot = MagicMock()
+        mock_bot.edit_message_text = AsyncMock()
+        mock_bot.send_message = AsyncMock(return_value=MagicMock(message_id=41))
+        with (
+            patch("src.bot_app.dir_menu.send_panel.bot", mock_bot),
+            patch("src.bot_app.dir_menu.send_panel.get_admin_panel", AsyncMock(side_effect=[stored, None])),
+            patch("src.bot_app.dir_menu.send_panel.save_admin_panel", AsyncMock(return_value=True)) as mock_save,
+        ):
+            assert await show_panel(holiday=MagicMock(id=7), panel=make_panel(text="new")) is True
+            assert await show_panel(holiday=MagicMock(id=8), panel=make_panel(text="new")) is True
+
+        assert mock_bot.edit_message_text.call_args.kwargs["message_id"] == 40
+        mock_bot.send_message.assert_awaited_once()
+        assert [call.kwargs["message_id"] for call in mock_save.call_args_list] == [40, 41]
+        assert mock_save.call_args.kwargs["content_hash"] == panel_hash(panel=make_panel(text="new"))
+
+
+class TestPanelOutboxMessage:
+    """Тести для панелі від планувальника."""
+
+    @pytest.mark.asyncio
+    async def test_only_changed_panel_goes_to_outbox(self):
+        """Та сама панель пропускається, змінена - редагує останню панель адміна."""
+        from src.bot_app.dir_menu.send_panel import panel_hash, panel_outbox_message
+
+        stored = MagicMock(chat_id=5, message_id=40, content_hash=panel_hash(panel=make_panel()), dedup_key=None)
+        panels = [make_panel(), make_panel(text="new")]
+        with (
+            patch("src.bot_app.dir_menu.send_panel.get_panel_set_holidays", AsyncMock(side_effect=panels)),
+            patch("src.bot_app.dir_menu.send_panel.get_admin_panel", AsyncMock(return_value=stored)),
+            patch("src.dir_schedule.writes.ScheduleWrites.save_admin_panel", AsyncMock(return_value=True)) as mock_save,
+        ):
+            run_date = date(2024, 10, 19)
+            assert await panel_outbox_message(chat=MagicMock(), holiday=MagicMock(id=7), run_date=run_date) is None
+            message = await panel_outbox_message(chat=MagicMock(), holiday=MagicMock(id=7), run_date=run_date)
+
+        assert (message["kind"], message["edit_message_id"], message["text"]) == ("panel", 40, "new")
+        assert mock_save.call_args.kwargs["dedup_key"] == message["dedup_key"]
+        assert mock_save.call_args.kwargs["pending_hash"] == panel_hash(panel=make_panel(text="new"))
+
+    @pytest.mark.asyncio
+    async def test_content_back_to_delivered_cancels_pending_panel(self):
+        """A -> B -> A: панель B ще в outbox, вміст повернувся до доставленої A - панель B скасовується."""
+        from src.bot_app.dir_menu.send_panel import panel_hash, panel_outbox_message
+
+        stored = MagicMock(chat_id=5, message_id=40, content_hash=panel_hash(panel=make_panel()), dedup_key=None)
+
+        async def save_admin_panel(holiday_id, chat_id, **values):
+            stored.dedup_key = values["dedup_key"]
+            return True
+
+        panels = [make_panel(text="B"), make_panel()]
+        with (
+            patch("src.bot_app.dir_menu.send_panel.get_panel_set_holidays", AsyncMock(side_effect=panels)),
+            patch("src.bot_app.dir_menu.send_panel.get_admin_panel", AsyncMock(return_value=stored)),
+            patch("src.dir_schedule.writes.ScheduleWrites.save_admin_panel", AsyncMock(side_effect=save_admin_panel)),
+            patch("src.dir_schedule.writes.ScheduleWrites.cancel_messages", AsyncMock(return_value=1)) as mock_cancel,
+        ):
+            run_date = date(2024, 10, 19)
+            message = await panel_outbox_message(chat=MagicMock(), holiday=MagicMock(id=7), run_date=run_date)
+            assert stored.dedup_key == message["dedup_key"]
+            assert await panel_outbox_message(chat=MagicMock(), holiday=MagicMock(id=7), run_date=run_date) is None
+
+        mock_cancel.assert_awaited_once_with(dedup_keys=[message["dedup_key"]])
+        assert stored.dedup_key is None
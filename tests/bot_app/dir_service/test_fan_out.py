@@ -0,0 +1,129 @@
+"""
+Тести для модуля fan_out.py
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+
+class RetryAfterError(Exception):
+    """Схожий на TelegramRetryAfter виняток."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"retry after {retry_after}")
+        self.retry_after = retry_after
+
+
+def make_fan_out(**kwargs):
+    from src.bot_app.dir_service.fan_out import FanOut
+
+    params = {
+        "concurrency": 2,
+        "global_rate": 1000,
+        "chat_rate": 1000,
+        "group_rate": 1000,
+        "max_retries": 3,
+        "max_chat_limiters": 1000,
+    }
+    params.update(kwargs)
+    return FanOut(**params)
+
+
+class TestFanOut:
+    """Тести для виконавця розсилок."""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """Одночасно виконується не більше concurrency задач."""
+        fan_out = make_fan_out(concurrency=2)
+        running, max_running = 0, 0
+
+        async def job():
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return True
+
+        from src.bot_app.dir_service.fan_out import summary
+
+        results = await fan_out.run(jobs=[(n, job) for n in range(6)])
+
+        assert max_running == 2
+        assert [res.recipient for res in results] == list(range(6))
+        assert summary(results=results)["sent"] == 6
+
+    @pytest.mark.asyncio
+    async def test_results_and_errors(self):
+        """Помилки та недоставлені повідомлення повертаються в результатах."""
+        from src.bot_app.dir_service.fan_out import summary
+
+        fan_out = make_fan_out()
+
+        async def fail():
+            raise ValueError("boom")
+
+        results = await fan_out.run(
+            jobs=[(1, AsyncMock(return_value=True)), (2, fail), (3, AsyncMock(return_value=False))]
+        )
+
+        assert [res.ok for res in results] == [True, False, False]
+        assert results[1].error == "boom"
+        assert results[2].error == "not delivered"
+        assert summary(results=results)["failed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_send_honours_retry_after(self):
+        """send() чекає retry_after і повторює запит."""
+        fan_out = make_fan_out()
+        method = AsyncMock(side_effect=[RetryAfterError(retry_after=0.01), "message"])
+
+        assert await fan_out.send(chat_id=1, method=method) == "message"
+        assert method.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_send_does_not_retry_other_errors(self):
+        """Інші помилки не повторюються."""
+        fan_out = make_fan_out()
+        method = AsyncMock(side_effect=ValueError("bad request"))
+
+        with pytest.raises(ValueError):
+            await fan_out.send(chat_id=1, method=method)
+        assert method.await_count == 1
+
+    def test_group_chats_have_own_rate(self):
+        """Для груп (chat_id < 0) окремий, повільніший ліміт."""
+        fan_out = make_fan_out(chat_rate=1, group_rate=0.5)
+
+        assert fan_out.chat_limiter(chat_id=-100).interval == 2
+        assert fan_out.chat_limiter(chat_id=100).interval == 1
+
+    def test_idle_chat_limiters_are_evicted(self):
+        """Лімітери без майбутніх слотів видаляються, коли їх стає max_chat_limiters, зайнятий лімітер лишається."""
+        from time import monotonic
+
+        fan_out = make_fan_out(max_chat_limiters=3)
+        busy = fan_out.chat_limiter(chat_id=1)
+        busy.next_slot = monotonic() + 60
+        fan_out.chat_limiter(chat_id=2)
+        fan_out.chat_limiter(chat_id=3)
+        fan_out.chat_limiter(chat_id=4)
+
+        assert set(fan_out.chat_limiters) == {1, 4}
+        assert fan_out.chat_limiter(chat_id=1) is busy
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_spaces_slots(self):
+        """RateLimiter видає слоти не частіше за rate."""
+        from src.bot_app.dir_service.fan_out import RateLimiter
+
+        limiter = RateLimiter(rate=50)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(3):
+            await limiter.wait()
+
+        assert loop.time() - start >= 0.035
@@ -0,0 +1,152 @@
+"""
+Тести для модуля image_cache.py
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+class TestImageKey:
+    """Тести для ключа зображення."""
+
+    def test_key(self):
+        """Ключ залежить від події, чату і промпту."""
+        from src.bot_app.dir_service.image_cache import image_key
+
+        key = image_key(subject="holiday:7", chat_pk=1, prompt="prompt")
+
+        assert key.startswith("holiday:7:1:")
+        assert key == image_key(subject="holiday:7", chat_pk=1, prompt="prompt")
+        assert key != image_key(subject="holiday:7", chat_pk=2, prompt="prompt")
+        assert key != image_key(subject="holiday:7", chat_pk=1, prompt="other")
+
+
+class TestGetOrCreateImage:
+    """Тести для генерації зображення тільки для нового ключа."""
+
+    @pytest.mark.asyncio
+    async def test_cached_image_is_not_generated(self):
+        """Зображення з кешу - без AI і завантаження."""
+        from src.bot_app.dir_service.image_cache import get_or_create_image
+
+        with (
+            patch("src.bot_app.dir_service.image_cache.get_image_asset", AsyncMock(return_value=MagicMock())),
+            patch("src.bot_app.dir_service.image_cache.ResponseImageAI") as mock_ai,
+        ):
+            assert await get_or_create_image(key="k", prompt="p") == "k"
+
+        mock_ai.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_new_image(self):
+        """Нове зображення генерується, стискається і зберігається."""
+        from src.bot_app.dir_service.image_cache import get_or_create_image
+
+        mock_ai = MagicMock()
+        mock_ai.return_value.get_image_from_ai = AsyncMock(return_value={"image_url": "https://image"})
+        with (
+            patch("src.bot_app.dir_service.image_cache.get_image_asset", AsyncMock(return_value=None)),
+            patch("src.bot_app.dir_service.image_cache.ResponseImageAI", mock_ai),
+            patch("src.bot_app.dir_service.image_cache.os.makedirs"),
+            patch(
+                "src.bot_app.dir_service.image_cache.download_and_compress_image", AsyncMock(return_value="/tmp/k.jpg")
+            ),
+            patch("src.bot_app.dir_service.image_cache.save_image_asset", AsyncMock(return_value=True)) as mock_save,
+            patch("src.bot_app.dir_service.image_cache.upload_image", AsyncMock(return_value="file")) as mock_upload,
+        ):
+            assert await get_or_create_image(key="k", prompt="p") == "k"
+
+        mock_save.assert_awaited_once_with(key="k", url="https://image", file_path="/tmp/k.jpg")
+        mock_upload.assert_awaited_once_with(key="k", file_path="/tmp/k.jpg")
+
+    @pytest.mark.asyncio
+    async def test_upload_remembers_file_id(self):
+        """Нове зображення завантажується в Telegram один раз - інші репліки відправляють його за file_id."""
+        from src.bot_app.dir_service.image_cache import upload_image
+
+        message = MagicMock()
+        message.photo = [MagicMock(file_id="small"), MagicMock(file_id="big")]
+        with (
+            patch("src.bot_app.dir_service.image_cache.bot") as mock_bot,
+            patch("src.bot_app.dir_service.image_cache.FSInputFile"),
+            patch("src.bot_app.dir_service.image_cache.set_image_file_id", AsyncMock()) as mock_set,
+        ):
+            mock_bot.send_photo = AsyncMock(return_value=message)
+            assert await upload_image(key="k", file_path="/tmp/k.jpg", storage_chat=-100) == "big"
+
+        assert mock_bot.send_photo.await_args.kwargs["chat_id"] == -100
+        mock_set.assert_awaited_once_with(key="k", file_id="big")
+
+    @pytest.mark.asyncio
+    async def test_no_storage_chat(self):
+        """Без IMAGE_STORAGE_CHAT зображення не завантажується - репліка відправляє його з файлу."""
+        from src.bot_app.dir_service.image_cache import check_image_storage, upload_image
+
+        with (
+            patch("src.bot_app.dir_service.image_cache.bot") as mock_bot,
+            patch("src.bot_app.dir_service.image_cache.set_image_file_id", AsyncMock()) as mock_set,
+            patch("src.bot_app.dir_service.image_cache.logger") as mock_logger,
+        ):
+            mock_bot.send_photo = AsyncMock()
+            assert await upload_image(key="k", file_path="/tmp/k.jpg", storage_chat=0) is None
+            assert check_image_storage(storage_chat=0) is False
+            assert check_image_storage(storage_chat=-100) is True
+
+        mock_bot.send_photo.assert_not_awaited()
+        mock_set.assert_not_awaited()
+        mock_logger.warning.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_cached_image_without_file_id_is_uploaded(self):
+        """Зображення з кешу ще без file_id (завантаження не вдалося) - завантажується з диску цієї репліки."""
+        from src.bot_app.dir_service.image_cache import get_or_create_image
+
+        asset = MagicMock(file_id=None, file_path=__file__)
+        with (
+            patch("src.bot_app.dir_service.image_cache.get_image_asset", AsyncMock(return_value=asset)),
+            patch("src.bot_app.dir_service.image_cache.upload_image", AsyncMock(return_value="file")) as mock_upload,
+        ):
+            assert await get_or_create_image(key="k", prompt="p") == "k"
+
+        mock_upload.assert_awaited_once_with(key="k", file_path=__file__)
+
+    @pytest.mark.asyncio
+    async def test_no_image_from_ai(self):
+        """AI не дав зображення - None."""
+        from src.bot_app.dir_service.image_cache import get_or_create_image
+
+        mock_ai = MagicMock()
+        mock_ai.return_value.get_image_from_ai = AsyncMock(return_value={"error": "boom"})
+        with (
+            patch("src.bot_app.dir_service.image_cache.get_image_asset", AsyncMock(return_value=None)),
+            patch("src.bot_app.dir_service.image_cache.ResponseImageAI", mock_ai),
+        ):
+            assert await get_or_create_image(key="k", prompt="p") is None
+
+
+class TestSendCachedImage:
+    """Тести для відправки зображення з кешу."""
+
+    @pytest.mark.asyncio
+    async def test_file_id_is_remembered(self):
+        """Перше завантаження зберігає file_id, далі відправка йде за file_id."""
+        from src.bot_app.dir_service.image_cache import send_cached_image
+
+        asset = MagicMock(file_id=None, file_path=__file__)
+        message = MagicMock()
+        message.photo = [MagicMock(file_id="small"), MagicMock(file_id="big")]
+        with (
+            patch("src.bot_app.dir_service.image_cache.get_image_asset", AsyncMock(return_value=asset)),
+            patch("src.bot_app.dir_service.image_cache.bot") as mock_bot,
+            patch("src.bot_app.dir_service.image_cache.set_image_file_id", AsyncMock()) as mock_set,
+        ):
+            mock_bot.send_photo = AsyncMock(return_value=message)
+            assert await send_cached_image(chat_id=1, key="k", caption="text") is True
+            mock_set.assert_awaited_once_with(key="k", file_id="big")
+
+            asset.file_id = "big"
+            mock_set.reset_mock()
+            assert await send_cached_image(chat_id=2, key="k", caption="text") is True
+            assert mock_bot.send_photo.call_args.kwargs["photo"] == "big"
+            mock_set.assert_not_called()
@@ -231,6 +231,21 @@ def mock_db_session():
     return session
 
 
+@pytest.fixture
+def mock_async_session():
+    """Фабрика заглушки async сесії: 'async with DBSession()' і 'session.begin()', execute повертає results по черзі."""
+
+    def make_session(*results):
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        session.begin.return_value = session
+        session.execute = AsyncMock(side_effect=list(results))
+        return session
+
+    return make_session
+
+
 @pytest.fixture
 def mock_logger():
     """Заглушка для логгера."""
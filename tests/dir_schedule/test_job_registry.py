@@ -0,0 +1,161 @@
+"""
+Тести для модуля job_registry.py
+"""
+
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+class TestJob:
+    """Тести для щоденної задачі."""
+
+    def test_next_fire(self):
+        """Наступний запуск - сьогодні або завтра."""
+        from src.dir_schedule.job_registry import Job
+
+        job = Job(name="check_birthday", handler=AsyncMock(), default_at="08:00")
+
+        assert job.next_fire(after=datetime(2024, 10, 19, 7, 59)) == datetime(2024, 10, 19, 8, 0)
+        assert job.next_fire(after=datetime(2024, 10, 19, 8, 0)) == datetime(2024, 10, 20, 8, 0)
+        assert job.next_fire(after=datetime(2024, 12, 31, 9, 0)) == datetime(2025, 1, 1, 8, 0)
+
+    def test_apply_settings(self):
+        """Налаштування з SystemData, без документа - значення за замовчуванням."""
+        from src.dir_schedule.job_registry import Job
+
+        job = Job(name="check_birthday", handler=AsyncMock(), default_at="08:00", default_digital=10)
+
+        assert job.apply(doc=MagicMock(data_text="09:30", data_digital=5)) is True
+        assert (job.at, job.digital) == ("09:30", 5)
+        assert job.apply(doc=MagicMock(data_text="09:30", data_digital=5)) is False
+        assert job.apply(doc=None) is True
+        assert (job.at, job.digital) == ("08:00", 10)
+
+
+class TestJobRegistry:
+    """Тести для реєстру задач."""
+
+    @pytest.mark.asyncio
+    async def test_reload_only_changed(self):
+        """Перепланування тільки задач зі зміненими налаштуваннями."""
+        from src.dir_schedule.job_registry import JobRegistry
+
+        registry = JobRegistry(settings_refresh=600)
+        registry.register(name="a", handler=AsyncMock(), at="08:00")
+        registry.register(name="b", handler=AsyncMock(), at="15:00")
+        time_now = datetime(2024, 10, 19, 7, 0)
+        docs = {"b": MagicMock(data_text="16:00", data_digital=None)}
+        with patch("src.dir_schedule.job_registry.get_systems_data", AsyncMock(return_value=docs)):
+            assert await registry.reload_settings(time_now=time_now) == ["a", "b"]
+            assert await registry.reload_settings(time_now=time_now) == []
+
+        assert registry.next_runs() == {"a": datetime(2024, 10, 19, 8, 0), "b": datetime(2024, 10, 19, 16, 0)}
+        assert registry.delay(time_now=time_now) == 600
+
+    @pytest.mark.asyncio
+    async def test_tick_runs_due_job_once(self):
+        """Задача запускається в свій час і планується на наступну добу."""
+        from src.dir_schedule.job_registry import JobRegistry
+        from src.service.clock import clock
+
+        handler = AsyncMock()
+        registry = JobRegistry(settings_refresh=3600)
+        job = registry.register(name="a", handler=handler, at="08:00")
+        with (
+            patch("src.dir_schedule.job_registry.get_systems_data", AsyncMock(return_value={})),
+            patch("src.dir_schedule.job_registry.save_scheduler_run", AsyncMock(return_value=1)),
+            clock.frozen(at=datetime(2024, 10, 19, 7, 59, 30)),
+        ):
+            assert await registry.tick() == []
+            assert registry.delay(time_now=datetime(2024, 10, 19, 7, 59, 30)) == 30
+            with clock.frozen(at=datetime(2024, 10, 19, 8, 0, 1)):
+                assert await registry.tick() == ["a"]
+                assert await registry.tick() == []
+
+        handler.assert_awaited_once_with(job, datetime(2024, 10, 19, 8, 0))
+        assert job.next_run == datetime(2024, 10, 20, 8, 0)
+
+    @pytest.mark.asyncio
+    async def test_job_error_does_not_stop(self):
+        """Помилка задачі не зупиняє планувальник."""
+        from src.dir_schedule.job_registry import JobRegistry
+
+        registry = JobRegistry(settings_refresh=600)
+        job = registry.register(name="a", handler=AsyncMock(side_effect=ValueError("boom")))
+
+        with patch("src.dir_schedule.job_registry.save_scheduler_run", AsyncMock(return_value=1)) as mock_save:
+            assert await registry.run_job(job=job, fire=datetime(2024, 10, 19, 8, 0)) is False
+
+        assert job.last_run == datetime(2024, 10, 19, 8, 0)
+        assert mock_save.call_args.kwargs["ok"] is False
+
+
+class TestRunMetrics:
+    """Тести для метрик запуску задачі."""
+
+    @pytest.mark.asyncio
+    async def test_metrics_of_run_are_saved(self):
+        """Лічильники і час етапів з коду задачі зберігаються як один запуск."""
+        from src.dir_schedule.job_registry import JobRegistry
+        from src.service.run_metrics import count, timer
+
+        async def handler(job, fire):
+            count(name="chats", n=3)
+            with timer(stage="query"):
+                count(name="candidates")
+            return True
+
+        registry = JobRegistry(settings_refresh=600)
+        job = registry.register(name="a", handler=handler)
+        with patch("src.dir_schedule.job_registry.save_scheduler_run", AsyncMock(return_value=1)) as mock_save:
+            assert await registry.run_job(job=job, fire=datetime(2024, 10, 19, 8, 0)) is True
+
+        saved = mock_save.call_args.kwargs
+        assert (saved["job"], saved["run_date"], saved["ok"]) == ("a", date(2024, 10, 19), True)
+        assert saved["counters"] == {"chats": 3, "candidates": 1}
+        assert saved["stages"]["query"]["calls"] == 1
+
+
+class TestCatchUp:
+    """Тести для запуску пропущених вікон."""
+
+    def test_missed_windows(self):
+        """Пропущені вікна після останнього виконаного запуску, не старші за max_days."""
+        from src.dir_schedule.job_registry import Job
+
+        job = Job(name="a", handler=AsyncMock(), default_at="08:00")
+        time_now = datetime(2024, 10, 19, 9, 0)
+
+        assert job.missed(last_run_date=date(2024, 10, 17), time_now=time_now, max_days=3) == [
+            datetime(2024, 10, 18, 8, 0),
+            datetime(2024, 10, 19, 8, 0),
+        ]
+        assert job.missed(last_run_date=date(2024, 10, 1), time_now=time_now, max_days=2) == [
+            datetime(2024, 10, 18, 8, 0),
+            datetime(2024, 10, 19, 8, 0),
+        ]
+        assert job.missed(last_run_date=date(2024, 10, 19), time_now=time_now, max_days=3) == []
+        assert job.missed(last_run_date=None, time_now=time_now, max_days=3) == [datetime(2024, 10, 19, 8, 0)]
+        assert job.missed(last_run_date=None, time_now=datetime(2024, 10, 19, 7, 0), max_days=3) == []
+
+    @pytest.mark.asyncio
+    async def test_catch_up_in_order_by_batches(self):
+        """Вікна запускаються по черзі, між пачками пауза, повертається звіт."""
+        from src.dir_schedule.job_registry import JobRegistry
+
+        handler = AsyncMock(side_effect=[True, False, True])
+        registry = JobRegistry(settings_refresh=600, catch_up_days=3, catch_up_batch=2, catch_up_pause=60)
+        registry.register(name="a", handler=handler, at="08:00")
+        last_runs = {"a": date(2024, 10, 16)}
+        with (
+            patch("src.dir_schedule.job_registry.get_last_runs", AsyncMock(return_value=last_runs)),
+            patch("src.dir_schedule.job_registry.sleep", AsyncMock()) as mock_sleep,
+            patch("src.dir_schedule.job_registry.save_scheduler_run", AsyncMock(return_value=1)),
+        ):
+            report = await registry.catch_up(time_now=datetime(2024, 10, 19, 9, 0))
+
+        assert [(row["window"].day, row["ok"]) for row in report] == [(17, True), (18, False), (19, True)]
+        assert [call.args[1] for call in handler.call_args_list] == [row["window"] for row in report]
+        mock_sleep.assert_awaited_once_with(60)
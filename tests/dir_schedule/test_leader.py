@@ -0,0 +1,74 @@
+"""
+Тести для модуля leader.py
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+
+def make_leader(acquire, alive=True):
+    """Leader з підміненим advisory lock"""
+    from src.dir_schedule.leader import Leader
+
+    leader = Leader(lock_name="test", check_interval=0.01)
+    leader.lock = MagicMock()
+    leader.lock.name = "test"
+    leader.lock.try_acquire = AsyncMock(side_effect=acquire)
+    leader.lock.alive = AsyncMock(return_value=alive) if isinstance(alive, bool) else AsyncMock(side_effect=alive)
+    leader.lock.release = AsyncMock()
+    return leader
+
+
+class TestLeader:
+    """Тести для вибору лідера між репліками планувальника."""
+
+    @pytest.mark.asyncio
+    async def test_standby_until_lock_is_free(self):
+        """Репліка чекає, поки лок не звільниться, і тільки тоді запускає роботу."""
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(10)
+
+        leader = make_leader(acquire=[False, False, True])
+        runner = asyncio.create_task(leader.run(work=work))
+        await asyncio.wait_for(started.wait(), timeout=1)
+        runner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await runner
+
+        assert leader.lock.try_acquire.await_count == 3
+        leader.lock.release.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_work_is_cancelled_when_lock_is_lost(self):
+        """Втрата лока зупиняє роботу лідера і звільняє лок."""
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        leader = make_leader(acquire=[True], alive=[True, False])
+        await asyncio.wait_for(leader.lead(work=work), timeout=1)
+
+        assert cancelled.is_set()
+        leader.lock.release.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_work_releases_lock(self):
+        """Помилка роботи звільняє лок - лідером може стати інша репліка."""
+
+        async def work():
+            raise ValueError("boom")
+
+        leader = make_leader(acquire=[True])
+        await leader.lead(work=work)
+
+        leader.lock.release.assert_awaited_once()
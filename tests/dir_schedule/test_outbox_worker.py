@@ -0,0 +1,160 @@
+"""
+Тести для модуля outbox_worker.py
+"""
+
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+def make_worker(**kwargs):
+    from src.dir_schedule.outbox_worker import OutboxWorker
+
+    params = {"consumers": 1, "batch_size": 10, "poll_interval": 0, "max_attempts": 3, "retry_delay": 10, "lease": 60}
+    params.update(kwargs)
+    with patch("src.dir_schedule.outbox_worker.FanOut") as mock_fan_out:
+        mock_fan_out.return_value = make_fan_out()
+        return OutboxWorker(**params)
+
+
+def make_fan_out():
+    from src.bot_app.dir_service.fan_out import FanOut
+
+    return FanOut(concurrency=4, global_rate=1000, chat_rate=1000, group_rate=1000, max_chat_limiters=1000)
+
+
+class TestOutboxWorker:
+    """Тести для доставки повідомлень з outbox."""
+
+    def test_backoff_doubles(self):
+        """Затримка між спробами подвоюється."""
+        worker = make_worker()
+
+        assert worker.backoff(attempts=1) == timedelta(seconds=10)
+        assert worker.backoff(attempts=3) == timedelta(seconds=40)
+
+    @pytest.mark.asyncio
+    async def test_run_once_marks_sent_retry_and_dead(self):
+        """Доставлені - sent, невдалі - нова спроба, після max_attempts - dead."""
+        worker = make_worker()
+        messages = [MagicMock(id=1, attempts=1), MagicMock(id=2, attempts=1), MagicMock(id=3, attempts=3)]
+
+        async def deliver(message):
+            if message.id != 1:
+                raise RuntimeError("not delivered")
+            return True
+
+        with (
+            patch("src.dir_schedule.outbox_worker.claim_messages", AsyncMock(return_value=messages)),
+            patch("src.dir_schedule.outbox_worker.mark_sent", AsyncMock()) as mock_sent,
+            patch("src.dir_schedule.outbox_worker.mark_failed", AsyncMock()) as mock_failed,
+            patch.object(worker, "deliver", side_effect=deliver),
+        ):
+            stats = await worker.run_once()
+
+        assert stats["sent"] == 1 and stats["failed"] == 2
+        mock_sent.assert_awaited_once_with(message_ids=[1])
+        calls = {call.kwargs["message_id"]: call.kwargs["next_attempt_at"] for call in mock_failed.call_args_list}
+        assert calls[2] is not None
+        assert calls[3] is None
+
+    @pytest.mark.asyncio
+    async def test_failed_mark_sent_is_retried_and_counted(self):
+        """База не позначила доставлені - ще одна спроба, потім помилка рахується в outbox_mark_failed."""
+        from src.sql.tool_db import DBError
+
+        worker = make_worker()
+        messages = [MagicMock(id=1, attempts=1), MagicMock(id=2, attempts=1)]
+        failed = DBError(func="mark_sent", error="connection lost")
+        with (
+            patch("src.dir_schedule.outbox_worker.claim_messages", AsyncMock(return_value=messages)),
+            patch("src.dir_schedule.outbox_worker.mark_sent", AsyncMock(return_value=failed)) as mock_sent,
+            patch.object(worker, "deliver", AsyncMock(return_value=True)),
+        ):
+            await worker.run_once()
+
+        assert mock_sent.await_count == 2
+        assert worker.counters["outbox_mark_failed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_mark_sent_retry_succeeds(self):
+        """Друга спроба позначити доставлені вдалася - нічого не рахується."""
+        from src.sql.tool_db import DBError
+
+        worker = make_worker()
+        mark = AsyncMock(side_effect=[DBError(func="mark_sent", error="timeout"), 1])
+        with patch("src.dir_schedule.outbox_worker.mark_sent", mark):
+            assert await worker.mark_sent(message_ids=[1]) is True
+
+        assert worker.counters["outbox_mark_failed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_deliver_falls_back_to_second_chat(self):
+        """Якщо група недоступна, повідомлення йде на fallback_chat_id."""
+        worker = make_worker()
+        message = MagicMock(
+            id=1,
+            kind="greeting",
+            chat_id=-100,
+            fallback_chat_id=5,
+            image_url=None,
+            image_key=None,
+            edit_message_id=None,
+            reply_markup=None,
+            text="hi",
+        )
+        mock_bot = MagicMock()
+        mock_bot.send_message = AsyncMock(side_effect=[RuntimeError("chat not found"), MagicMock()])
+
+        with patch("src.dir_schedule.outbox_worker.bot", mock_bot):
+            assert await worker.deliver(message=message) is True
+
+        assert [call.kwargs["chat_id"] for call in mock_bot.send_message.call_args_list] == [-100, 5]
+
+    @pytest.mark.asyncio
+    async def test_panel_is_edited_in_place(self):
+        """Панель з edit_message_id редагується, якщо не вдалось - надсилається нова і запам'ятовується її id."""
+        worker = make_worker()
+        message = MagicMock(
+            id=1,
+            kind="panel",
+            dedup_key="panel:2024-10-19:7:abc",
+            chat_id=5,
+            fallback_chat_id=None,
+            image_url=None,
+            image_key=None,
+            edit_message_id=40,
+            reply_markup=None,
+            text="panel",
+        )
+        mock_bot = MagicMock()
+        mock_bot.edit_message_text = AsyncMock(side_effect=[MagicMock(), RuntimeError("message to edit not found")])
+        mock_bot.send_message = AsyncMock(return_value=MagicMock(message_id=41))
+
+        with (
+            patch("src.dir_schedule.outbox_worker.bot", mock_bot),
+            patch("src.dir_schedule.outbox_worker.panel_is_pending", AsyncMock(return_value=True)),
+            patch("src.dir_schedule.outbox_worker.set_panel_message", AsyncMock(return_value=1)) as mock_set,
+        ):
+            assert await worker.deliver(message=message) is True
+            assert await worker.deliver(message=message) is True
+
+        mock_bot.send_message.assert_awaited_once()
+        assert [call.kwargs["message_id"] for call in mock_set.call_args_list] == [40, 41]
+
+    @pytest.mark.asyncio
+    async def test_outdated_panel_is_not_sent(self):
+        """Панель, яку адмін вже змінив, не доставляється."""
+        worker = make_worker()
+        message = MagicMock(id=1, kind="panel", dedup_key="panel:2024-10-19:7:abc", edit_message_id=40)
+        mock_bot = MagicMock()
+
+        with (
+            patch("src.dir_schedule.outbox_worker.bot", mock_bot),
+            patch("src.dir_schedule.outbox_worker.panel_is_pending", AsyncMock(return_value=False)),
+        ):
+            assert await worker.deliver(message=message) is True
+
+        mock_bot.edit_message_text.assert_not_called()
+        mock_bot.send_message.assert_not_called()
@@ -0,0 +1,65 @@
+"""
+Тести для модуля shards.py
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+class TestShards:
+    """Тести для перевірки днів народження в кількох процесах."""
+
+    def test_merge_reports(self):
+        """Підсумки шардів додаються, тривалість - найповільніший шард."""
+        from src.dir_schedule.shards import merge_reports
+
+        reports = [
+            {"shard": 0, "tasks": 2, "sent": 5, "failed": 1, "max_duration": 0.5, "by_kind": {"chat": 2}},
+            {"shard": 1, "tasks": 3, "sent": 7, "failed": 0, "max_duration": 1.5, "by_kind": {"chat": 3}},
+        ]
+
+        merged = merge_reports(reports=reports)
+
+        assert (merged["tasks"], merged["sent"], merged["failed"]) == (5, 12, 1)
+        assert merged["max_duration"] == 1.5
+        assert merged["by_kind"] == {"chat": 5}
+        assert merged["shards"] == 2
+
+    @pytest.mark.asyncio
+    async def test_one_shard_in_process(self):
+        """shards=1 - перевірка в процесі планувальника без пулу процесів."""
+        from src.dir_schedule.shards import check_users_birthday_sharded
+
+        background_task = MagicMock(last_report={"tasks": 1})
+        background_task.check_users_birthday = AsyncMock()
+        with patch("src.dir_schedule.shards.ProcessPoolExecutor") as mock_pool:
+            report = await check_users_birthday_sharded(
+                days_to_birthday=10, run_date=date(2024, 10, 19), shards=1, background_task=background_task
+            )
+
+        mock_pool.assert_not_called()
+        background_task.check_users_birthday.assert_awaited_once_with(days_to_birthday=10, run_date=date(2024, 10, 19))
+        assert report == {"tasks": 1, "shards": 1, "scan_failed": False}
+
+    @pytest.mark.asyncio
+    async def test_every_shard_runs_once(self):
+        """Кожен шард запускається один раз, звіт зводиться, помилка шарда не губить інші."""
+        from src.dir_schedule.shards import check_users_birthday_sharded
+
+        def run_shard(index, count, days_to_birthday, run_date):
+            if index == 2:
+                raise RuntimeError("boom")
+            return {"shard": index, "tasks": index + 1, "sent": 10}
+
+        with (
+            patch("src.dir_schedule.shards.ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor()),
+            patch("src.dir_schedule.shards.run_shard", run_shard),
+        ):
+            report = await check_users_birthday_sharded(days_to_birthday=10, run_date=date(2024, 10, 19), shards=3)
+
+        assert (report["shards"], report["tasks"], report["sent"]) == (2, 3, 20)
+        assert report["failed_shards"] == [2]
+        assert report["scan_failed"] is True
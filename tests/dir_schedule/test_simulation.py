@@ -0,0 +1,68 @@
+"""
+Тести для модуля simulation.py
+"""
+
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+class TestSyntheticData:
+    """Тести для синтетичної популяції."""
+
+    def test_population(self):
+        """Користувачі розподілені по чатах, перший учасник чату - адмін."""
+        from src.dir_schedule.simulation import SyntheticData
+
+        data = SyntheticData(users=120, members_per_chat=50, seed=3)
+
+        assert len(data.users) == 120
+        assert sorted(len(members) for members in data.members.values()) == [20, 50, 50]
+        assert data.members[1][0].user.info == "admin"
+        assert len(data.calendar()) == 120
+
+
+class TestDryRun:
+    """Тести для симуляції щоденної перевірки."""
+
+    @pytest.mark.asyncio
+    async def test_plan_without_side_effects(self):
+        """План рахує привітання, прохання і панелі та нічого не пише в базу."""
+        from src.bot_app.dir_service.fan_out import FanOut
+        from src.dir_schedule.simulation import DryRun, SyntheticData
+
+        data = SyntheticData(users=400, members_per_chat=20, seed=7)
+        dry_run = DryRun(data=data, days_to_birthday=3, chats_concurrency=4, details=True)
+        fan_out = FanOut(concurrency=4, global_rate=1000, chat_rate=1000, group_rate=1000)
+        with (
+            patch("src.dir_schedule.some_task.FanOut", return_value=fan_out),
+            patch("src.dir_schedule.some_task.CHAT_TIMEZONE", "Europe/Kyiv"),
+            patch("src.dir_schedule.some_task.CHAT_SEND_FROM", "09:00"),
+            patch("src.dir_schedule.some_task.CHAT_SEND_TO", "21:00"),
+            patch("src.sql.func_db.create_new_doc", AsyncMock()) as mock_create,
+            patch("src.sql.func_outbox_db.enqueue_messages", AsyncMock()) as mock_enqueue,
+        ):
+            plan = await dry_run.run(start=date(2024, 10, 19), days=2)
+
+        day = plan["days"][0]
+        month_days = [user.birthday.strftime("%m-%d") for user in data.users.values()]
+        assert day["greetings"] == month_days.count("10-19")
+        assert day["panels"] == sum(month_days.count(month_day) for month_day in ("10-20", "10-21", "10-22"))
+        assert day["holidays_created"] == day["panels"]
+        assert plan["days"][1]["panels"] == month_days.count("10-23")
+        assert day["asks"] == len([m for m in day["messages"] if m["kind"] == "asking_money"])
+        assert {"calendar", "query", "chat"} <= set(day["stages"])
+        assert plan["totals"]["greetings"] == sum(d["greetings"] for d in plan["days"])
+        mock_create.assert_not_called()
+        mock_enqueue.assert_not_called()
+
+    def test_every_write_is_replaced(self):
+        """DryRun замінює всі записи ScheduleWrites - новий запис без заміни не пройде непоміченим."""
+        from src.dir_schedule.simulation import DryRun
+        from src.dir_schedule.writes import ScheduleWrites
+
+        writes = [name for name in vars(ScheduleWrites) if not name.startswith("_")]
+
+        assert writes
+        assert [name for name in writes if not callable(getattr(DryRun, name, None))] == []
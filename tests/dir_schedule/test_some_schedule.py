@@ -297,3 +297,96 @@ class TestSomeSchedule:
 
         except (ImportError, AttributeError, TypeError):
             assert True
+
+
+class TestCheckBirthday:
+    """Тести для щоденної перевірки днів народження."""
+
+    @pytest.mark.asyncio
+    async def test_unfinished_day_is_taken_over(self):
+        """Запис дня - лише позначка: незавершений запуск береться одразу (lease=0), виконаний день пропускається."""
+        from datetime import date
+
+        from src.dir_schedule.some_schedule import check_birthday
+
+        job = MagicMock(digital=3)
+        fire = datetime(2024, 10, 19, 8, 0)
+        with (
+            patch("src.dir_schedule.some_schedule.claim_runs", AsyncMock(side_effect=[{0}, set()])) as mock_claim,
+            patch("src.dir_schedule.some_schedule.finish_runs", AsyncMock(return_value=1)) as mock_finish,
+            patch(
+                "src.dir_schedule.some_schedule.check_users_birthday_sharded", AsyncMock(return_value={})
+            ) as mock_check,
+        ):
+            assert await check_birthday(job=job, fire=fire, background_task=MagicMock()) is True
+            assert await check_birthday(job=job, fire=fire, background_task=MagicMock()) is False
+
+        assert mock_claim.call_args.kwargs == {
+            "run_date": date(2024, 10, 19),
+            "job": "check_birthday",
+            "kind": "run",
+            "lease": 0,
+        }
+        mock_check.assert_awaited_once()
+        assert mock_finish.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_scan_keeps_window_open(self):
+        """Перевірка впала на базі - день не позначається виконаним, claim знімається для catch-up."""
+        from src.dir_schedule.some_schedule import check_birthday
+
+        with (
+            patch("src.dir_schedule.some_schedule.claim_runs", AsyncMock(return_value={0})),
+            patch("src.dir_schedule.some_schedule.finish_runs", AsyncMock(return_value=1)) as mock_finish,
+            patch(
+                "src.dir_schedule.some_schedule.check_users_birthday_sharded",
+                AsyncMock(return_value={"scan_failed": True}),
+            ),
+        ):
+            ok = await check_birthday(job=MagicMock(digital=3), fire=datetime(2024, 10, 19, 8, 0), background_task=None)
+
+        assert ok is False
+        assert mock_finish.call_args.kwargs["done"] is False
+
+
+class TestPrepareGreetingsWindow:
+    """Тести для вікна попередньої генерації привітань."""
+
+    @pytest.mark.asyncio
+    async def test_failed_prepare_releases_window(self):
+        """Генерація впала - вікно звільняється для catch-up, незавершений запуск береться одразу (lease=0)."""
+        from src.dir_schedule.some_schedule import prepare_greetings
+
+        background_task = MagicMock(prepare_greetings=AsyncMock(side_effect=RuntimeError("AI is down")))
+        with (
+            patch("src.dir_schedule.some_schedule.claim_runs", AsyncMock(return_value={0})) as mock_claim,
+            patch("src.dir_schedule.some_schedule.finish_runs", AsyncMock(return_value=1)) as mock_finish,
+        ):
+            with pytest.raises(RuntimeError):
+                await prepare_greetings(
+                    job=MagicMock(), fire=datetime(2024, 10, 19, 22, 0), background_task=background_task
+                )
+
+        assert mock_claim.call_args.kwargs["lease"] == 0
+        assert mock_finish.call_args.kwargs["done"] is False
+
+
+class TestRefreshChatTitlesWindow:
+    """Тести для вікна оновлення назв чатів."""
+
+    @pytest.mark.asyncio
+    async def test_done_window_is_recorded(self):
+        """Виконане вікно позначається в RunLedger, тому catch-up після рестарту його не повторює."""
+        from src.dir_schedule.some_schedule import refresh_chat_titles
+
+        background_task = MagicMock(refresh_chat_titles=AsyncMock(return_value=[]))
+        fire = datetime(2024, 10, 19, 3, 0)
+        with (
+            patch("src.dir_schedule.some_schedule.claim_runs", AsyncMock(side_effect=[{0}, set()])),
+            patch("src.dir_schedule.some_schedule.finish_runs", AsyncMock(return_value=1)) as mock_finish,
+        ):
+            assert await refresh_chat_titles(job=MagicMock(digital=24), fire=fire, background_task=background_task)
+            assert not await refresh_chat_titles(job=MagicMock(digital=24), fire=fire, background_task=background_task)
+
+        background_task.refresh_chat_titles.assert_awaited_once_with(max_age=24)
+        assert mock_finish.call_args.kwargs == {"run_date": fire.date(), "job": "refresh_chat_titles", "kind": "run"}
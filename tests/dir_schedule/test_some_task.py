@@ -312,3 +312,221 @@ class TestSomeTask:
 
         except (ImportError, AttributeError, TypeError):
             assert True
+
+
+class TestCheckUsersBirthday:
+    """Тести для BackgroundTask.check_users_birthday."""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_grouped_by_chat(self):
+        """Результат одного запиту обробляється пачками по чатах."""
+        from src.dir_schedule.some_task import BackgroundTask
+        from src.service.birthday_calendar import BirthdayCalendar
+        from src.service.clock import clock
+
+        calendar = BirthdayCalendar()
+        calendar.load(users_birthdays=[(1, date(1990, 10, 19)), (2, date(1985, 10, 22)), (3, date(1990, 10, 23))])
+        chat_1, chat_2 = MagicMock(id=1), MagicMock(id=2)
+        rows = [(MagicMock(), chat_1, None), (MagicMock(), chat_2, None), (MagicMock(), chat_1, None)]
+        background_task = BackgroundTask(chats_concurrency=2)
+        with (
+            clock.frozen(at=datetime(2024, 10, 19, 8, 0)),
+            patch("src.dir_schedule.some_task.get_birthday_calendar", AsyncMock(return_value=calendar)),
+            patch("src.dir_schedule.some_task.FanOut"),
+            patch("src.dir_schedule.some_task.get_upcoming_birthdays", AsyncMock(return_value=rows)) as mock_get,
+            patch.object(background_task, "check_chat_birthdays", AsyncMock(return_value=[])) as mock_chat,
+        ):
+            await background_task.check_users_birthday(days_to_birthday=3)
+
+        mock_get.assert_awaited_once_with(user_ids=[1, 2], shard=None)
+        assert mock_chat.call_args.kwargs["upcoming"] == {1: 0, 2: 3}
+        assert mock_chat.await_count == 2
+        sizes = sorted(len(call.kwargs["chat_rows"]) for call in mock_chat.call_args_list)
+        assert sizes == [1, 2]
+        assert (background_task.last_report["tasks"], background_task.last_report["failed"]) == (2, 0)
+
+    @pytest.mark.asyncio
+    async def test_scan_failure_is_returned(self):
+        """Календар не завантажився або запит впав - повертається DBError, а не порожній список."""
+        from src.dir_schedule.some_task import BackgroundTask
+        from src.service.birthday_calendar import BirthdayCalendar
+        from src.sql.tool_db import DBError, db_failed
+
+        loaded = BirthdayCalendar()
+        loaded.load(users_birthdays=[(1, date(1990, 10, 19))])
+        failed = DBError(func="get_upcoming_birthdays", error="down")
+        for calendar, rows in ((BirthdayCalendar(), []), (loaded, failed)):
+            with (
+                patch("src.dir_schedule.some_task.get_birthday_calendar", AsyncMock(return_value=calendar)),
+                patch("src.dir_schedule.some_task.get_upcoming_birthdays", AsyncMock(return_value=rows)),
+            ):
+                background_task = BackgroundTask(chats_concurrency=2)
+                results = await background_task.check_users_birthday(days_to_birthday=3, run_date=date(2024, 10, 19))
+
+            assert db_failed(results)
+
+
+class TestPrepareGreetings:
+    """Тести для підготовки привітань на завтра."""
+
+    @pytest.mark.asyncio
+    async def test_prepare_greetings_of_day(self):
+        """Готуються тільки привітання іменинників дня greet_date, прострочені видаляються."""
+        from src.bot_app.dir_service.fan_out import FanOut
+        from src.dir_schedule.some_task import BackgroundTask
+        from src.service.birthday_calendar import BirthdayCalendar
+
+        fan_out = FanOut(concurrency=4, global_rate=1000, chat_rate=1000, group_rate=1000)
+        calendar = BirthdayCalendar()
+        calendar.load([(1, date(1990, 10, 20)), (2, date(1990, 10, 21))])
+        user_chat = MagicMock(user=MagicMock(id=1, telegram_id=10))
+        rows = [(user_chat, MagicMock(id=3), None)]
+        with (
+            patch("src.dir_schedule.some_task.get_birthday_calendar", AsyncMock(return_value=calendar)),
+            patch("src.dir_schedule.some_task.get_upcoming_birthdays", AsyncMock(return_value=rows)) as mock_rows,
+            patch("src.dir_schedule.some_task.FanOut", return_value=fan_out),
+            patch("src.dir_schedule.some_task.GreetingsUser.prepare", AsyncMock(return_value=True)) as mock_prepare,
+            patch(
+                "src.dir_schedule.writes.ScheduleWrites.delete_expired_content", AsyncMock(return_value=2)
+            ) as mock_delete,
+        ):
+            results = await BackgroundTask(chats_concurrency=2).prepare_greetings(greet_date=date(2024, 10, 20))
+
+        mock_rows.assert_awaited_once_with(user_ids=[1])
+        assert mock_prepare.call_args.kwargs["greet_date"] == date(2024, 10, 20)
+        assert [res.ok for res in results] == [True]
+        mock_delete.assert_awaited_once()
+
+
+class TestRunLedger:
+    """Тести для роботи BackgroundTask з RunLedger."""
+
+    @pytest.mark.asyncio
+    async def test_finish_releases_failed(self):
+        """Успішні записи позначаються done, невдалі звільняються для наступної спроби."""
+        from src.bot_app.dir_service.fan_out import SendResult
+        from src.dir_schedule.some_task import BackgroundTask
+
+        background_task = BackgroundTask(chats_concurrency=1)
+        background_task.run_date = date(2024, 10, 19)
+        results = [
+            SendResult(recipient=10, ok=True, kind="greeting"),
+            SendResult(recipient=11, ok=False, kind="greeting"),
+            SendResult(recipient=12, ok=True, kind="panel"),
+        ]
+        with patch("src.dir_schedule.writes.ScheduleWrites.finish_runs", AsyncMock()) as mock_finish:
+            await background_task.finish(chat=MagicMock(id=5), results=results, enqueued=True)
+
+        calls = {(c.kwargs["kind"], c.kwargs["done"]): c.kwargs["recipient_ids"] for c in mock_finish.call_args_list}
+        assert calls == {("greeting", True): [10], ("greeting", False): [11], ("panel", True): [12]}
+
+    @pytest.mark.asyncio
+    async def test_finish_without_enqueue(self):
+        """Якщо outbox не записано - звільняється все."""
+        from src.bot_app.dir_service.fan_out import SendResult
+        from src.dir_schedule.some_task import BackgroundTask
+
+        background_task = BackgroundTask(chats_concurrency=1)
+        background_task.run_date = date(2024, 10, 19)
+        results = [SendResult(recipient=10, ok=True, kind="greeting")]
+        with patch("src.dir_schedule.writes.ScheduleWrites.finish_runs", AsyncMock()) as mock_finish:
+            await background_task.finish(chat=MagicMock(id=5), results=results, enqueued=False)
+
+        assert mock_finish.call_args.kwargs["done"] is False
+
+    @pytest.mark.asyncio
+    async def test_failed_send_time_releases_claims(self):
+        """Помилка часу відправки чату - повідомлення не в outbox, claims звільняються."""
+        from src.bot_app.dir_service.fan_out import SendResult
+        from src.dir_schedule.some_task import BackgroundTask
+
+        background_task = BackgroundTask(chats_concurrency=1)
+        background_task.run_date = date(2024, 10, 19)
+        background_task.fan_out = MagicMock()
+        greeting = SendResult(recipient=10, ok=True, result={"kind": "greeting"}, kind="greeting")
+        background_task.fan_out.run_job = AsyncMock(return_value=greeting)
+        chat_rows = [(MagicMock(user=MagicMock(id=1, telegram_id=10)), MagicMock(id=5), None)]
+        with (
+            patch.object(background_task, "create_holidays", AsyncMock(return_value={})),
+            patch.object(background_task, "claim", AsyncMock(return_value=True)),
+            patch.object(background_task, "send_time", MagicMock(side_effect=ValueError("bad window"))),
+            patch.object(background_task, "finish", AsyncMock()) as mock_finish,
+            patch("src.dir_schedule.writes.ScheduleWrites.enqueue_messages", AsyncMock()) as mock_enqueue,
+        ):
+            results = await background_task.check_chat_birthdays(chat_rows=chat_rows, upcoming={1: 0})
+
+        assert results == [greeting]
+        mock_enqueue.assert_not_awaited()
+        assert mock_finish.call_args.kwargs["enqueued"] is False
+
+    @pytest.mark.asyncio
+    async def test_failed_panel_is_retried_by_next_run(self):
+        """Помилка панелі після claim - claim звільняється, наступний запуск відправляє панель."""
+        from types import SimpleNamespace
+
+        from src.dir_schedule.some_task import BackgroundTask
+        from src.dir_schedule.writes import use_writes
+
+        ledger = dict()
+
+        async def claim_runs(run_date, job, kind, chat_id=0, recipient_ids=(0,), **kwargs):
+            claimed = {rid for rid in recipient_ids if (kind, chat_id, rid) not in ledger}
+            ledger.update({(kind, chat_id, rid): "claimed" for rid in claimed})
+            return claimed
+
+        async def finish_runs(run_date, job, kind, chat_id=0, recipient_ids=(0,), done=True):
+            for rid in recipient_ids:
+                if ledger.get((kind, chat_id, rid)) == "claimed":
+                    if done:
+                        ledger[(kind, chat_id, rid)] = "done"
+                    else:
+                        del ledger[(kind, chat_id, rid)]
+
+        writes = SimpleNamespace(
+            claim_runs=claim_runs,
+            finish_runs=finish_runs,
+            enqueue_messages=AsyncMock(side_effect=lambda messages: len(messages)),
+        )
+        chat_rows = [(MagicMock(user=MagicMock(id=1, telegram_id=10)), MagicMock(id=5), MagicMock(id=9, status=False))]
+        panel_message = AsyncMock(side_effect=[RuntimeError("panel failed"), {"kind": "panel"}])
+        with (
+            use_writes(writes),
+            patch("src.dir_schedule.some_task.panel_outbox_message", panel_message),
+            patch.object(BackgroundTask, "create_holidays", AsyncMock(return_value={})),
+            patch.object(BackgroundTask, "send_time", MagicMock(return_value=datetime(2024, 10, 19, 10))),
+        ):
+            for _ in range(2):
+                background_task = BackgroundTask(chats_concurrency=1)
+                background_task.run_date = date(2024, 10, 19)
+                await background_task.check_chat_birthdays(chat_rows=chat_rows, upcoming={1: 3})
+
+        assert panel_message.await_count == 2
+        assert writes.enqueue_messages.call_args.kwargs["messages"][0]["kind"] == "panel"
+        assert ledger == {("panel", 5, 10): "done"}
+
+
+class TestCreateHolidays:
+    """Тести для створення подій чату одним запитом."""
+
+    @pytest.mark.asyncio
+    async def test_missing_holidays_by_one_insert(self):
+        """Події створюються тільки для майбутніх днів народження без події, одним upsert_many по ключу події."""
+        from src.dir_schedule.some_task import BackgroundTask
+        from src.sql.func_db import BulkResult
+
+        chat = MagicMock(id=3)
+        rows = [
+            (MagicMock(user=MagicMock(id=1)), chat, None),
+            (MagicMock(user=MagicMock(id=2)), chat, None),
+            (MagicMock(user=MagicMock(id=4)), chat, MagicMock(id=9)),
+        ]
+        bulk = BulkResult(inserted=1, rows=[{"id": 20, "user_id": 2, "chat_id": 3, "status": True}])
+        with patch("src.dir_schedule.writes.ScheduleWrites.upsert_many", AsyncMock(return_value=bulk)) as mock_create:
+            created = await BackgroundTask(chats_concurrency=2).create_holidays(
+                chat_rows=rows, upcoming={1: 0, 2: 3, 4: 5}
+            )
+
+        assert [row["user_id"] for row in mock_create.call_args.kwargs["rows"]] == [2]
+        assert mock_create.call_args.kwargs["conflict"] == ["user_id", "chat_id", "date_event"]
+        assert mock_create.call_args.kwargs["update_columns"] == ["user_id"]
+        assert (created[2].id, created[2].chat_id, created[2].status) == (20, 3, True)
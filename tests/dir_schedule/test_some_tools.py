@@ -333,3 +333,281 @@ class TestSomeTools:
 
         except (ImportError, AttributeError, TypeError):
             assert True
+
+
+class TestAskingMoneyVariants:
+    """Тести для одного запиту до AI на подію."""
+
+    def test_parse_variants(self):
+        """Варіанти з JSON, в тому числі обгорнутого в markdown."""
+        from src.dir_schedule.some_tools import DataAI
+
+        content = '```json\n{"variants": ["Привіт, {name}!", "", 5, "Вітаю, {name}"]}\n```'
+
+        assert DataAI().parse_variants(content=content) == ["Привіт, {name}!", "Вітаю, {name}"]
+        assert DataAI().parse_variants(content="не JSON") == []
+        assert DataAI().parse_variants(content='{"variants": "текст"}') == []
+        assert DataAI().parse_variants(content=None) == []
+
+    def test_personalise(self):
+        """Учасник отримує свій варіант з іменем і карткою без запиту до AI."""
+        from src.dir_schedule.some_tools import AskingMoney
+
+        user = MagicMock(id=4, telegram_id=100, first_name="Оля")
+        variants = {"texts": ["A {name}", "B {name}"], "image_key": "holiday:7:1:abc"}
+
+        message = AskingMoney(variants=2).personalise(
+            variants=variants,
+            user=user,
+            title="Team",
+            amount=500,
+            birthday_user=MagicMock(first_name="Іван"),
+            days_to_birthday=3,
+            card_number="4111",
+            dedup_key="asking_money:1",
+        )
+
+        assert message["text"].startswith("A Оля")
+        assert "<code>4111</code>" in message["text"]
+        assert message["image_key"] == "holiday:7:1:abc"
+        assert message["chat_id"] == 100
+
+    def test_personalise_fills_member_and_holiday_fields(self):
+        """Всі поля учасника і події підставляються, варіант з невідомим полем замінюється власним текстом."""
+        from src.dir_schedule.some_tools import AskingMoney
+
+        user = MagicMock(
+            id=4, telegram_id=100, first_name="Оля", last_name="Коваль", username="olia", phone_number=None
+        )
+        birthday_user = MagicMock(first_name="Іван", last_name=None, username=None, phone_number=None, birthday=None)
+        params = dict(
+            user=user,
+            title="Team",
+            amount=500,
+            birthday_user=birthday_user,
+            days_to_birthday=3,
+            card_number="4111",
+            dedup_key="asking_money:1",
+        )
+        texts = [
+            "{name} {last_name} {username}: {title} {amount} {birthday_user_name} {days_to_birthday}",
+            "Привіт, {name}! {gift_list}",
+            "Привіт, {name}! {0} {",
+        ]
+
+        filled, unknown, broken = (
+            AskingMoney(variants=1).personalise(variants={"texts": [text], "image_key": None}, **params)["text"]
+            for text in texts
+        )
+
+        assert filled.startswith("Оля Коваль @olia: Team 500 Іван 3")
+        for text in (unknown, broken):
+            assert text.startswith("Привіт, Оля!\n\nКоманда Аврора") and "{" not in text
+            assert "<code>4111</code>" in text
+
+    @pytest.mark.asyncio
+    async def test_one_generation_per_holiday(self):
+        """Для всіх учасників події - один текстовий і один графічний запит до AI."""
+        from src.bot_app.dir_service.fan_out import FanOut
+        from src.dir_schedule.some_tools import AskingMoney
+
+        chat = MagicMock(id=1, chat_id=-100, card_number="4111")
+        holiday = MagicMock(id=7, chat_id=1, amount=500)
+        birthday_user = MagicMock(id=1, telegram_id=1, first_name="Іван", birthday=None)
+        users_chats = [
+            MagicMock(status=True, user_telegram_id=n, user=MagicMock(id=n, telegram_id=n, first_name=f"U{n}"))
+            for n in range(2, 12)
+        ]
+        text_ai = MagicMock()
+        text_ai.return_value.get_content = AsyncMock(return_value={"content": '{"variants": ["Hi {name}"]}'})
+        with (
+            patch("src.dir_schedule.some_tools.get_doc_by_id", AsyncMock(return_value=chat)),
+            patch(
+                "src.dir_schedule.writes.ScheduleWrites.provision_reports", AsyncMock(return_value=set(range(2, 12)))
+            ),
+            patch("src.dir_schedule.some_tools.bot") as mock_bot,
+            patch("src.dir_schedule.some_tools.ResponseTextAI", text_ai),
+            patch(
+                "src.dir_schedule.writes.ScheduleWrites.get_or_create_image", AsyncMock(return_value="k")
+            ) as mock_image,
+        ):
+            mock_bot.get_chat = AsyncMock(return_value=MagicMock(title="Team"))
+            results = await AskingMoney(variants=3).start_asking(
+                birthday_user=birthday_user,
+                users_chats=users_chats,
+                days_to_birthday=3,
+                holiday=holiday,
+                fan_out=FanOut(concurrency=4, global_rate=1000, chat_rate=1000, group_rate=1000),
+            )
+
+        assert len(results) == 10 and all(res.ok for res in results)
+        assert text_ai.return_value.get_content.await_count == 1
+        assert mock_image.await_count == 1
+        assert mock_image.call_args.kwargs["key"].startswith("holiday:7:1:")
+        assert results[0].result["text"].startswith("Hi U2")
+        assert {res.result["image_key"] for res in results} == {"k"}
+
+
+class TestStartAsking:
+    """Тести для прохання про внесок по списку боржників."""
+
+    @pytest.mark.asyncio
+    async def test_only_owing_members_are_asked(self):
+        """Reports створюються одним запитом, прохання отримують тільки ті, хто ще не зробив внесок."""
+        from src.bot_app.dir_service.fan_out import FanOut
+        from src.dir_schedule.some_tools import AskingMoney
+
+        chat = MagicMock(id=1, chat_id=-100, card_number="4111", title="Team")
+        holiday = MagicMock(id=7, chat_id=1, amount=500)
+        birthday_user = MagicMock(id=1, telegram_id=1, first_name="Іван", birthday=None)
+        users_chats = [
+            MagicMock(status=True, user_telegram_id=n * 10, user=MagicMock(id=n, telegram_id=n * 10, first_name="U"))
+            for n in range(2, 5)
+        ]
+        variants = {"texts": ["Hi {name}"], "image_key": None}
+        with (
+            patch("src.dir_schedule.some_tools.get_doc_by_id", AsyncMock(return_value=chat)),
+            patch(
+                "src.dir_schedule.writes.ScheduleWrites.provision_reports", AsyncMock(return_value={2, 4})
+            ) as mock_provision,
+            patch("src.dir_schedule.writes.ScheduleWrites.claim_runs", AsyncMock(return_value={20, 30, 40})),
+            patch("src.dir_schedule.writes.ScheduleWrites.finish_runs", AsyncMock(return_value=1)) as mock_finish,
+            patch.object(AskingMoney, "get_variants", AsyncMock(return_value=variants)),
+        ):
+            results = await AskingMoney(variants=3).start_asking(
+                birthday_user=birthday_user,
+                users_chats=users_chats,
+                days_to_birthday=3,
+                holiday=holiday,
+                fan_out=FanOut(concurrency=4, global_rate=1000, chat_rate=1000, group_rate=1000),
+                run_date=date(2024, 10, 19),
+                ledger_job="check_birthday",
+            )
+
+        mock_provision.assert_awaited_once_with(holiday=holiday, user_ids=[2, 3, 4])
+        assert [res.recipient for res in results] == [20, 40]
+        assert results[0].result["dedup_key"] == "asking_money:2024-10-19:7:2"
+        assert mock_finish.call_args.kwargs["recipient_ids"] == [30]
+
+    @pytest.mark.asyncio
+    async def test_failed_provision_releases_claims(self):
+        """Помилка бази - нікого не просимо, робота дня звільняється для наступної спроби."""
+        from src.dir_schedule.some_tools import AskingMoney
+        from src.sql.tool_db import DBError
+
+        chat = MagicMock(id=1, chat_id=-100)
+        holiday = MagicMock(id=7, chat_id=1)
+        users_chats = [MagicMock(status=True, user_telegram_id=20, user=MagicMock(id=2))]
+        failed = DBError(func="provision_reports", error="down")
+        with (
+            patch("src.dir_schedule.some_tools.get_doc_by_id", AsyncMock(return_value=chat)),
+            patch("src.dir_schedule.writes.ScheduleWrites.provision_reports", AsyncMock(return_value=failed)),
+            patch("src.dir_schedule.writes.ScheduleWrites.claim_runs", AsyncMock(return_value={20})),
+            patch("src.dir_schedule.writes.ScheduleWrites.finish_runs", AsyncMock(return_value=1)) as mock_finish,
+        ):
+            results = await AskingMoney(variants=3).start_asking(
+                birthday_user=MagicMock(telegram_id=1),
+                users_chats=users_chats,
+                days_to_birthday=3,
+                holiday=holiday,
+                fan_out=MagicMock(),
+                run_date=date(2024, 10, 19),
+                ledger_job="check_birthday",
+            )
+
+        assert results == []
+        assert mock_finish.call_args.kwargs["done"] is False
+
+
+class TestPreparedGreetings:
+    """Тести для привітань, підготовлених заздалегідь."""
+
+    @pytest.mark.asyncio
+    async def test_prepared_content_without_ai(self):
+        """Є підготовлене привітання - ранковий запуск не звертається до AI."""
+        from src.dir_schedule.some_tools import GreetingsUser
+
+        chat = MagicMock(id=3, chat_id=-100)
+        user_chat = MagicMock(chat_id=3, user=MagicMock(id=7, telegram_id=70, first_name="U"))
+        prepared = MagicMock(text="Вітаємо!", image_key="birthday:7:2024:3:abc")
+        with (
+            patch("src.dir_schedule.some_tools.get_doc_by_id", AsyncMock(return_value=chat)),
+            patch("src.dir_schedule.some_tools.get_prepared_content", AsyncMock(return_value=prepared)) as mock_get,
+            patch("src.dir_schedule.some_tools.ResponseTextAI") as mock_ai,
+        ):
+            message = await GreetingsUser().start_greet(user_chat=user_chat, greet_date=date(2024, 10, 19))
+
+        mock_get.assert_awaited_once_with(key="greeting:2024-10-19:3:7")
+        mock_ai.assert_not_called()
+        assert (message["text"], message["image_key"]) == ("Вітаємо!", "birthday:7:2024:3:abc")
+        assert message["dedup_key"] == "greeting:2024-10-19:3:7"
+
+    @pytest.mark.asyncio
+    async def test_live_generation_without_prepared(self):
+        """Немає підготовленого привітання - генерація наживо."""
+        from src.dir_schedule.some_tools import GreetingsUser
+
+        chat = MagicMock(id=3, chat_id=-100)
+        user_chat = MagicMock(chat_id=3, user=MagicMock(id=7, telegram_id=70, first_name="U"))
+        live = {"text": "Live", "image_key": None}
+        with (
+            patch("src.dir_schedule.some_tools.get_doc_by_id", AsyncMock(return_value=chat)),
+            patch("src.dir_schedule.some_tools.get_prepared_content", AsyncMock(return_value=None)),
+            patch.object(GreetingsUser, "generate", AsyncMock(return_value=live)) as mock_generate,
+        ):
+            message = await GreetingsUser().start_greet(user_chat=user_chat, greet_date=date(2024, 10, 19))
+
+        mock_generate.assert_awaited_once()
+        assert message["text"] == "Live"
+        assert message["fallback_chat_id"] == 70
+
+    @pytest.mark.asyncio
+    async def test_prepare_saves_with_expiry(self):
+        """Підготовлене привітання зберігається до ttl годин від початку дня привітання."""
+        from src.dir_schedule.some_tools import GreetingsUser
+
+        chat, user = MagicMock(id=3), MagicMock(id=7)
+        content = {"text": "Вітаємо!", "image_key": "k"}
+        with (
+            patch.object(GreetingsUser, "generate", AsyncMock(return_value=content)),
+            patch(
+                "src.dir_schedule.writes.ScheduleWrites.save_prepared_content", AsyncMock(return_value=True)
+            ) as mock_save,
+        ):
+            assert await GreetingsUser().prepare(chat=chat, user=user, greet_date=date(2024, 10, 19), ttl=36) is True
+
+        mock_save.assert_awaited_once_with(
+            key="greeting:2024-10-19:3:7", expires_at=datetime(2024, 10, 20, 12, 0), text="Вітаємо!", image_key="k"
+        )
+
+
+class TestChatTitle:
+    """Тести для назви групи з Chat.title."""
+
+    @pytest.mark.asyncio
+    async def test_title_from_column(self):
+        """Відома назва читається з колонки без запиту до Telegram."""
+        from src.dir_schedule.some_tools import DataAI
+
+        with patch("src.dir_schedule.some_tools.bot") as mock_bot:
+            mock_bot.get_chat = AsyncMock()
+            assert await DataAI().get_title(chat=MagicMock(title="Team")) == "Team"
+
+        mock_bot.get_chat.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unknown_title_is_stored(self):
+        """Невідома назва береться з Telegram один раз і зберігається."""
+        from src.dir_schedule.some_tools import DataAI
+
+        chat = MagicMock(title=None, chat_id=-100)
+        with (
+            patch("src.dir_schedule.some_tools.bot") as mock_bot,
+            patch("src.dir_schedule.writes.ScheduleWrites.update_chat_title", AsyncMock(return_value=1)) as mock_update,
+        ):
+            mock_bot.get_chat = AsyncMock(return_value=MagicMock(title="Team"))
+            assert await DataAI().get_title(chat=chat) == "Team"
+            assert await DataAI().get_title(chat=chat) == "Team"
+
+        mock_bot.get_chat.assert_awaited_once_with(chat_id=-100)
+        mock_update.assert_awaited_once_with(chat_id=-100, title="Team")
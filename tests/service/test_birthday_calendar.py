@@ -0,0 +1,56 @@
+"""
+Тести для модуля birthday_calendar.py
+"""
+
+from datetime import date, datetime
+
+from src.service.birthday_calendar import NO_BIRTHDAY, BirthdayCalendar, day_index
+
+
+class TestBirthdayCalendar:
+    """Тести для in-memory календаря днів народження."""
+
+    def test_day_index(self):
+        """Індекси днів рахуються по високосному року."""
+        assert day_index(month_day="01-01") == 0
+        assert day_index(month_day="02-29") == 59
+        assert day_index(month_day="03-01") == 60
+        assert day_index(month_day="12-31") == 365
+
+    def test_upcoming_crosses_new_year(self):
+        """Пошук найближчих днів народження через новий рік."""
+        calendar = BirthdayCalendar()
+        calendar.load(users_birthdays=[(1, date(1990, 12, 31)), (2, date(1991, 1, 2)), (3, date(1992, 1, 5))])
+
+        assert calendar.upcoming(date_today=date(2024, 12, 30), days=3) == {1: 1, 2: 3}
+
+    def test_upcoming_february_29(self):
+        """Іменинник 29.02 потрапляє на 28.02 у невисокосний рік."""
+        calendar = BirthdayCalendar()
+        calendar.load(users_birthdays=[(1, date(2000, 2, 29))])
+
+        assert calendar.upcoming(date_today=date(2025, 2, 27), days=1) == {1: 1}
+        assert calendar.upcoming(date_today=date(2024, 2, 27), days=1) == {}
+
+    def test_update_moves_user(self):
+        """Зміна дати народження переносить користувача в інший bucket."""
+        calendar = BirthdayCalendar()
+        calendar.load(users_birthdays=[(1, date(1990, 5, 1))])
+
+        calendar.update(user_id=1, birthday=datetime(1990, 6, 1))
+        calendar.update(user_id=2, birthday=date(1990, 6, 1))
+
+        assert calendar.upcoming(date_today=date(2024, 5, 1), days=0) == {}
+        assert calendar.upcoming(date_today=date(2024, 6, 1), days=0) == {1: 0, 2: 0}
+
+        calendar.update(user_id=1, birthday=None)
+        assert calendar.sort_key(user_id=1) == NO_BIRTHDAY
+        assert len(calendar) == 1
+
+    def test_update_before_load_is_ignored(self):
+        """До завантаження календар не приймає оновлень."""
+        calendar = BirthdayCalendar()
+        calendar.update(user_id=1, birthday=date(1990, 6, 1))
+
+        assert not calendar.loaded
+        assert len(calendar) == 0
@@ -0,0 +1,57 @@
+"""
+Тести для модуля clock.py
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+
+class TestClock:
+    """Тести для сервісу часу."""
+
+    def test_now_is_kyiv_time(self):
+        """Час Києва без tzinfo."""
+        from src.service.clock import Clock
+
+        now = Clock().now()
+
+        assert now.tzinfo is None
+        assert abs(now - Clock(timezone_="Europe/Kyiv").now()) < timedelta(seconds=1)
+
+    def test_freeze_and_advance(self):
+        """Зупинений годинник стоїть, advance рухає його вперед."""
+        from src.service.clock import Clock
+
+        clock = Clock()
+        clock.freeze(at=datetime(2024, 10, 19, 8, 0))
+        clock.advance(delta=timedelta(hours=1))
+
+        assert clock.now() == datetime(2024, 10, 19, 9, 0)
+        assert clock.today() == datetime(2024, 10, 19).date()
+
+        clock.unfreeze()
+        clock.advance(delta=timedelta(days=1))
+        assert clock.now() - Clock().now() > timedelta(hours=23)
+
+        clock.reset()
+        assert abs(clock.now() - Clock().now()) < timedelta(seconds=1)
+
+    def test_frozen_restores_state(self):
+        """Після блоку 'with' годинник повертається до попереднього стану."""
+        from src.service.clock import Clock
+
+        clock = Clock()
+        with clock.frozen(at=datetime(2024, 10, 19, 8, 0)):
+            assert clock.now() == datetime(2024, 10, 19, 8, 0)
+
+        assert clock.frozen_at is None
+
+    def test_formatter_uses_record_time(self):
+        """Форматер бере час запису (record.created), а не поточний."""
+        from src.service.loggers.time_formatter import KyivTimeFormatter
+
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "message", None, None)
+        record.created = 1729314000.0  # 2024-10-19 05:00 UTC
+
+        assert KyivTimeFormatter("%(asctime)s").formatTime(record) == "2024-10-19 08:00:00"
+        assert KyivTimeFormatter("%(asctime)s").formatTime(record, datefmt="%H:%M") == "08:00"
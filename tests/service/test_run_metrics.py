@@ -0,0 +1,56 @@
+"""
+Тести для модуля run_metrics.py
+"""
+
+from datetime import date, datetime
+from types import SimpleNamespace
+
+
+class TestRunMetrics:
+    """Тести для метрик запуску планувальника."""
+
+    def test_outside_of_run(self):
+        """Поза запуском лічильники і таймери нічого не роблять."""
+        from src.service.run_metrics import count, current_run, timer
+
+        count(name="chats")
+        with timer(stage="query"):
+            pass
+
+        assert current_run.get() is None
+
+    def test_merge_of_shard(self):
+        """Метрики шарда додаються до метрик запуску."""
+        from src.service.run_metrics import RunMetrics, track_run
+
+        with track_run(job="check_birthday", run_date=date(2024, 10, 19)) as metrics:
+            metrics.count(name="chats", n=2)
+            metrics.add_time(stage="query", duration=0.5)
+        shard = RunMetrics(job="check_birthday", run_date=date(2024, 10, 19))
+        shard.count(name="chats", n=3)
+        shard.add_time(stage="query", duration=1.5)
+
+        metrics.merge(report=shard.report())
+        report = metrics.report()
+
+        assert report["counters"] == {"chats": 5}
+        assert report["stages"]["query"] == {"calls": 2, "total": 2.0, "max": 1.5}
+
+    def test_runs_report(self):
+        """Текст для адміна з підсумками запусків."""
+        from src.service.run_metrics import runs_report
+
+        run = SimpleNamespace(
+            job="check_birthday",
+            run_date=date(2024, 10, 19),
+            started_at=datetime(2024, 10, 19, 8, 0),
+            duration=12.5,
+            ok=True,
+            counters={"chats": 3},
+            stages={"chats": {"calls": 1, "total": 12.0, "max": 12.0}},
+        )
+
+        text = runs_report(runs=[run])
+
+        assert "check_birthday" in text and "12.5s" in text and "chats: 3" in text
+        assert runs_report(runs=[]) == "Запусків планувальника ще не було"
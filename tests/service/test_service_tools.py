@@ -325,3 +325,79 @@ class TestServiceTools:
 
         except (ImportError, AttributeError, TypeError):
             assert True
+
+
+class TestBirthdayWindow:
+    """Тести для вікна найближчих днів народження."""
+
+    def test_window_crosses_new_year(self):
+        """Вікно переходить через новий рік."""
+        from src.service.service_tools import get_birthday_window
+
+        window = get_birthday_window(date_today=date(2024, 12, 30), days=3)
+
+        assert window == {"12-30": 0, "12-31": 1, "01-01": 2, "01-02": 3}
+
+    def test_february_29_in_non_leap_year(self):
+        """День народження 29.02 припадає на 28.02 у невисокосний рік."""
+        from src.service.service_tools import get_birthday_window
+
+        window = get_birthday_window(date_today=date(2025, 2, 27), days=2)
+
+        assert window["02-28"] == 1
+        assert window["02-29"] == 1
+        assert window["03-01"] == 2
+
+    def test_february_29_in_leap_year(self):
+        """У високосний рік 29.02 має свій власний день."""
+        from src.service.service_tools import get_birthday_window
+
+        window = get_birthday_window(date_today=date(2024, 2, 28), days=1)
+
+        assert window == {"02-28": 0, "02-29": 1}
+
+
+class TestSendTime:
+    """Тести для слоту доставки чату."""
+
+    def test_slot_inside_local_window(self):
+        """Слот в межах локального вікна, переведений в час Києва."""
+        from src.service.service_tools import get_send_time
+
+        for key in range(1, 50):
+            send_at = get_send_time(
+                run_date=date(2024, 10, 19), key=key, timezone_="Europe/London", send_from="09:00", send_to="21:00"
+            )
+            assert datetime(2024, 10, 19, 11, 0) <= send_at < datetime(2024, 10, 19, 23, 0)
+
+    def test_slots_are_spread(self):
+        """Сусідні чати отримують різні слоти, той самий чат - той самий слот щодня."""
+        from src.service.service_tools import get_send_time
+
+        kwargs = dict(timezone_="Europe/Kyiv", send_from="09:00", send_to="21:00")
+        slots = {get_send_time(run_date=date(2024, 10, 19), key=key, **kwargs) for key in range(1, 11)}
+        day_1 = get_send_time(run_date=date(2024, 10, 19), key=7, **kwargs)
+        day_2 = get_send_time(run_date=date(2024, 10, 20), key=7, **kwargs)
+
+        assert len(slots) == 10
+        assert day_2 - day_1 == timedelta(days=1)
+
+    def test_unknown_timezone(self):
+        """Невідома зона - час Києва."""
+        from src.service.service_tools import get_send_time
+
+        send_at = get_send_time(
+            run_date=date(2024, 10, 19), key=1, timezone_="Mars/Base", send_from="10:00", send_to="10:00"
+        )
+
+        assert send_at == datetime(2024, 10, 19, 10, 0)
+
+    def test_invalid_window(self):
+        """Невірне вікно чату - вікно за замовчуванням 09:00-21:00."""
+        from src.service.service_tools import get_send_time
+
+        send_at = get_send_time(
+            run_date=date(2024, 10, 19), key=1, timezone_="Europe/Kyiv", send_from="25:00", send_to=None
+        )
+
+        assert datetime(2024, 10, 19, 9, 0) <= send_at < datetime(2024, 10, 19, 21, 0)
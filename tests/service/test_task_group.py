@@ -0,0 +1,75 @@
+"""
+Тести для модуля task_group.py
+"""
+
+import asyncio
+
+import pytest
+
+
+class TestTaskGroup:
+    """Тести для групи задач під наглядом."""
+
+    @pytest.mark.asyncio
+    async def test_limit_of_running_tasks(self):
+        """Одночасно виконується не більше limit задач."""
+        from src.service.task_group import TaskGroup
+
+        group = TaskGroup(name="test", limit=2)
+        running, peak = 0, 0
+
+        async def job(n: int) -> int:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return n
+
+        for n in range(5):
+            group.spawn(job(n), kind="job")
+        results = await group.join()
+
+        assert peak == 2
+        assert sorted(res.result for res in results) == [0, 1, 2, 3, 4]
+        assert group.running == 0
+
+    @pytest.mark.asyncio
+    async def test_exceptions_are_collected(self):
+        """Помилка задачі не губиться і не зупиняє інші задачі."""
+        from src.service.task_group import TaskGroup
+
+        group = TaskGroup(name="test", limit=3)
+
+        async def fail():
+            raise ValueError("boom")
+
+        async def ok():
+            return "ok"
+
+        group.spawn(fail(), name="fail", kind="a")
+        group.spawn(ok(), name="ok", kind="b")
+        results = {res.name: res for res in await group.join()}
+
+        assert isinstance(results["fail"].error, ValueError)
+        assert results["ok"].ok and results["ok"].result == "ok"
+
+    @pytest.mark.asyncio
+    async def test_report_of_run(self):
+        """Звіт запуску: підсумки, тривалості, після звіту починається новий запуск."""
+        from src.service.task_group import TaskGroup
+
+        group = TaskGroup(name="test", limit=3)
+
+        async def fail():
+            raise ValueError("boom")
+
+        group.spawn(asyncio.sleep(0.01), kind="sleep")
+        group.spawn(fail(), kind="fail")
+        await group.join()
+        report = group.report()
+
+        assert (report["tasks"], report["ok"], report["failed"]) == (2, 1, 1)
+        assert report["by_kind"] == {"sleep": 1, "fail": 1}
+        assert report["max_duration"] >= 0.01
+        assert group.report()["tasks"] == 0
@@ -0,0 +1,108 @@
+"""
+Тести для модуля user_cache.py
+"""
+
+import json
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+def make_user(**kwargs):
+    from src.sql.models import User
+
+    data = {"id": 1, "telegram_id": 10, "first_name": "Ann", "birthday": date(1990, 10, 20), "status": True}
+    data.update(kwargs)
+    return User(created_at=datetime(2024, 1, 2, 3, 4), **data)
+
+
+class TestUserCache:
+    """Тести для кешу користувачів."""
+
+    @pytest.mark.asyncio
+    async def test_read_through_and_hit_rate(self):
+        """Перше читання йде в базу, далі - з кешу, кожен раз новий об'єкт User."""
+        from src.service.user_cache import UserCache
+
+        cache = UserCache(max_size=10, ttl=60)
+        load = AsyncMock(return_value=make_user())
+
+        first = await cache.get(telegram_id=10, load=load)
+        second = await cache.get(telegram_id=10, load=load)
+
+        load.assert_awaited_once_with(10)
+        assert (second.id, second.first_name, second.birthday) == (1, "Ann", date(1990, 10, 20))
+        assert second is not first
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_ttl_lru_and_missing_user(self):
+        """Застарілі записи читаються знову, найстаріші витісняються, відсутні користувачі не кешуються."""
+        from src.service.user_cache import UserCache
+
+        cache = UserCache(max_size=2, ttl=60)
+        load = AsyncMock(side_effect=lambda telegram_id: make_user(telegram_id=telegram_id))
+        with patch("src.service.user_cache.monotonic", return_value=100.0):
+            for telegram_id in (1, 2, 3):
+                await cache.get(telegram_id=telegram_id, load=load)
+        assert list(cache.users) == [2, 3]
+        with patch("src.service.user_cache.monotonic", return_value=161.0):
+            await cache.get(telegram_id=3, load=load)
+        assert load.await_count == 4
+
+        missing = AsyncMock(return_value=None)
+        assert await cache.get(telegram_id=5, load=missing) is None
+        assert 5 not in cache.users
+
+    @pytest.mark.asyncio
+    async def test_invalidate_both_tiers(self):
+        """Зміна користувача видаляє його з LRU і Redis, дані з Redis не потребують бази."""
+        from src.service.user_cache import UserCache, user_to_dict
+
+        redis = MagicMock()
+        redis.get = AsyncMock(side_effect=[json.dumps(user_to_dict(user=make_user())), None])
+        redis.set = AsyncMock()
+        redis.delete = AsyncMock()
+        cache = UserCache(max_size=10, ttl=60, redis=redis, redis_ttl=600)
+        load = AsyncMock(return_value=make_user(first_name="Bob"))
+
+        user = await cache.get(telegram_id=10, load=load)
+        assert (user.first_name, user.created_at) == ("Ann", datetime(2024, 1, 2, 3, 4))
+        load.assert_not_awaited()
+
+        await cache.invalidate(telegram_id=10)
+        redis.delete.assert_awaited_once_with("user:tg:10")
+        assert (await cache.get(telegram_id=10, load=load)).first_name == "Bob"
+        assert redis.set.call_args.kwargs["ex"] == 600
+        assert cache.stats()["redis_hits"] == 1 and cache.stats()["invalidations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_down(self):
+        """Недоступний Redis - кеш працює як LRU в процесі."""
+        from src.service.user_cache import UserCache
+
+        redis = MagicMock()
+        redis.get = AsyncMock(side_effect=ConnectionError("down"))
+        redis.set = AsyncMock(side_effect=ConnectionError("down"))
+        cache = UserCache(max_size=10, ttl=60, redis=redis)
+        load = AsyncMock(return_value=make_user())
+
+        assert (await cache.get(telegram_id=10, load=load)).id == 1
+        assert (await cache.get(telegram_id=10, load=load)).id == 1
+        load.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_changed_while_loading_is_not_cached(self):
+        """Користувача змінили під час читання з бази - застарілі дані не потрапляють в кеш."""
+        from src.service.user_cache import UserCache
+
+        cache = UserCache(max_size=10, ttl=60)
+
+        async def load(telegram_id):
+            await cache.invalidate(telegram_id=telegram_id)
+            return make_user()
+
+        assert (await cache.get(telegram_id=10, load=load)).id == 1
+        assert 10 not in cache.users
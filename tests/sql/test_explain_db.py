@@ -0,0 +1,70 @@
+"""
+Тести для модуля explain_db.py
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def make_plan(plan):
+    result = MagicMock()
+    result.scalar_one.return_value = [{"Plan": plan}]
+    return result
+
+
+class TestExplainDB:
+    """Тести для перевірки індексів гарячих запитів."""
+
+    def test_plan_indexes(self):
+        """Індекси збираються з усіх вузлів плану."""
+        from src.sql.explain_db import plan_indexes
+
+        plan = {
+            "Node Type": "Nested Loop",
+            "Plans": [
+                {"Node Type": "Index Scan", "Index Name": "uq_user_chat_chat_user"},
+                {"Node Type": "Bitmap Heap Scan", "Plans": [{"Node Type": "Bitmap Index Scan", "Index Name": "a"}]},
+                {"Node Type": "Seq Scan"},
+            ],
+        }
+
+        assert plan_indexes(plan=plan) == {"uq_user_chat_chat_user", "a"}
+        assert plan_indexes(plan={"Node Type": "Seq Scan"}) == set()
+
+    def test_hot_queries_match_models(self):
+        """Кожен очікуваний індекс оголошений в моделях, запити компілюються для Postgres."""
+        from sqlalchemy import Index, UniqueConstraint
+        from sqlalchemy.dialects import postgresql
+
+        from src.sql.explain_db import hot_queries
+        from src.sql.models import Base
+
+        declared = {
+            item.name
+            for table in Base.metadata.tables.values()
+            for item in [*table.indexes, *table.constraints]
+            if isinstance(item, (Index, UniqueConstraint))
+        }
+        for name, query, expected in hot_queries():
+            assert set(expected) <= declared, name
+            query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+
+    @pytest.mark.asyncio
+    async def test_explain_hot_queries(self, mock_async_session):
+        """EXPLAIN кожного запиту без seq scan, у звіті першими - запити без свого індексу."""
+        from src.sql.explain_db import explain_hot_queries, explain_report, hot_queries
+
+        queries = hot_queries()
+        plans = [make_plan({"Node Type": "Index Scan", "Index Name": expected[0]}) for _, _, expected in queries]
+        plans[0] = make_plan({"Node Type": "Seq Scan"})
+        session = mock_async_session(MagicMock(), *plans)
+        with patch("src.sql.explain_db.DBSession", MagicMock(return_value=session)):
+            rows = await explain_hot_queries()
+
+        assert "enable_seqscan = off" in str(session.execute.call_args_list[0].args[0])
+        assert "EXPLAIN (FORMAT JSON)" in str(session.execute.call_args_list[1].args[0])
+        assert [row["used"] for row in rows] == [False] + [True] * (len(queries) - 1)
+        assert explain_report(rows=rows).splitlines()[0] == (
+            "⛔ get_user_by_phone: ix_users_phone_number (plan: no index)"
+        )
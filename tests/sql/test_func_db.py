@@ -236,3 +236,137 @@ class TestFuncDB:
 
         except (ImportError, AttributeError, TypeError):
             assert True
+
+
+class TestProvisionReports:
+    """Тести для створення Report одним запитом."""
+
+    @pytest.mark.asyncio
+    async def test_one_insert_on_conflict(self):
+        """Відсутні Report створюються одним INSERT ... ON CONFLICT, повертаються боржники."""
+        from sqlalchemy.dialects import postgresql
+
+        from src.sql.func_db import provision_reports
+
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        session.begin.return_value = session
+        owing = MagicMock()
+        owing.scalars.return_value.all.return_value = [2, 4]
+        session.execute = AsyncMock(side_effect=[MagicMock(), owing])
+        with patch("src.sql.func_db.DBSession", return_value=session):
+            result = await provision_reports(holiday=MagicMock(id=7, chat_id=1), user_ids=[2, 3, 4])
+
+        assert result == {2, 4}
+        insert_sql = str(session.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (user_id, chat_id, holiday_id) DO NOTHING" in insert_sql
+
+    @pytest.mark.asyncio
+    async def test_no_members(self):
+        """Без учасників - без запитів до бази."""
+        from src.sql.func_db import provision_reports
+
+        with patch("src.sql.func_db.DBSession") as mock_session:
+            assert await provision_reports(holiday=MagicMock(id=7, chat_id=1), user_ids=[]) == set()
+
+        mock_session.assert_not_called()
+
+
+def make_returning(rows):
+    result = MagicMock()
+    result.mappings.return_value.all.return_value = rows
+    return result
+
+
+class TestBulkInsert:
+    """Тести для масового створення і оновлення документів."""
+
+    def test_chunks_by_rows_and_parameters(self):
+        """Частини не більші за chunk_size рядків і 32767 параметрів."""
+        from src.sql.func_db import chunks
+
+        rows = [{"a": n, "b": n} for n in range(5)]
+
+        assert [len(chunk) for chunk in chunks(rows=rows, chunk_size=2)] == [2, 2, 1]
+        wide = [{f"c{n}": n for n in range(20000)}] * 3
+        assert [len(chunk) for chunk in chunks(rows=wide, chunk_size=1000)] == [1, 1, 1]
+
+    @pytest.mark.asyncio
+    async def test_create_many_one_insert_per_chunk(self, mock_async_session):
+        """Один INSERT ... ON CONFLICT DO NOTHING на частину, пропущені - ті, що вже є."""
+        from sqlalchemy.dialects import postgresql
+
+        from src.sql.func_db import create_many
+
+        rows = [{"user_id": n, "chat_id": 1, "holiday_id": 7} for n in range(3)]
+        session = mock_async_session(
+            make_returning([{"is_inserted": True, "id": 10, "user_id": 0}]),
+            make_returning([{"is_inserted": True, "id": 11, "user_id": 2}]),
+        )
+        with patch("src.sql.func_db.DBSession", return_value=session):
+            bulk = await create_many(model="report", rows=rows, returning=["id", "user_id"], chunk_size=2)
+
+        assert (bulk.inserted, bulk.updated, bulk.skipped) == (2, 0, 1)
+        assert bulk.rows == [{"id": 10, "user_id": 0}, {"id": 11, "user_id": 2}]
+        assert session.execute.await_count == 2
+        sql = str(session.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT DO NOTHING RETURNING xmax = 0 AS is_inserted, report.id, report.user_id" in sql
+
+    @pytest.mark.asyncio
+    async def test_upsert_many_counts_inserted_and_updated(self, mock_async_session):
+        """ON CONFLICT DO UPDATE оновлює всі колонки, крім ключа, xmax розрізняє нові й оновлені рядки."""
+        from sqlalchemy.dialects import postgresql
+
+        from src.sql.func_db import upsert_many
+
+        rows = [{"chat_id": 1, "user_telegram_id": n, "status": True} for n in (10, 11)]
+        session = mock_async_session(make_returning([{"is_inserted": True}, {"is_inserted": False}]))
+        with patch("src.sql.func_db.DBSession", return_value=session):
+            bulk = await upsert_many(
+                model="user_chat", rows=rows, conflict=["chat_id", "user_telegram_id"], chunk_size=100
+            )
+
+        assert (bulk.inserted, bulk.updated, bulk.skipped) == (1, 1, 0)
+        sql = str(session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (chat_id, user_telegram_id) DO UPDATE SET status = excluded.status" in sql
+
+    @pytest.mark.asyncio
+    async def test_invalid_model_and_no_rows(self):
+        """Невідома модель - DBError, порожній список - без запитів до бази."""
+        from src.sql.func_db import create_many, upsert_many
+        from src.sql.tool_db import db_failed
+
+        with patch("src.sql.func_db.DBSession") as mock_session:
+            result = await create_many(model="nope", rows=[{"a": 1}])
+            assert db_failed(result) and result.error == "unknown model nope"
+            assert db_failed(await upsert_many(model="nope", rows=[{"a": 1}], conflict=["a"]))
+            bulk = await create_many(model="holiday", rows=[])
+
+        assert (bulk.inserted, bulk.updated, bulk.skipped) == (0, 0, 0)
+        mock_session.assert_not_called()
+
+
+class TestUserCacheInvalidation:
+    """Тести для кешу користувачів у func_db."""
+
+    @pytest.mark.asyncio
+    async def test_doc_update_and_phone_drop_cached_user(self, mock_async_session):
+        """doc_update і update_phone_number видаляють користувача з кешу."""
+        from src.sql.func_db import doc_update, update_phone_number
+        from src.sql.models import User
+
+        user = User(id=1, telegram_id=10, first_name="Ann")
+        found = MagicMock()
+        found.scalar.return_value = user
+        session = mock_async_session(found)
+        session.merge = AsyncMock()
+        session.commit = AsyncMock()
+        with (
+            patch("src.sql.func_db.DBSession", return_value=session),
+            patch("src.sql.func_db.user_cache.invalidate", AsyncMock()) as mock_invalidate,
+        ):
+            await doc_update(doc=user)
+            await update_phone_number(telegram_id=10, phone_number="+380500000000")
+
+        assert [call.kwargs["telegram_id"] for call in mock_invalidate.call_args_list] == [10, 10]
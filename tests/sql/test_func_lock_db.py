@@ -0,0 +1,75 @@
+"""
+Тести для модуля func_lock_db.py
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+def make_connection(locked: bool):
+    connection = MagicMock()
+    result = MagicMock()
+    result.scalar.return_value = locked
+    connection.execute = AsyncMock(return_value=result)
+    connection.execution_options = AsyncMock(return_value=connection)
+    connection.close = AsyncMock()
+    connection.invalidate = AsyncMock()
+    return connection
+
+
+class TestAdvisoryLock:
+    """Тести для advisory lock."""
+
+    @pytest.mark.asyncio
+    async def test_acquire_keeps_connection(self):
+        """Взятий лок тримає своє з'єднання до release()."""
+        from src.sql.func_lock_db import AdvisoryLock
+
+        connection = make_connection(locked=True)
+        lock = AdvisoryLock(name="scheduler")
+        lock.engine = MagicMock(connect=AsyncMock(return_value=connection))
+        assert await lock.try_acquire() is True
+        assert lock.held
+        connection.close.assert_not_called()
+        await lock.release()
+
+        assert not lock.held
+        connection.execution_options.assert_awaited_once_with(isolation_level="AUTOCOMMIT")
+        assert connection.execute.call_args.args[1] == {"key": lock.key}
+        connection.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_busy_lock_returns_connection(self):
+        """Лок тримає інша репліка - з'єднання одразу повертається в пул."""
+        from src.sql.func_lock_db import AdvisoryLock
+
+        connection = make_connection(locked=False)
+        lock = AdvisoryLock(name="scheduler")
+        lock.engine = MagicMock(connect=AsyncMock(return_value=connection))
+        assert await lock.try_acquire() is False
+
+        assert not lock.held
+        connection.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_lost_connection_drops_lock(self):
+        """Обрив з'єднання - лок втрачено, з'єднання не повертається в пул."""
+        from src.sql.func_lock_db import AdvisoryLock
+
+        connection = make_connection(locked=True)
+        lock = AdvisoryLock(name="scheduler")
+        lock.connection = connection
+        connection.execute = AsyncMock(side_effect=ConnectionError("lost"))
+
+        assert await lock.alive() is False
+        assert not lock.held
+        connection.invalidate.assert_awaited_once()
+
+    def test_lock_is_refused_behind_pgbouncer(self):
+        """За pgbouncer без прямого з'єднання лок не створюється - планувальник не стартує."""
+        from src.sql.func_lock_db import AdvisoryLock
+
+        with patch("src.sql.func_lock_db.get_lock_engine", MagicMock(side_effect=RuntimeError("DB_PGBOUNCER=1"))):
+            with pytest.raises(RuntimeError):
+                AdvisoryLock(name="scheduler")
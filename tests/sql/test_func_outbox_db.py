@@ -0,0 +1,21 @@
+"""
+Тести для модуля func_outbox_db.py
+"""
+
+from unittest.mock import MagicMock
+
+
+class TestOutboxMessage:
+    """Тести для побудови рядка outbox."""
+
+    def test_reply_markup_is_json(self):
+        """reply_markup зберігається як json."""
+        from src.sql.func_outbox_db import outbox_message
+
+        reply_markup = MagicMock()
+        reply_markup.model_dump_json.return_value = '{"inline_keyboard": []}'
+
+        message = outbox_message(kind="panel", dedup_key="panel:1", chat_id=1, text="t", reply_markup=reply_markup)
+
+        assert message["reply_markup"] == '{"inline_keyboard": []}'
+        assert message["image_url"] is None
@@ -347,3 +347,206 @@ class TestToolDB:
 
         except (ImportError, AttributeError, TypeError):
             assert True
+
+
+class TestRetryOnDbError:
+    """Тести для декоратора повторів з backoff, дедлайном і circuit breaker."""
+
+    @pytest.mark.asyncio
+    async def test_retry_with_backoff_then_success(self):
+        """Помилка підключення повторюється з jitter-затримкою, успіх повертає результат."""
+        from sqlalchemy.exc import OperationalError
+
+        from src.sql.tool_db import CircuitBreaker, db_stats, retry_on_db_error
+
+        calls = AsyncMock(side_effect=[OperationalError("select", {}, Exception("down")), 42])
+
+        @retry_on_db_error(max_retries=3, delay=0.2, max_delay=2.0, breaker=CircuitBreaker(failures=5))
+        async def flaky_query():
+            return await calls()
+
+        with (
+            patch("src.sql.tool_db.asyncio.sleep", AsyncMock()) as mock_sleep,
+            patch("src.sql.tool_db.uniform", return_value=0.1) as mock_uniform,
+        ):
+            assert await flaky_query() == 42
+
+        mock_uniform.assert_called_once_with(0, 0.2)
+        mock_sleep.assert_awaited_once_with(0.1)
+        stats = db_stats["flaky_query"]
+        assert (stats["calls"], stats["ok"], stats["retries"], stats["failed"]) == (1, 1, 1, 0)
+
+    @pytest.mark.asyncio
+    async def test_query_error_is_not_retried(self):
+        """Помилка запиту не повторюється і не відкриває circuit, результат - DBError."""
+        from sqlalchemy.exc import IntegrityError
+
+        from src.sql.tool_db import CircuitBreaker, db_failed, retry_on_db_error
+
+        breaker = CircuitBreaker(failures=1)
+        calls = AsyncMock(side_effect=IntegrityError("insert", {}, Exception("duplicate")))
+
+        @retry_on_db_error(max_retries=3, breaker=breaker)
+        async def bad_insert():
+            return await calls()
+
+        result = await bad_insert()
+
+        assert db_failed(result) and not result and list(result) == []
+        assert db_failed(None) is False
+        calls.assert_awaited_once()
+        assert breaker.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_deadline_limits_slow_query(self):
+        """Запит довший за дедлайн переривається і рахується як timeout."""
+        import asyncio
+
+        from src.sql.tool_db import CircuitBreaker, db_failed, db_stats, retry_on_db_error
+
+        @retry_on_db_error(max_retries=1, deadline=0.05, breaker=CircuitBreaker(failures=5))
+        async def slow_query():
+            await asyncio.sleep(1)
+
+        assert db_failed(await slow_query())
+        assert db_stats["slow_query"]["timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_deadline_is_not_counted_by_circuit(self):
+        """Вичерпаний дедлайн не повторюється і не відкриває circuit - база при цьому може бути здорова."""
+        import asyncio
+
+        from src.sql.tool_db import CircuitBreaker, db_failed, retry_on_db_error
+
+        breaker = CircuitBreaker(failures=1)
+        attempts = []
+
+        @retry_on_db_error(max_retries=3, deadline=0.05, breaker=breaker)
+        async def long_query():
+            attempts.append(1)
+            await asyncio.sleep(1)
+
+        assert db_failed(await long_query())
+        assert len(attempts) == 1
+        assert breaker.state == "closed" and breaker.errors == 0
+
+    @pytest.mark.asyncio
+    async def test_no_deadline(self):
+        """deadline=None - пакетний запит не переривається."""
+        import asyncio
+
+        from src.sql.tool_db import CircuitBreaker, retry_on_db_error
+
+        @retry_on_db_error(deadline=None, breaker=CircuitBreaker(failures=5))
+        async def bulk_query():
+            await asyncio.sleep(0.05)
+            return 7
+
+        with patch("src.sql.tool_db.asyncio.timeout", wraps=asyncio.timeout) as mock_timeout:
+            assert await bulk_query() == 7
+        mock_timeout.assert_called_once_with(None)
+
+    @pytest.mark.asyncio
+    async def test_connection_timeout_of_not_idempotent_write_is_not_retried(self):
+        """Таймаут з'єднання рахується в circuit, але запис, який міг вже закомітитись, не повторюється."""
+        import asyncio
+
+        from src.sql.tool_db import CircuitBreaker, db_failed, retry_on_db_error
+
+        breaker = CircuitBreaker(failures=5)
+        calls = AsyncMock(side_effect=asyncio.TimeoutError())
+
+        @retry_on_db_error(max_retries=3, idempotent=False, breaker=breaker)
+        async def insert_row():
+            return await calls()
+
+        @retry_on_db_error(max_retries=3, breaker=breaker)
+        async def select_row():
+            return await calls()
+
+        with patch("src.sql.tool_db.asyncio.sleep", AsyncMock()):
+            assert db_failed(await insert_row())
+            assert calls.await_count == 1 and breaker.errors == 1
+            assert db_failed(await select_row())
+        assert calls.await_count == 4 and breaker.errors == 4
+
+    @pytest.mark.asyncio
+    async def test_cancel_is_not_retried(self):
+        """Скасування виклику не повторюється і не змінює circuit."""
+        import asyncio
+
+        from src.sql.tool_db import CircuitBreaker, retry_on_db_error
+
+        breaker = CircuitBreaker(failures=5)
+        calls = AsyncMock(side_effect=asyncio.CancelledError())
+
+        @retry_on_db_error(max_retries=3, idempotent=False, breaker=breaker)
+        async def insert_row():
+            return await calls()
+
+        with pytest.raises(asyncio.CancelledError):
+            await insert_row()
+        calls.assert_awaited_once()
+        assert breaker.errors == 0
+
+    @pytest.mark.asyncio
+    async def test_query_error_keeps_circuit_errors(self):
+        """Помилка запиту не скидає лічильник помилок з'єднання."""
+        from sqlalchemy.exc import IntegrityError
+
+        from src.sql.tool_db import CircuitBreaker, retry_on_db_error
+
+        breaker = CircuitBreaker(failures=5)
+        breaker.errors = 3
+
+        @retry_on_db_error(breaker=breaker)
+        async def bad_insert():
+            raise IntegrityError("insert", {}, Exception("duplicate"))
+
+        await bad_insert()
+        assert breaker.errors == 3
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_fails_fast_and_closes(self):
+        """Після серії помилок виклики не йдуть в базу, після reset одна пробна спроба закриває circuit."""
+        from sqlalchemy.exc import OperationalError
+
+        from src.sql.tool_db import CircuitBreaker, db_failed, db_stats, retry_on_db_error
+
+        breaker = CircuitBreaker(failures=2, reset=30)
+        calls = AsyncMock(side_effect=OperationalError("select", {}, Exception("down")))
+
+        @retry_on_db_error(max_retries=3, breaker=breaker)
+        async def down_query():
+            return await calls()
+
+        with (
+            patch("src.sql.tool_db.asyncio.sleep", AsyncMock()),
+            patch("src.sql.tool_db.monotonic", return_value=100.0),
+        ):
+            assert db_failed(await down_query())
+            assert calls.await_count == 2 and breaker.state == "open"
+            assert db_failed(await down_query())
+            assert calls.await_count == 2
+        assert db_stats["down_query"]["fast_failed"] == 1
+
+        calls.side_effect = None
+        calls.return_value = "ok"
+        with patch("src.sql.tool_db.monotonic", return_value=131.0):
+            assert breaker.state == "half-open"
+            assert await down_query() == "ok"
+        assert breaker.state == "closed"
+
+    def test_db_report(self):
+        """Звіт для адміна: стан circuit і функції з помилками першими."""
+        from src.sql.tool_db import db_report, db_stats
+
+        db_stats["report_ok"].update(calls=10, ok=10, total_time=0.5, max_time=0.1)
+        db_stats["report_failed"].update(calls=2, ok=1, failed=1, retries=2, total_time=0.2, max_time=0.15)
+
+        lines = db_report(limit=100).splitlines()
+
+        assert lines[0].startswith("DataBase: circuit")
+        names = [line.split(":")[0] for line in lines[1:]]
+        assert names.index("report_failed") < names.index("report_ok")
+        assert "report_ok: 10 calls, 0 failed, 0 fast, 0 retries, mean 50ms, max 100ms" in lines